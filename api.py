@@ -0,0 +1,526 @@
+"""API HTTP de conversão para clientes programáticos (ASGI, sem framework)
+
+Executar com qualquer servidor ASGI, por exemplo:
+
+    python api.py --port 8000            (requer uvicorn: pip install uvicorn)
+    uvicorn api:app --port 8000
+
+Rotas:
+    GET  /health    situação do serviço (conversões em execução e na fila)
+    POST /convert   converte o workbook enviado e devolve o arquivo à medida que é gerado
+
+O workbook vai no corpo da requisição (bruto) ou num multipart/form-data com os campos file e spec. A
+especificação das colunas é o mesmo JSON da linha de comando (column_types, column_lengths, column_formats,
+selected_columns e row_filter), enviada no campo spec, no parâmetro ?spec= ou no cabeçalho X-Conversor-Spec.
+Demais parâmetros (query string): format, encoding, sep, compression, codec, sheet, engine e filename.
+
+    curl --data-binary @dados.xlsx 'http://localhost:8000/convert?filename=dados.xlsx&format=csv' -o dados.csv
+    curl -F file=@dados.xlsx -F spec=@spec.json 'http://localhost:8000/convert?format=parquet' -o dados.parquet
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from conversor import (
+    AUTO_ENGINE,
+    ENGINES,
+    EXPORT_FORMATS,
+    JobCancelled,
+    JobProgress,
+    convert_with_spec,
+    export_file_name,
+    export_mime,
+    warning_records,
+)
+
+logger = logging.getLogger('conversor.api')
+
+# Conversões simultâneas; as demais requisições esperam a vez (enviando o arquivo ou já com ele em disco)
+API_MAX_CONCURRENT = int(os.environ.get('CONVERSOR_API_MAX_CONCURRENT') or os.cpu_count() or 1)
+# Requisições esperando a vez além das em execução, contando as que ainda enviam o arquivo;
+# acima disso a resposta é 503, antes de ler o corpo
+API_MAX_WAITING = int(os.environ.get('CONVERSOR_API_MAX_WAITING') or 4 * API_MAX_CONCURRENT)
+# Tamanho máximo do workbook enviado
+API_MAX_UPLOAD_BYTES = int(float(os.environ.get('CONVERSOR_API_MAX_UPLOAD_MB') or 512) * 1024 * 1024)
+# Bytes acumulados antes de cada envio ao cliente e envios que podem aguardar na fila (contrapressão)
+API_SEND_BYTES = 256 * 1024
+API_QUEUE_CHUNKS = 8
+# Campos do multipart que não são o arquivo ficam em memória até este tamanho
+_MAX_FIELD_BYTES = 1024 * 1024
+_MAX_PART_HEADER_BYTES = 16 * 1024
+
+EXCEL_EXTENSIONS = ('.xls', '.xlsx', '.xlsm', '.xlsb', '.ods')
+
+
+class ApiError(Exception):
+    """Erro devolvido ao cliente como JSON, com o status HTTP correspondente"""
+
+    def __init__(self, status, message, headers=()):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = list(headers)
+
+
+async def _send_json(send, status, payload, headers=()):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json; charset=utf-8'),
+                    (b'content-length', str(len(body)).encode())] + list(headers),
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def _headers(scope):
+    return {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope.get('headers', [])}
+
+
+def _query(scope):
+    """Parâmetros da query string (o último valor de cada nome)"""
+    return {name: values[-1] for name, values in parse_qs(scope.get('query_string', b'').decode('utf-8')).items()}
+
+
+def _parse_spec(text):
+    if not text:
+        return {}
+    try:
+        spec = json.loads(text)
+    except ValueError as e:
+        raise ApiError(400, f"Especificação JSON inválida: {e}")
+    if not isinstance(spec, dict):
+        raise ApiError(400, "A especificação deve ser um objeto JSON")
+    return spec
+
+
+def _convert_options(params):
+    """Opções de conversão a partir dos parâmetros da requisição"""
+    export_format = params.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        raise ApiError(400, f"Formato desconhecido: {export_format} (aceitos: {', '.join(EXPORT_FORMATS)})")
+    engine = params.get('engine', AUTO_ENGINE)
+    if engine != AUTO_ENGINE and engine not in ENGINES:
+        raise ApiError(400, f"Motor de leitura desconhecido: {engine}")
+    compression = params.get('compression') or None
+    if compression not in (None, 'gzip', 'zstd'):
+        raise ApiError(400, f"Compressão desconhecida: {compression}")
+    sheet = params.get('sheet', '0')
+    codec = params.get('codec', 'default')
+    sep = params.get('sep', ',')
+    return {
+        'export_format': export_format,
+        'engine': engine,
+        'compression': compression,
+        'codec': None if codec == 'none' else codec,
+        'sheet_name': int(sheet) if sheet.isdigit() else sheet,
+        'encoding': params.get('encoding', 'utf-8-sig'),
+        'sep': '\t' if sep in ('\\t', 'tab') else sep,
+    }
+
+
+class MultipartReader:
+    """Separa um corpo multipart/form-data recebido em pedaços: o arquivo vai para disco e os demais campos
+    ficam em memória, sem guardar o corpo inteiro"""
+
+    def __init__(self, boundary, file_target):
+        self.delimiter = b'\r\n--' + boundary
+        self.file_target = file_target
+        self.filename = None
+        self.fields = {}
+        # O primeiro delimitador não é precedido de \r\n
+        self._buffer = bytearray(b'\r\n')
+        self._state = 'preamble'
+        self._name = None
+        self._sink = None
+
+    @property
+    def complete(self):
+        return self._state == 'done'
+
+    def _start_part(self, raw_headers):
+        disposition = ''
+        for line in raw_headers.decode('utf-8', 'replace').split('\r\n'):
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'content-disposition':
+                disposition = value
+        name = re.search(r'\bname="([^"]*)"', disposition)
+        filename = re.search(r'\bfilename="([^"]*)"', disposition)
+        self._name = name.group(1) if name else ''
+        if filename is None or self._name == 'spec':
+            # A especificação pode vir como campo ou como arquivo (curl -F spec=@spec.json)
+            self._sink = bytearray()
+        elif self.filename is None:
+            # Só o primeiro arquivo é o workbook
+            self.filename = os.path.basename(filename.group(1)) or 'upload.xlsx'
+            self._sink = self.file_target
+        else:
+            self._sink = None
+
+    def _write(self, data):
+        if isinstance(self._sink, bytearray):
+            if len(self._sink) + len(data) > _MAX_FIELD_BYTES:
+                raise ApiError(413, f"Campo '{self._name}' maior que {_MAX_FIELD_BYTES} bytes")
+            self._sink += data
+        elif self._sink is not None:
+            self._sink.write(data)
+
+    def _end_part(self):
+        if isinstance(self._sink, bytearray):
+            self.fields[self._name] = self._sink.decode('utf-8')
+        self._sink = None
+
+    def feed(self, data):
+        if self._state == 'done':
+            # Epílogo depois do último delimitador: ignorado
+            return
+        self._buffer += data
+        while True:
+            if self._state in ('preamble', 'body'):
+                index = self._buffer.find(self.delimiter)
+                if index < 0:
+                    # Guarda o fim do buffer, que pode ser o começo de um delimitador
+                    keep = len(self.delimiter) - 1
+                    if self._state == 'body' and len(self._buffer) > keep:
+                        self._write(bytes(self._buffer[:-keep]))
+                        del self._buffer[:-keep]
+                    elif self._state == 'preamble':
+                        del self._buffer[:-keep]
+                    return
+                if self._state == 'body':
+                    self._write(bytes(self._buffer[:index]))
+                    self._end_part()
+                del self._buffer[:index + len(self.delimiter)]
+                self._state = 'boundary'
+            elif self._state == 'boundary':
+                if len(self._buffer) < 2:
+                    return
+                if self._buffer[:2] == b'--':
+                    self._state = 'done'
+                    return
+                self._state = 'headers'
+            elif self._state == 'headers':
+                index = self._buffer.find(b'\r\n\r\n')
+                if index < 0:
+                    if len(self._buffer) > _MAX_PART_HEADER_BYTES:
+                        raise ApiError(400, "Cabeçalhos do multipart muito longos")
+                    return
+                # O \r\n que encerra a linha do delimitador vem antes dos cabeçalhos
+                self._start_part(bytes(self._buffer[:index]).lstrip(b' \t').lstrip(b'\r\n'))
+                del self._buffer[:index + 4]
+                self._state = 'body'
+            else:
+                return
+
+
+async def _receive_upload(scope, receive, params, target):
+    """Recebe o corpo em streaming, gravando o workbook em target; retorna (nome do arquivo, especificação)"""
+    headers = _headers(scope)
+    declared = headers.get('content-length')
+    if declared and declared.isdigit() and int(declared) > API_MAX_UPLOAD_BYTES:
+        raise ApiError(413, f"Arquivo maior que {API_MAX_UPLOAD_BYTES // 1024 ** 2} MB")
+    content_type = headers.get('content-type', '')
+    multipart = None
+    if content_type.lower().startswith('multipart/form-data'):
+        boundary = re.search(r'boundary="?([^";]+)"?', content_type)
+        if boundary is None:
+            raise ApiError(400, "multipart/form-data sem boundary")
+        multipart = MultipartReader(boundary.group(1).encode('latin-1'), target)
+
+    received = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise JobCancelled()
+        chunk = message.get('body', b'')
+        received += len(chunk)
+        if received > API_MAX_UPLOAD_BYTES:
+            raise ApiError(413, f"Arquivo maior que {API_MAX_UPLOAD_BYTES // 1024 ** 2} MB")
+        # Gravação local em pedaços pequenos: não bloqueia o loop de forma perceptível
+        if multipart is not None:
+            multipart.feed(chunk)
+        else:
+            target.write(chunk)
+        if not message.get('more_body', False):
+            break
+
+    if multipart is not None:
+        if not multipart.complete:
+            raise ApiError(400, "Corpo multipart incompleto")
+        if multipart.filename is None:
+            raise ApiError(400, "Envie o workbook no campo 'file' do multipart")
+        filename = params.get('filename') or multipart.filename
+        spec_text = multipart.fields.get('spec') or params.get('spec') or headers.get('x-conversor-spec')
+    else:
+        filename = params.get('filename') or 'upload.xlsx'
+        spec_text = params.get('spec') or headers.get('x-conversor-spec')
+    if received == 0:
+        raise ApiError(400, "Corpo da requisição vazio: envie o workbook")
+    if not filename.lower().endswith(EXCEL_EXTENSIONS):
+        raise ApiError(400, f"Extensão não suportada: {filename} (aceitas: {', '.join(EXCEL_EXTENSIONS)})")
+    return filename, _parse_spec(spec_text)
+
+
+class _StreamWriter:
+    """Arquivo de saída da conversão, usado na thread do executor: entrega os bytes ao loop asyncio por uma fila
+    limitada, então a conversão espera quando o cliente lê mais devagar do que ela produz"""
+
+    def __init__(self, loop, queue, progress):
+        self.loop = loop
+        self.queue = queue
+        self.progress = progress
+        self.position = 0
+        self.closed = False
+        self._pending = bytearray()
+
+    def _put(self, item):
+        asyncio.run_coroutine_threadsafe(self.queue.put(item), self.loop).result()
+
+    def write(self, data):
+        if self.progress.cancelled:
+            raise JobCancelled()
+        self._pending += data
+        self.position += len(data)
+        if len(self._pending) >= API_SEND_BYTES:
+            self._put(bytes(self._pending))
+            self._pending.clear()
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def seek(self, *args):
+        raise io.UnsupportedOperation('seek')
+
+    def seekable(self):
+        return False
+
+    def writable(self):
+        return True
+
+    def flush(self):
+        pass
+
+    def finish(self, failed=False):
+        """Envia o que restou e marca o fim (None) da saída
+
+        Com failed, descarta o que ainda não foi enviado: se a conversão falhou antes do primeiro
+        envio, a resposta ainda não começou e o erro pode ser devolvido em JSON.
+        """
+        if self._pending and not failed:
+            self._put(bytes(self._pending))
+        self._pending.clear()
+        self._put(None)
+
+
+class ConversionAPI:
+    """Aplicação ASGI: recebe o workbook em streaming e devolve o arquivo convertido enquanto é gerado"""
+
+    def __init__(self, max_concurrent=API_MAX_CONCURRENT, max_waiting=API_MAX_WAITING):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.running = 0
+        self.waiting = 0
+        self.served = 0
+        self._semaphore = None
+        self._executor = None
+
+    def _resources(self):
+        # Criados já dentro do loop do servidor (o Semaphore se prende ao loop em versões antigas do Python)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix='conversor-api')
+        return self._semaphore, self._executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        path, method = scope['path'].rstrip('/') or '/', scope['method']
+        try:
+            if path == '/health':
+                if method != 'GET':
+                    raise ApiError(405, "Use GET", [(b'allow', b'GET')])
+                await _send_json(send, 200, self.health())
+            elif path == '/convert':
+                if method != 'POST':
+                    raise ApiError(405, "Use POST", [(b'allow', b'POST')])
+                await self.convert(scope, receive, send)
+            else:
+                raise ApiError(404, f"Rota desconhecida: {path}")
+        except ApiError as e:
+            await _send_json(send, e.status, {'error': e.message}, e.headers)
+        except JobCancelled:
+            logger.info("Requisição cancelada pelo cliente: %s", path)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'running': self.running,
+            'waiting': self.waiting,
+            'max_concurrent': self.max_concurrent,
+            'served': self.served,
+        }
+
+    async def convert(self, scope, receive, send):
+        params = _query(scope)
+        options = _convert_options(params)
+        semaphore, executor = self._resources()
+        # Recusar antes de ler o corpo: um servidor sobrecarregado não recebe (nem grava) o upload.
+        # Requisições ainda enviando o arquivo já contam como à espera
+        if self.running + self.waiting >= self.max_concurrent + self.max_waiting:
+            raise ApiError(503, "Servidor ocupado: tente novamente em instantes", [(b'retry-after', b'5')])
+        self.waiting += 1
+        acquired = False
+        try:
+            with tempfile.TemporaryDirectory(prefix='conversor_api_') as directory:
+                upload_path = os.path.join(directory, 'upload')
+                with open(upload_path, 'wb') as target:
+                    filename, spec = await _receive_upload(scope, receive, params, target)
+                await semaphore.acquire()
+                acquired = True
+                self.waiting -= 1
+                self.running += 1
+                try:
+                    await self._stream(receive, send, executor, upload_path, filename, spec, options)
+                finally:
+                    self.running -= 1
+                    semaphore.release()
+        finally:
+            if not acquired:
+                self.waiting -= 1
+
+    async def _stream(self, receive, send, executor, source, filename, spec, options):
+        """Roda a conversão no executor e envia cada pedaço da saída assim que é produzido"""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=API_QUEUE_CHUNKS)
+        progress = JobProgress()
+        writer = _StreamWriter(loop, queue, progress)
+        export_format, compression = options['export_format'], options['compression']
+        base_name = f"{os.path.splitext(filename)[0]}_convertido"
+        started = time.perf_counter()
+
+        def run():
+            try:
+                result = convert_with_spec(source, filename, spec, writer, progress=progress, base_name=base_name, **options)
+            except BaseException:
+                writer.finish(failed=True)
+                raise
+            writer.finish()
+            return result
+
+        async def watch_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            progress.cancel()
+
+        conversion = loop.run_in_executor(executor, run)
+        watcher = asyncio.ensure_future(watch_disconnect())
+        response_started = False
+        try:
+            while True:
+                data = await queue.get()
+                if data is None:
+                    break
+                if progress.cancelled:
+                    # Cliente desconectado: só esvazia a fila até a conversão parar
+                    continue
+                if not response_started:
+                    disposition = f'attachment; filename="{export_file_name(base_name, compression, export_format=export_format)}"'
+                    await send({
+                        'type': 'http.response.start',
+                        'status': 200,
+                        'headers': [(b'content-type', export_mime(compression, export_format=export_format).encode()),
+                                    (b'content-disposition', disposition.encode('utf-8'))],
+                    })
+                    response_started = True
+                await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+            try:
+                result = await conversion
+            except JobCancelled:
+                logger.info("Conversão de %s cancelada: o cliente desconectou", filename)
+                return
+            except Exception as e:
+                if response_started:
+                    # O status já foi enviado: interromper a resposta avisa o cliente de que o arquivo está incompleto
+                    logger.exception("Falha na conversão de %s depois do início da resposta", filename)
+                    raise
+                status = 422 if isinstance(e, (ValueError, KeyError)) else 500
+                raise ApiError(status, f"{type(e).__name__}: {e}")
+            if not response_started:
+                await send({
+                    'type': 'http.response.start',
+                    'status': 200,
+                    'headers': [(b'content-type', export_mime(compression, export_format=export_format).encode())],
+                })
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            self.served += 1
+            logger.info(json.dumps({
+                'file': filename,
+                'format': export_format,
+                'rows': result.result.rows,
+                'seconds': round(time.perf_counter() - started, 4),
+                'engine': result.engine,
+                'warnings': warning_records(result.result.profiles, result.column_types, result.column_lengths),
+            }, ensure_ascii=False, default=str))
+        finally:
+            watcher.cancel()
+            if not conversion.done():
+                # Erro no envio: a conversão para no próximo bloco, e a fila continua sendo esvaziada até lá
+                progress.cancel()
+                while not conversion.done():
+                    try:
+                        await asyncio.wait_for(queue.get(), timeout=0.1)
+                    except asyncio.TimeoutError:
+                        pass
+
+
+app = ConversionAPI()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="API HTTP de conversão de planilhas (ASGI).")
+    parser.add_argument('--host', default='127.0.0.1', help="Endereço (padrão: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8000, help="Porta (padrão: 8000)")
+    parser.add_argument('--max-concurrent', type=int, default=API_MAX_CONCURRENT,
+                        help=f"Conversões simultâneas (padrão: {API_MAX_CONCURRENT})")
+    parser.add_argument('--log-level', default='info', help="Nível de log do servidor (padrão: info)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        raise RuntimeError("uvicorn não está instalado: execute 'pip install uvicorn' ou use outro servidor ASGI com api:app")
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s %(name)s %(levelname)s %(message)s')
+    uvicorn.run(
+        ConversionAPI(max_concurrent=args.max_concurrent, max_waiting=4 * args.max_concurrent),
+        host=args.host, port=args.port, log_level=args.log_level,
+    )
+
+
+if __name__ == '__main__':
+    main()
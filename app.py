@@ -1,7 +1,62 @@
 import streamlit as st
 import pandas as pd
-import io
-from typing import Dict, List
+import copy
+import hashlib
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from conversor import (
+    ARROW_CODECS,
+    AUTO_ENGINE,
+    CALAMINE_MIN_BYTES,
+    COLUMNAR_FORMATS,
+    DATE_CACHE,
+    DOWNLOADED_TTL_SECONDS,
+    ENGINE_TIMINGS,
+    ENGINES,
+    EXPORT_FORMATS,
+    PARQUET_CODECS,
+    PREVIEW_PAGE_SIZES,
+    PREVIEW_SAMPLE_ROWS,
+    ROW_FILTER_MODES,
+    STREAM_CHUNK_ROWS,
+    TYPE_OPTIONS,
+    ColumnCache,
+    JobManager,
+    Tracer,
+    WorkbookCache,
+    assemble_output,
+    column_samples,
+    convert_sheets_to_zip,
+    copy_statement,
+    create_table_ddl,
+    export_file_name,
+    export_frame,
+    export_mime,
+    filter_rows,
+    frame_memory,
+    infer_file,
+    count_sheet_rows,
+    default_sheet_config,
+    default_table_name,
+    engine_available,
+    list_sheets,
+    page_count,
+    peek_sheet_rows,
+    page_rows,
+    profile_columns,
+    read_all_sheets,
+    read_sheet_rows,
+    row_limit_for,
+    set_tracer,
+    stream_convert_to_csv,
+    trace_span,
+)
+
+# Diretório opcional para despejar (spill) em disco os workbooks removidos do cache
+WORKBOOK_CACHE_SPILL_DIR = os.environ.get('CONVERSOR_CACHE_DIR')
 
 # Configuração da página
 st.set_page_config(
@@ -55,10 +110,36 @@ with st.sidebar:
       - Caracteres inválidos UTF-8
       - **Textos maiores que o limite (truncando)**
     """)
+    
+    st.divider()
+    reader_engine = st.selectbox(
+        "⚙️ Motor de leitura",
+        options=[AUTO_ENGINE] + [engine for engine in ENGINES if engine_available(engine)],
+        format_func=lambda engine: "Automático" if engine == AUTO_ENGINE else engine,
+        help=f"No automático, arquivos a partir de {CALAMINE_MIN_BYTES // 1024} KB são lidos com o calamine "
+             "(se instalado: pip install python-calamine), os menores com openpyxl (.xlsx) ou xlrd (.xls). "
+             "Se o motor escolhido falhar, os demais são tentados."
+    )
+    compact_storage = st.checkbox(
+        "🗜️ Armazenamento compacto",
+        value=True,
+        help="Guarda as planilhas lidas com textos repetidos como categorias, os demais textos em Arrow e os "
+             "inteiros no menor tipo possível: os valores são os mesmos, com bem menos memória por sessão."
+    )
+    tracing_enabled = st.checkbox(
+        "📈 Instrumentação de desempenho",
+        value=False,
+        help="Mede cada etapa (leitura, inferência, conversão por coluna, validação e exportação) e mostra os "
+             "tempos no painel Performance, no fim da página. Os spans também vão para o log 'conversor.trace'."
+    )
+    tracing_memory = st.checkbox(
+        "Medir memória (tracemalloc)",
+        value=False,
+        disabled=not tracing_enabled,
+        help="Registra o pico de memória de cada etapa; deixa a conversão bem mais lenta enquanto ligado."
+    )
 
 # Inicializar estado da sessão
-if 'df' not in st.session_state:
-    st.session_state.df = None
 if 'column_types' not in st.session_state:
     st.session_state.column_types = {}
 if 'column_lengths' not in st.session_state:
@@ -71,92 +152,253 @@ if 'row_filter_mode' not in st.session_state:
 if 'row_filter_n' not in st.session_state:
     st.session_state.row_filter_n = 100
 
+# Instrumentação: um Tracer por sessão, ativo nesta execução e herdado pelos jobs em segundo plano
+tracer = st.session_state.get('tracer')
+if tracing_enabled and (tracer is None or tracer.memory != tracing_memory):
+    if tracer is not None:
+        tracer.close()
+    tracer = st.session_state.tracer = Tracer(memory=tracing_memory)
+elif not tracing_enabled and tracer is not None:
+    tracer.close()
+    tracer = st.session_state.tracer = None
+set_tracer(tracer)
+
+
+@st.cache_resource
+def get_workbook_cache():
+    """Instância única do cache de workbooks, compartilhada entre reruns e sessões"""
+    return WorkbookCache(spill_dir=WORKBOOK_CACHE_SPILL_DIR)
+
+
+@st.cache_resource
+def get_column_cache():
+    """Instância única do cache de colunas convertidas, compartilhada entre reruns e sessões"""
+    return ColumnCache()
 
-# Função para inferir tipo de dado
-def infer_dtype(series):
-    """Infere o tipo de dado de uma série pandas"""
-    dtype = str(series.dtype)
-    if 'int' in dtype:
-        return 'int'
-    elif 'float' in dtype:
-        return 'float'
-    elif 'bool' in dtype:
-        return 'bool'
-    elif 'datetime' in dtype:
-        return 'datetime'
-    else:
-        return 'varchar'
 
-# Função para validar e limitar valores inteiros
-def validate_int_range(value, use_bigint=False):
-    """Valida se o valor está dentro do intervalo de INTEGER ou BIGINT do PostgreSQL"""
+@st.cache_resource
+def get_sheet_executor():
+    """Pool de processos compartilhado para converter várias planilhas em paralelo"""
+    return ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=multiprocessing.get_context('spawn'))
+
+
+@st.cache_resource
+def get_job_manager():
+    """Pool limitado de conversões em segundo plano e arquivos gerados, compartilhados entre sessões"""
+    return JobManager()
+
+
+# Nomes das etapas reportadas pelos jobs de conversão
+JOB_STAGE_LABELS = {'read': 'Lendo', 'convert': 'Convertendo', 'validate': 'Validando', 'write': 'Gravando'}
+
+
+def write_artifact(store, suffix, write, progress):
+    """Tarefa dos jobs de exportação: grava o arquivo no store; em caso de erro ou cancelamento, apaga-o"""
+    path = store.create(suffix)
     try:
-        val = float(value)
-        if pd.isna(val):
-            return 0
-        
-        if use_bigint:
-            # Limite do BIGINT no PostgreSQL: -9223372036854775808 a 9223372036854775807
-            if val > 9223372036854775807:
-                return 9223372036854775807
-            elif val < -9223372036854775808:
-                return -9223372036854775808
+        with open(path, 'wb') as out:
+            payload = write(out, progress=progress)
+    except BaseException:
+        store.discard(path)
+        raise
+    return path, payload
+
+
+def current_export_job(kind, signature):
+    """Job de exportação da sessão para a configuração atual (None se a configuração mudou)"""
+    entry = st.session_state.setdefault('export_jobs', {}).get(kind)
+    if entry is None or entry[0] != signature:
+        return None
+    return get_job_manager().get(entry[1])
+
+
+def submit_export_job(kind, signature, suffix, write, label, total=None):
+    """Cancela o job anterior da sessão (e apaga o arquivo dele) e enfileira a nova exportação"""
+    manager = get_job_manager()
+    export_jobs = st.session_state.setdefault('export_jobs', {})
+    previous = manager.get(export_jobs[kind][1]) if kind in export_jobs else None
+    if previous is not None:
+        previous.cancel()
+        if previous.status == 'done':
+            manager.store.discard(previous.result[0])
+    job = manager.submit(write_artifact, manager.store, suffix, write, label=label, total=total)
+    export_jobs[kind] = (signature, job.id)
+    return job
+
+
+def sheet_rows_in_background(workbook_cache, digest, file_data, filename, nrows, sheet_name, engine, compact,
+                             usecols=None):
+    """Linhas da planilha já em cache, ou (None, job) com a leitura rodando em segundo plano
+
+    A leitura completa de uma planilha grande levaria segundos; feita no job, a página continua respondendo
+    e o resultado fica no cache de workbooks para o próximo rerun.
+    """
+    frame = peek_sheet_rows(workbook_cache, digest, nrows=nrows, sheet_name=sheet_name, engine=engine, usecols=usecols)
+    if frame is not None:
+        return frame, None
+    manager = get_job_manager()
+    read_jobs = st.session_state.setdefault('read_jobs', {})
+    signature = (digest, sheet_name, nrows, engine, compact, None if usecols is None else tuple(usecols))
+    job = manager.get(read_jobs[signature]) if signature in read_jobs else None
+    # Job terminado sem a entrada em cache (já removida): ler de novo
+    if job is None or job.status == 'done':
+        def read(progress):
+            progress('read')
+            read_sheet_rows(
+                workbook_cache, digest, file_data, filename,
+                nrows=nrows, sheet_name=sheet_name, engine=engine, compact=compact, usecols=usecols
+            )
+
+        job = manager.submit(read, label=f"{filename} ({sheet_name})")
+        read_jobs[signature] = job.id
+    return None, job
+
+
+@st.fragment(run_every=0.5)
+def show_job_progress(job_id):
+    """Barra de progresso (atualizada sozinha) de um job em andamento, com botão de cancelar"""
+    job = get_job_manager().get(job_id)
+    if job is None or job.status not in ('queued', 'running'):
+        st.rerun()
+    progress = job.progress
+    if job.status == 'queued':
+        text = "⏳ Na fila: aguardando uma vaga no pool de conversões..."
+    else:
+        total = f"{progress.total:,}" if progress.total else '?'
+        text = f"{JOB_STAGE_LABELS.get(progress.stage, 'Iniciando')}... {progress.done:,} de {total} · {job.elapsed:.1f}s"
+    st.progress(progress.fraction or 0.0, text=text)
+    if st.button("✖️ Cancelar", key=f"cancel_job_{job_id}"):
+        job.cancel()
+        st.rerun()
+
+
+def show_job_outcome(job):
+    """Erro ou cancelamento de um job terminado; retorna (caminho do arquivo, dados) quando concluído"""
+    if job.status == 'cancelled':
+        st.info("✖️ Conversão cancelada.")
+    elif job.status == 'error':
+        error = job.error
+        if isinstance(error, UnicodeEncodeError):
+            st.error(f"❌ O encoding {error.encoding} não representa alguns caracteres dos dados ({error.object[error.start:error.end]!r}).")
         else:
-            # Limite do INTEGER no PostgreSQL: -2147483648 a 2147483647
-            if val > 2147483647:
-                return 2147483647
-            elif val < -2147483648:
-                return -2147483648
-        
-        return int(val)
-    except:
-        return 0
+            st.error(f"❌ Erro na conversão: {error}")
+    elif job.status == 'done':
+        path, payload = job.result
+        if get_job_manager().store.exists(path):
+            return path, payload
+        st.info("⌛ O arquivo gerado expirou: gere-o novamente.")
+    return None, None
 
-# Função para limpar strings com problemas de encoding
-def clean_string(value):
-    """Remove caracteres inválidos e garante encoding UTF-8 correto"""
-    try:
-        if pd.isna(value):
-            return ''
-        # Converter para string
-        text = str(value)
-        # Remover caracteres de controle e não-UTF-8
-        text = text.encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
-        # Remover caracteres de controle exceto quebras de linha e tabs
-        text = ''.join(char for char in text if char.isprintable() or char in '\n\r\t')
-        return text.strip()
-    except:
+
+def paged_rows(frame, key, source_key):
+    """Filtro por valor de coluna e paginação feitos no servidor: retorna (linhas da página, identificação da página)
+
+    Só a página visível vai para o navegador. As posições filtradas são memorizadas por widget
+    (source_key identifica as linhas de origem), então trocar de página não refaz o filtro.
+    """
+    col_column, col_value, col_size, col_page = st.columns([2, 2, 1, 1])
+    with col_column:
+        filter_column = st.selectbox(
+            "Filtrar pela coluna",
+            options=[None] + list(frame.columns),
+            format_func=lambda col: '(sem filtro)' if col is None else str(col),
+            key=f"{key}_filter_column"
+        )
+    with col_value:
+        filter_value = st.text_input(
+            "Valor contido",
+            key=f"{key}_filter_value",
+            disabled=filter_column is None,
+            help="Mostra as linhas cujo valor contém este texto (sem diferenciar maiúsculas). Vale só para a visualização: a exportação não é filtrada."
+        )
+    if filter_column is None:
+        filter_value = ''
+    
+    page_filters = st.session_state.setdefault('page_filters', {})
+    filter_signature = (source_key, filter_column, filter_value)
+    if page_filters.get(key, (None,))[0] != filter_signature:
+        page_filters[key] = (filter_signature, filter_rows(frame, filter_column, filter_value))
+    positions = page_filters[key][1]
+    rows = len(frame) if positions is None else len(positions)
+    
+    with col_size:
+        page_size = st.selectbox("Linhas por página", options=PREVIEW_PAGE_SIZES, index=1, key=f"{key}_page_size")
+    pages = page_count(rows, page_size)
+    with col_page:
+        # Mudar o filtro ou o tamanho da página volta para a primeira página
+        page = int(st.number_input(
+            f"Página (de {pages})", min_value=1, max_value=pages, value=1,
+            key=f"{key}_page_{hash((filter_column, filter_value, page_size))}"
+        ))
+    page_frame, _ = page_rows(frame, page, page_size, positions)
+    
+    first = (page - 1) * page_size
+    filtered = f" (filtradas de {len(frame)})" if positions is not None else ""
+    if rows:
+        st.caption(f"Linhas {first + 1}–{first + len(page_frame)} de {rows}{filtered} · página {page} de {pages}")
+    else:
+        st.caption(f"Nenhuma linha{filtered}.")
+    return page_frame, (filter_column, filter_value, page_size, page)
+
+
+def uploaded_file_digest(uploaded_file):
+    """Calcula (uma vez por upload) o hash SHA-256 do conteúdo do arquivo"""
+    file_id = getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)
+    cached = st.session_state.get('file_digest')
+    if cached is not None and cached[0] == file_id:
+        return cached[1]
+    digest = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    st.session_state.file_digest = (file_id, digest)
+    return digest
+
+
+def describe_proposal(proposal):
+    """Texto curto com o tipo proposto pela inferência e a confiança"""
+    if proposal is None:
         return ''
+    detail = proposal.type
+    if proposal.type == 'varchar':
+        detail += f"({proposal.max_len})"
+    if proposal.datetime_format:
+        detail += f" {proposal.datetime_format}"
+    return f"{detail} · {proposal.confidence:.0%}{' ✓' if proposal.exact else ''}"
+
+
+def build_warnings(profiles, column_types, column_lengths):
+    """Monta as mensagens de validação a partir dos perfis das colunas"""
+    warnings = []
+    
+    # Verificar inteiros fora do intervalo
+    with trace_span('validate', check='clamped'):
+        for col, profile in profiles.items():
+            col_type = column_types[col]
+            if profile.clamped > 0:
+                if col_type == 'int':
+                    warnings.append(f"🔴 **{col}**: {profile.clamped} valor(es) fora do intervalo INTEGER foram ajustados para o limite (-2147483648 a 2147483647). Considere usar BIGINT.")
+                elif col_type == 'bigint':
+                    warnings.append(f"🔴 **{col}**: {profile.clamped} valor(es) fora do intervalo BIGINT foram ajustados para o limite (-9223372036854775808 a 9223372036854775807)")
+    
+    # Verificar truncamento de strings
+    with trace_span('validate', check='truncated'):
+        for col, profile in profiles.items():
+            if profile.truncated > 0:
+                max_len = column_lengths.get(col, 255)
+                warnings.append(f"🟠 **{col}**: {profile.truncated} valor(es) excederam o limite de {max_len} caracteres e foram **truncados**.")
+    
+    # Verificar problemas de encoding
+    with trace_span('validate', check='cleaned'):
+        for col, profile in profiles.items():
+            if profile.cleaned > 0:
+                warnings.append(f"🟡 **{col}**: {profile.cleaned} valor(es) com caracteres inválidos foram limpos para garantir UTF-8 válido")
+    
+    # Verificar datas não reconhecidas
+    with trace_span('validate', check='date_failed'):
+        for col, profile in profiles.items():
+            if profile.date_failed > 0:
+                warnings.append(f"🔴 **{col}**: {profile.date_failed} valor(es) não reconhecidos como data ficaram **vazios**.")
+    
+    return warnings
 
-# Função para converter tipo de dado
-def convert_dtype(series, target_type, max_len=None):
-    """Converte uma série para o tipo de dado especificado com tratamento robusto de erros"""
-    try:
-        if target_type == 'int':
-            # Aplicar validação de intervalo para cada valor (INTEGER)
-            return series.apply(lambda x: validate_int_range(x, use_bigint=False))
-        elif target_type == 'bigint':
-            # Aplicar validação de intervalo para cada valor (BIGINT)
-            return series.apply(lambda x: validate_int_range(x, use_bigint=True))
-        elif target_type == 'float':
-            return pd.to_numeric(series, errors='coerce')
-        elif target_type == 'bool':
-            return series.astype(bool)
-        elif target_type == 'datetime':
-            return pd.to_datetime(series, errors='coerce')
-        else:  # varchar
-            # Limpar strings para garantir UTF-8 válido
-            cleaned_series = series.apply(clean_string)
-            
-            # Truncar a string se max_len for fornecido
-            if max_len is not None and max_len > 0:
-                return cleaned_series.str[:max_len]
-            else:
-                return cleaned_series
-                
-    except Exception as e:
-        st.warning(f"Aviso ao converter coluna: {str(e)}")
-        return series
 
 # Upload do arquivo
 st.header("1️⃣ Upload do Arquivo")
@@ -165,133 +407,301 @@ uploaded_file = st.file_uploader(
     type=['xls', 'xlsx'],
     help="Selecione o arquivo Excel que deseja converter para CSV"
 )
+streaming_mode = st.checkbox(
+    "⚡ Modo streaming (arquivos grandes)",
+    value=False,
+    help=f"Lê o arquivo em blocos de {STREAM_CHUNK_ROWS} linhas e grava o CSV incrementalmente. "
+         f"Preview e validação usam uma amostra das primeiras {PREVIEW_SAMPLE_ROWS} linhas. "
+         "As células são lidas como estão: textos numéricos ('001') e booleanos no meio de números não são "
+         "convertidos como na leitura completa."
+)
 
 if uploaded_file is not None:
     try:
-        # Ler o arquivo Excel
-        df = pd.read_excel(uploaded_file)
-        st.session_state.df = df
+        # Ler o arquivo Excel (apenas uma vez por conteúdo; reruns reutilizam o cache).
+        # Visualização e metadados usam só as primeiras linhas; as linhas exportadas são lidas
+        # depois, já limitadas pelo filtro de linhas.
+        workbook_cache = get_workbook_cache()
+        digest = uploaded_file_digest(uploaded_file)
+        file_data = uploaded_file.getvalue()
         
-        # Inicializar tipos de colunas se necessário
-        if not st.session_state.column_types:
-            st.session_state.column_types = {col: infer_dtype(df[col]) for col in df.columns}
+        # Planilhas do workbook (lidas uma vez por arquivo)
+        if st.session_state.get('sheet_names', (None,))[0] != digest:
+            st.session_state.sheet_names = (digest, list_sheets(file_data, uploaded_file.name))
+        sheet_names = st.session_state.sheet_names[1]
+        if len(sheet_names) > 1:
+            selected_sheet = st.selectbox(
+                f"Planilha ({len(sheet_names)} no arquivo)",
+                options=sheet_names,
+                key=f"sheet_{digest}",
+                help="Cada planilha tem seus próprios metadados; todas podem ser exportadas juntas em um ZIP."
+            )
+        else:
+            selected_sheet = sheet_names[0]
         
-        # Inicializar tamanhos das colunas (default 255)
-        if not st.session_state.column_lengths:
-            st.session_state.column_lengths = {col: 255 for col in df.columns}
-            
-        # Inicializar colunas selecionadas se necessário
-        if not st.session_state.selected_columns:
-            st.session_state.selected_columns = list(df.columns)
+        df = read_sheet_rows(
+            workbook_cache, digest, file_data, uploaded_file.name,
+            nrows=PREVIEW_SAMPLE_ROWS, sheet_name=selected_sheet, engine=reader_engine, compact=compact_storage
+        )
         
-        st.success(f"✅ Arquivo carregado com sucesso! {len(df)} linhas e {len(df.columns)} colunas")
+        # Total de linhas lido das dimensões da planilha (uma vez por planilha)
+        row_counts = st.session_state.setdefault('sheet_rows', {})
+        if (digest, selected_sheet) not in row_counts:
+            if len(df) < PREVIEW_SAMPLE_ROWS:
+                row_counts[(digest, selected_sheet)] = len(df)
+            else:
+                row_counts[(digest, selected_sheet)] = count_sheet_rows(file_data, uploaded_file.name, selected_sheet)
+        total_rows = row_counts[(digest, selected_sheet)]
+
+        with st.sidebar:
+            cache_stats = workbook_cache.stats()
+            st.divider()
+            st.markdown("**🗄️ Cache de Workbooks**")
+            st.caption(
+                f"Hits: {cache_stats['hits']} | Hits em disco: {cache_stats['disk_hits']} | "
+                f"Misses: {cache_stats['misses']} | Evicções: {cache_stats['evictions']} | "
+                f"Entradas: {cache_stats['entries']}/{workbook_cache.max_entries}"
+            )
+            column_cache_stats = get_column_cache().stats()
+            st.markdown("**🧮 Cache de Colunas Convertidas**")
+            st.caption(
+                f"Hits: {column_cache_stats['hits']} | Misses: {column_cache_stats['misses']} | "
+                f"Evicções: {column_cache_stats['evictions']} | Entradas: {column_cache_stats['entries']} | "
+                f"Memória: {column_cache_stats['bytes'] / 1024 ** 2:.1f} MB"
+            )
+            date_cache_stats = DATE_CACHE.stats()
+            st.markdown("**📅 Cache de Datas**")
+            st.caption(
+                f"Hits: {date_cache_stats['hits']} | Misses: {date_cache_stats['misses']} | "
+                f"Entradas: {date_cache_stats['entries']}"
+            )
+            st.markdown("**⏱️ Tempos de Leitura**")
+            st.caption(f"Prévia lida com: {df.attrs.get('engine', '?')}")
+            engine_stats = ENGINE_TIMINGS.stats()
+            if engine_stats:
+                st.dataframe(pd.DataFrame([
+                    {
+                        'Motor': engine,
+                        'Leituras': stats['reads'],
+                        'Falhas': stats['failures'],
+                        'Última (s)': stats['last_seconds'],
+                        'Média (s)': stats['seconds'] / stats['reads'] if stats['reads'] else None,
+                        'MB/s': stats['bytes'] / 1024 ** 2 / stats['seconds'] if stats['seconds'] else None,
+                    }
+                    for engine, stats in engine_stats.items()
+                ]), hide_index=True, use_container_width=True)
+            job_manager = get_job_manager()
+            job_stats = job_manager.stats()
+            artifact_stats = job_manager.store.stats()
+            st.markdown("**🧵 Conversões em Segundo Plano**")
+            st.caption(
+                f"Em execução: {job_stats['running']}/{job_manager.max_workers} | Na fila: {job_stats['queued']} | "
+                f"Arquivos guardados: {artifact_stats['artifacts']} ({artifact_stats['bytes'] / 1024 ** 2:.1f} MB)"
+            )
+        
+        # Metadados próprios de cada planilha: tipos inferidos, tamanho 255 e todas as colunas
+        sheet_configs = st.session_state.setdefault('sheet_configs', {})
+        if (digest, selected_sheet) not in sheet_configs:
+            # Tipos propostos a partir da amostra; exatos quando a amostra já é a planilha inteira
+            sample_is_complete = total_rows is not None and len(df) >= total_rows
+            sheet_configs[(digest, selected_sheet)] = default_sheet_config(df, exact=sample_is_complete)
+        sheet_config = sheet_configs[(digest, selected_sheet)]
+        st.session_state.column_types = sheet_config['column_types']
+        st.session_state.column_lengths = sheet_config['column_lengths']
+        st.session_state.selected_columns = sheet_config['selected_columns']
+        widget_prefix = f"{digest[:12]}_{sheet_names.index(selected_sheet)}"
+        
+        total_label = total_rows if total_rows is not None else f"{len(df)}+"
+        if streaming_mode:
+            st.success(f"✅ Arquivo aberto em modo streaming! {total_label} linhas e {len(df.columns)} colunas")
+        else:
+            st.success(f"✅ Arquivo carregado com sucesso! {total_label} linhas e {len(df.columns)} colunas")
         
         # Visualização dos dados de entrada
         st.header("2️⃣ Visualização dos Dados de Entrada")
-        st.markdown(f"**Total de registros:** {len(df)}")
+        st.markdown(f"**Total de registros:** {total_label}")
+        if total_rows is None or len(df) < total_rows:
+            st.caption(f"Mostrando as primeiras {len(df)} linhas; o restante é lido apenas quando necessário.")
         
         # Mostrar estatísticas básicas
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Linhas", len(df))
+            st.metric("Linhas", total_label)
         with col2:
             st.metric("Colunas", len(df.columns))
         with col3:
-            st.metric("Memória", f"{df.memory_usage(deep=True).sum() / 1024:.2f} KB")
+            # Só as colunas object exigem percorrer os textos: medido uma vez por amostra, não a cada rerun
+            memory_usage = st.session_state.setdefault('memory_usage', {})
+            memory_key = (digest, selected_sheet, len(df))
+            if memory_key not in memory_usage:
+                memory_usage[memory_key] = frame_memory(df)
+            st.metric("Memória", f"{memory_usage[memory_key] / 1024:.2f} KB")
         
-        # Tabela de dados
-        st.dataframe(df, use_container_width=True, height=300)
+        # Tabela de dados: apenas a página visível é enviada ao navegador
+        input_page, _ = paged_rows(df, f"input_{widget_prefix}", (digest, selected_sheet, len(df)))
+        st.dataframe(input_page, use_container_width=True, height=300)
         
         # Edição de metadados
         st.header("3️⃣ Metadados das Colunas")
-        st.markdown("Configure o tipo de dado e o tamanho (para `varchar`) de cada coluna:")
-        
-        # Criar colunas para exibir metadados
-        type_options = ['varchar', 'int', 'bigint', 'float', 'bool', 'datetime']
+        st.markdown("Configure o tipo de dado, o tamanho (para `varchar`) e a exportação de cada coluna na tabela abaixo:")
         
-        # Dividir em 2 colunas para melhor layout
-        cols_per_row = 2
         columns = list(df.columns)
+        grid_key = f"grid_{widget_prefix}"
         
-        for i in range(0, len(columns), cols_per_row):
-            cols = st.columns(cols_per_row)
-            for j, col_name in enumerate(columns[i:i+cols_per_row]):
-                with cols[j]:
-                    st.markdown(f"**{col_name}**")
-                    
-                    # Mostrar exemplo de dados
-                    sample_values = df[col_name].dropna().head(3).tolist()
-                    st.caption(f"Exemplo: {sample_values}")
-                    
-                    # Seletor de tipo
-                    current_type = st.session_state.column_types.get(col_name, 'varchar')
-                    new_type = st.selectbox(
-                        "Tipo de dado",
-                        options=type_options,
-                        index=type_options.index(current_type),
-                        key=f"type_{col_name}"
+        def reset_grid():
+            """Descarta as edições pendentes da tabela após uma ação em lote"""
+            st.session_state.pop(grid_key, None)
+            st.rerun()
+        
+        # Refinar a inferência (feita sobre a amostra) com uma passada completa em segundo plano
+        inference_jobs = st.session_state.setdefault('inference_jobs', {})
+        inference_job = inference_jobs.get((digest, selected_sheet))
+        proposals = sheet_config.get('inference', {})
+        if inference_job is None:
+            if proposals and not all(proposal.exact for proposal in proposals.values()):
+                if st.button("🔍 Refinar tipos lendo a planilha completa (em segundo plano)"):
+                    inference_jobs[(digest, selected_sheet)] = get_sheet_executor().submit(
+                        infer_file, file_data, uploaded_file.name, selected_sheet, engine=reader_engine
                     )
-                    st.session_state.column_types[col_name] = new_type
-                    
-                    # Campo de tamanho para Varchar
-                    if new_type == 'varchar':
-                        default_len = st.session_state.column_lengths.get(col_name, 255)
-                        new_len = st.number_input(
-                            "Tamanho (max)",
-                            min_value=1,
-                            value=default_len,
-                            key=f"len_{col_name}",
-                            help="Define o tamanho máximo para colunas de texto (varchar). Valores maiores serão truncados (cortados)."
-                        )
-                        st.session_state.column_lengths[col_name] = int(new_len)
-                    
-                    st.divider()
+                    st.rerun()
+        elif not inference_job.done():
+            st.info("⏳ Inferência completa em andamento: os tipos atuais continuam editáveis.")
+            if st.button("🔄 Verificar"):
+                st.rerun()
+        elif inference_job.exception() is not None:
+            st.error(f"❌ Erro na inferência completa: {inference_job.exception()}")
+            inference_jobs.pop((digest, selected_sheet))
+        else:
+            refined = inference_job.result()
+            changed = [
+                col_name for col_name, proposal in refined.items()
+                if col_name in st.session_state.column_types and (
+                    proposal.type != st.session_state.column_types[col_name]
+                    or (proposal.type == 'varchar' and proposal.max_len != st.session_state.column_lengths.get(col_name))
+                )
+            ]
+            st.success(f"✅ Inferência completa concluída: {len(changed)} coluna(s) com tipo ou tamanho diferente do atual.")
+            if st.button("📥 Aplicar tipos da inferência completa"):
+                for col_name, proposal in refined.items():
+                    if col_name not in st.session_state.column_types:
+                        continue
+                    st.session_state.column_types[col_name] = proposal.type
+                    st.session_state.column_lengths[col_name] = proposal.max_len or 255
+                    formats = sheet_config.setdefault('column_formats', {})
+                    formats.pop(col_name, None)
+                    if proposal.datetime_format:
+                        formats[col_name] = proposal.datetime_format
+                sheet_config['inference'] = refined
+                inference_jobs.pop((digest, selected_sheet))
+                reset_grid()
+        
+        # Ações em lote sobre os tamanhos
+        col_len_value, col_len_apply = st.columns([3, 1])
+        with col_len_value:
+            bulk_length = st.number_input(
+                "Tamanho para todas as colunas varchar",
+                min_value=1,
+                value=100,
+                key=f"bulk_len_{widget_prefix}"
+            )
+        with col_len_apply:
+            st.write("")
+            if st.button("📏 Aplicar a todas", use_container_width=True):
+                for col_name in columns:
+                    if st.session_state.column_types[col_name] == 'varchar':
+                        st.session_state.column_lengths[col_name] = int(bulk_length)
+                reset_grid()
+        
+        # Uma única tabela com todas as colunas (exemplos calculados numa só passada)
+        samples = st.session_state.setdefault('column_samples', {})
+        if (digest, selected_sheet) not in samples:
+            samples[(digest, selected_sheet)] = column_samples(df)
+        selected_set = set(st.session_state.selected_columns)
+        grid = pd.DataFrame({
+            'Coluna': [str(col_name) for col_name in columns],
+            'Exemplo': samples[(digest, selected_sheet)],
+            'Inferência': [describe_proposal(proposals.get(col_name)) for col_name in columns],
+            'Tipo': [st.session_state.column_types[col_name] for col_name in columns],
+            'Tamanho': [st.session_state.column_lengths.get(col_name, 255) for col_name in columns],
+            'Exportar': [col_name in selected_set for col_name in columns],
+        })
+        edited_grid = st.data_editor(
+            grid,
+            key=grid_key,
+            hide_index=True,
+            use_container_width=True,
+            disabled=['Coluna', 'Exemplo', 'Inferência'],
+            column_config={
+                'Exemplo': st.column_config.TextColumn("Exemplo", help="Primeiros valores não vazios da amostra"),
+                'Inferência': st.column_config.TextColumn(
+                    "Inferência",
+                    help="Tipo proposto e confiança (fração dos valores compatíveis, menor em amostras pequenas). "
+                         "✓ indica que a planilha inteira foi lida."
+                ),
+                'Tipo': st.column_config.SelectboxColumn("Tipo", options=TYPE_OPTIONS, required=True),
+                'Tamanho': st.column_config.NumberColumn(
+                    "Tamanho (max)", min_value=1, step=1, required=True,
+                    help="Tamanho máximo das colunas varchar. Valores maiores serão truncados (cortados)."
+                ),
+                'Exportar': st.column_config.CheckboxColumn("Exportar", help="Incluir a coluna no arquivo final"),
+            },
+        )
+        st.session_state.column_types.update(zip(columns, edited_grid['Tipo']))
+        st.session_state.column_lengths.update(zip(columns, (int(length) for length in edited_grid['Tamanho'])))
+        selected_columns = [col_name for col_name, keep in zip(columns, edited_grid['Exportar']) if keep]
         
         # Seleção de colunas
         st.header("4️⃣ Seleção de Colunas para Exportação")
-        st.markdown("Escolha quais colunas deseja incluir no arquivo CSV final:")
+        st.markdown(
+            f"**{len(selected_columns)}** de {len(columns)} colunas marcadas para exportação. "
+            "Marque-as na coluna **Exportar** da tabela acima ou use as ações abaixo:"
+        )
         
         # Opção de selecionar/desselecionar todas
         col_select_all, col_deselect_all = st.columns(2)
         with col_select_all:
             if st.button("✅ Selecionar Todas", use_container_width=True):
-                st.session_state.selected_columns = list(df.columns)
-                st.rerun()
+                sheet_config['selected_columns'] = list(columns)
+                reset_grid()
         with col_deselect_all:
             if st.button("❌ Desselecionar Todas", use_container_width=True):
-                st.session_state.selected_columns = []
-                st.rerun()
+                sheet_config['selected_columns'] = []
+                reset_grid()
         
-        # Checkboxes para cada coluna
-        selected_columns = []
-        cols_per_row = 3
-        for i in range(0, len(columns), cols_per_row):
-            cols = st.columns(cols_per_row)
-            for j, col_name in enumerate(columns[i:i+cols_per_row]):
-                with cols[j]:
-                    # Mostra o tamanho do varchar no label
-                    col_type = st.session_state.column_types[col_name]
-                    if col_type == 'varchar':
-                        col_len = st.session_state.column_lengths.get(col_name, 255)
-                        label = f"{col_name} ({col_type}[{col_len}])"
-                    else:
-                        label = f"{col_name} ({col_type})"
-                        
-                    is_selected = st.checkbox(
-                        label,
-                        value=col_name in st.session_state.selected_columns,
-                        key=f"select_{col_name}"
-                    )
-                    if is_selected:
-                        selected_columns.append(col_name)
+        # Seleção pelo nome da coluna
+        col_pattern, col_select_regex, col_deselect_regex = st.columns([2, 1, 1])
+        with col_pattern:
+            pattern = st.text_input(
+                "Expressão regular (nome da coluna)",
+                key=f"regex_{widget_prefix}",
+                help="Ex: `^id_` ou `data|valor` (sem diferenciar maiúsculas de minúsculas)"
+            )
+        try:
+            matched = [col_name for col_name in columns if re.search(pattern, str(col_name), re.IGNORECASE)] if pattern else []
+        except re.error as e:
+            st.error(f"❌ Expressão regular inválida: {e}")
+            matched = []
+        with col_select_regex:
+            st.write("")
+            if st.button(f"➕ Marcar ({len(matched)})", use_container_width=True, disabled=not matched):
+                marked = set(selected_columns) | set(matched)
+                sheet_config['selected_columns'] = [col_name for col_name in columns if col_name in marked]
+                reset_grid()
+        with col_deselect_regex:
+            st.write("")
+            if st.button(f"➖ Desmarcar ({len(matched)})", use_container_width=True, disabled=not matched):
+                unmarked = set(matched)
+                sheet_config['selected_columns'] = [col_name for col_name in selected_columns if col_name not in unmarked]
+                reset_grid()
         
         st.session_state.selected_columns = selected_columns
+        sheet_config['selected_columns'] = selected_columns
         
         # NOVO: Filtro de Linhas
         st.header("5️⃣ Filtragem de Linhas")
         st.markdown("Escolha quantas linhas deseja manter no arquivo final (o cabeçalho é sempre mantido).")
         
-        filter_options = ['Manter todas', 'Manter as N primeiras', 'Remover todas']
+        filter_options = ROW_FILTER_MODES
         st.session_state.row_filter_mode = st.radio(
             "Modo de filtragem de linhas:",
             options=filter_options,
@@ -302,9 +712,10 @@ if uploaded_file is not None:
 
         if st.session_state.row_filter_mode == 'Manter as N primeiras':
             st.session_state.row_filter_n = st.number_input(
-                f"Número de linhas (N) para manter (de {len(df)} totais):",
+                "Número de linhas (N) para manter:" if total_rows is None
+                else f"Número de linhas (N) para manter (de {total_rows} totais):",
                 min_value=0,
-                max_value=len(df), # O DataFrame original (df)
+                max_value=total_rows, # Total lido das dimensões da planilha
                 value=st.session_state.row_filter_n,
                 key='filter_n_input'
             )
@@ -313,32 +724,64 @@ if uploaded_file is not None:
         if st.session_state.selected_columns:
             st.header("6️⃣ Preview dos Dados de Saída") # Reenumerado
             
-            # Criar DataFrame de saída com colunas selecionadas
-            temp_df = df[st.session_state.selected_columns].copy()
+            # Ler apenas as linhas que serão exportadas: o filtro é aplicado na leitura
+            row_limit = row_limit_for(st.session_state.row_filter_mode, st.session_state.row_filter_n)
+            read_job = None
+            if row_limit == 0 or streaming_mode:
+                # Sem linhas (apenas o cabeçalho) ou modo streaming (preview sobre a amostra)
+                source_df = df.head(row_limit) if row_limit is not None else df
+            else:
+                # Só as colunas selecionadas, na ordem da planilha: reordenar ou remover colunas
+                # reaproveita a leitura em cache
+                source_df, read_job = sheet_rows_in_background(
+                    workbook_cache, digest, file_data, uploaded_file.name,
+                    row_limit, selected_sheet, reader_engine, compact_storage,
+                    usecols=[col for col in df.columns if col in st.session_state.selected_columns]
+                )
+            if read_job is not None:
+                # Até a leitura terminar, a prévia usa a amostra já lida
+                source_df = df.head(row_limit) if row_limit is not None else df
+                if read_job.status in ('queued', 'running'):
+                    st.caption(f"⏳ Lendo as linhas selecionadas em segundo plano; até terminar, a prévia mostra as primeiras {len(source_df)}.")
+                    show_job_progress(read_job.id)
+                else:
+                    show_job_outcome(read_job)
+                    st.caption(f"A prévia mostra as primeiras {len(source_df)} linhas.")
+            temp_df = source_df[st.session_state.selected_columns]
             
-            # NOVO: Aplicar filtro de linhas
             if st.session_state.row_filter_mode == 'Manter as N primeiras':
-                output_df = temp_df.head(st.session_state.row_filter_n).copy()
-                st.markdown(f"**Filtro aplicado:** Mostrando as primeiras **{len(output_df)}** linhas.")
+                st.markdown(f"**Filtro aplicado:** Mostrando as primeiras **{len(temp_df)}** linhas.")
             elif st.session_state.row_filter_mode == 'Remover todas':
-                output_df = temp_df.head(0).copy() # Cria um DF vazio com os mesmos cabeçalhos
                 st.markdown(f"**Filtro aplicado:** Todas as linhas de dados foram removidas (apenas o cabeçalho será exportado).")
             else: # 'Manter todas'
-                output_df = temp_df.copy()
-                st.markdown(f"**Filtro aplicado:** Mostrando todas as **{len(output_df)}** linhas.")
+                st.markdown(f"**Filtro aplicado:** Mostrando todas as **{len(temp_df)}** linhas.")
             
             st.markdown(f"**Colunas selecionadas:** {len(st.session_state.selected_columns)}")
             
-            # Aplicar conversões de tipo
-            for col in st.session_state.selected_columns:
-                target_type = st.session_state.column_types[col]
-                
-                # Passar o max_len para a função de conversão
-                max_len = None
-                if target_type == 'varchar':
-                    max_len = st.session_state.column_lengths.get(col, 255)
-                    
-                output_df[col] = convert_dtype(output_df[col], target_type, max_len=max_len)
+            # Filtro e paginação sobre as linhas de origem; só a página visível é convertida.
+            # A conversão completa roda apenas na exportação
+            page_df, page_key = paged_rows(
+                temp_df, f"output_{widget_prefix}", (digest, selected_sheet, len(temp_df), compact_storage)
+            )
+            
+            # Aplicar conversões de tipo à página: uma única passada por coluna produz os valores
+            # convertidos e as contagens usadas na validação
+            # Cada coluna é memorizada pela origem (arquivo, planilha, motor de leitura, armazenamento,
+            # linhas lidas, página) e pela sua configuração: mudar o tipo ou o tamanho de uma coluna
+            # reconverte apenas ela
+            profiles = profile_columns(
+                page_df, st.session_state.selected_columns,
+                st.session_state.column_types, st.session_state.column_lengths,
+                column_cache=get_column_cache(),
+                cache_key=(digest, selected_sheet, reader_engine, compact_storage, len(temp_df)) + page_key,
+                column_formats=sheet_config.get('column_formats'),
+            )
+            for profile in profiles.values():
+                if profile.error:
+                    st.warning(f"Aviso ao converter coluna: {profile.error}")
+            
+            # Montar a saída a partir das colunas convertidas, sem copiar nenhuma delas
+            output_df = assemble_output(profiles, page_df.index)
             
             # Mostrar preview
             st.dataframe(output_df, use_container_width=True, height=300)
@@ -369,58 +812,9 @@ if uploaded_file is not None:
             # Detectar problemas antes da exportação
             st.subheader("⚠️ Validação de Dados")
             
-            warnings = []
-            
-            # Usar 'df' (original) para verificar truncamento e ranges
-            original_df_for_check = df 
-            
-            # Verificar inteiros fora do intervalo
-            for col in st.session_state.selected_columns:
-                col_type = st.session_state.column_types[col]
-                if col_type in ['int', 'bigint']:
-                    original_values = original_df_for_check[col]
-                    
-                    try:
-                        numeric_original = pd.to_numeric(original_values, errors='coerce')
-                        
-                        if col_type == 'int':
-                            out_of_range = ((numeric_original > 2147483647) | (numeric_original < -2147483648)).sum()
-                            if out_of_range > 0:
-                                warnings.append(f"🔴 **{col}**: {out_of_range} valor(es) fora do intervalo INTEGER foram ajustados para o limite (-2147483648 a 2147483647). Considere usar BIGINT.")
-                        elif col_type == 'bigint':
-                            out_of_range = ((numeric_original > 9223372036854775807) | (numeric_original < -9223372036854775808)).sum()
-                            if out_of_range > 0:
-                                warnings.append(f"🔴 **{col}**: {out_of_range} valor(es) fora do intervalo BIGINT foram ajustados para o limite (-9223372036854775808 a 9223372036854775807)")
-                    except:
-                        pass
-            
-            # Verificar truncamento de strings
-            for col in st.session_state.selected_columns:
-                if st.session_state.column_types[col] == 'varchar':
-                    try:
-                        max_len = st.session_state.column_lengths.get(col, 255)
-                        # Compara o tamanho da string original (apenas limpando, sem truncar)
-                        original_cleaned_len = original_df_for_check[col].apply(clean_string).str.len()
-                        truncated_count = (original_cleaned_len > max_len).sum()
-                        
-                        if truncated_count > 0:
-                            warnings.append(f"🟠 **{col}**: {truncated_count} valor(es) excederam o limite de {max_len} caracteres e foram **truncados**.")
-                    except:
-                        pass
-                        
-            # Verificar problemas de encoding
-            for col in st.session_state.selected_columns:
-                if st.session_state.column_types[col] == 'varchar':
-                    try:
-                        original_values = original_df_for_check[col].astype(str)
-                        cleaned_count = 0
-                        for val in original_values:
-                            if val != clean_string(val):
-                                cleaned_count += 1
-                        if cleaned_count > 0:
-                            warnings.append(f"🟡 **{col}**: {cleaned_count} valor(es) com caracteres inválidos foram limpos para garantir UTF-8 válido")
-                    except:
-                        pass
+            # As contagens vêm do perfil calculado na conversão da página exibida
+            warnings = build_warnings(profiles, st.session_state.column_types, st.session_state.column_lengths)
+            st.caption("A validação abaixo se refere à página exibida; a do arquivo completo aparece após gerar o arquivo.")
             
             if warnings:
                 st.warning("🚨 **Atenção**: Alguns problemas foram detectados e corrigidos automaticamente:")
@@ -434,12 +828,31 @@ if uploaded_file is not None:
             # Opções de exportação
             st.subheader("⚙️ Opções de Exportação")
             
+            export_format_labels = {
+                'csv': 'CSV',
+                'pgcopy': 'PostgreSQL COPY (texto)',
+                'pgcopy_binary': 'PostgreSQL COPY (binário)',
+                'parquet': 'Parquet',
+                'arrow': 'Arrow IPC',
+            }
+            export_format = st.selectbox(
+                "Formato",
+                options=EXPORT_FORMATS,
+                format_func=export_format_labels.get,
+                index=0,
+                help="Os formatos do COPY são carregados direto no PostgreSQL (COPY ... FROM STDIN), com o CREATE TABLE gerado a partir dos metadados. "
+                     "Parquet e Arrow IPC (requerem `pyarrow`) são lidos sem reprocessamento pelo DuckDB e pelo Spark."
+            )
+            is_csv = export_format == 'csv'
+            is_columnar = export_format in COLUMNAR_FORMATS
+            
             col1, col2 = st.columns(2)
             with col1:
                 encoding_option = st.selectbox(
                     "Encoding do CSV",
                     options=['utf-8-sig', 'utf-8', 'latin1', 'iso-8859-1'],
                     index=0,
+                    disabled=is_columnar,
                     help="UTF-8-sig é recomendado para compatibilidade com Excel e bancos de dados"
                 )
             with col2:
@@ -447,31 +860,245 @@ if uploaded_file is not None:
                     "Separador",
                     options=[',', ';', '|', '\\t'],
                     index=0,
-                    help="Vírgula é o padrão, mas ponto-e-vírgula pode ser necessário em algumas regiões"
+                    disabled=not is_csv,
+                    help="Vírgula é o padrão, mas ponto-e-vírgula pode ser necessário em algumas regiões (o COPY usa sempre tabulação)"
                 )
             
+            col3, col4 = st.columns(2)
+            with col3:
+                if is_columnar:
+                    codec_option = st.selectbox(
+                        "Codec",
+                        options=PARQUET_CODECS if export_format == 'parquet' else ARROW_CODECS,
+                        format_func=lambda codec: codec or 'Nenhum',
+                        index=0,
+                        help="Compressão interna do formato, aplicada por coluna (os arquivos continuam legíveis sem descompactar)."
+                    )
+                    compression_option = 'Nenhuma'
+                else:
+                    compression_option = st.selectbox(
+                        "Compressão",
+                        options=['Nenhuma', 'gzip', 'zstd'],
+                        index=0,
+                        help="Comprime o CSV durante a gravação. zstd requer o pacote `zstandard`."
+                    )
+            with col4:
+                split_option = st.selectbox(
+                    "Dividir em partes",
+                    options=['Não dividir', 'Por número de linhas', 'Por tamanho (MB)'],
+                    index=0,
+                    disabled=not is_csv,
+                    help="Gera um ZIP com várias partes, cada uma com cabeçalho, para carga paralela no banco (apenas CSV)"
+                )
+            split_rows = split_bytes = None
+            if export_format == 'parquet':
+                dictionary = st.checkbox(
+                    "Codificação por dicionário",
+                    value=True,
+                    help="Guarda cada valor repetido uma só vez por row group: reduz bastante colunas de texto com poucos valores distintos."
+                )
+            if is_csv and split_option == 'Por número de linhas':
+                split_rows = int(st.number_input("Linhas por parte", min_value=1, value=100000, step=10000))
+            elif is_csv and split_option == 'Por tamanho (MB)':
+                split_mb = st.number_input("Tamanho máximo de cada parte (MB, antes da compressão)", min_value=1, value=100)
+                split_bytes = int(split_mb * 1024 * 1024)
+            
             # Converter separador
             sep = separator_option if separator_option != '\\t' else '\t'
+            compression = None if compression_option == 'Nenhuma' else compression_option
+            split = bool(split_rows or split_bytes)
+            base_name = f"{uploaded_file.name.rsplit('.', 1)[0]}_convertido"
+            export_options = dict(
+                export_format=export_format, compression=compression,
+                split_rows=split_rows, split_bytes=split_bytes, base_name=base_name
+            )
+            if is_columnar:
+                export_options.update(codec=codec_option, dictionary=export_format == 'parquet' and dictionary)
             
-            # Converter para CSV
-            csv_buffer = io.StringIO()
-            output_df.to_csv(csv_buffer, index=False, encoding=encoding_option, sep=sep)
-            csv_data = csv_buffer.getvalue()
+            if export_format in ('pgcopy', 'pgcopy_binary'):
+                # DDL da tabela de destino, a partir dos tipos e tamanhos configurados
+                with st.expander("🐘 CREATE TABLE para o PostgreSQL", expanded=False):
+                    table_name = st.text_input(
+                        "Nome da tabela",
+                        value=default_table_name(uploaded_file.name.rsplit('.', 1)[0]),
+                        key=f"table_name_{digest}"
+                    )
+                    ddl = create_table_ddl(
+                        table_name, st.session_state.selected_columns,
+                        st.session_state.column_types, st.session_state.column_lengths
+                    )
+                    load_command = copy_statement(
+                        table_name, st.session_state.selected_columns, binary=export_format == 'pgcopy_binary'
+                    )
+                    st.code(ddl + load_command, language='sql')
+                    st.download_button(
+                        label="⬇️ Baixar DDL (.sql)",
+                        data=ddl.encode('utf-8'),
+                        file_name=f"{base_name}.sql",
+                        mime="application/sql",
+                    )
             
-            # Botão de download
-            st.download_button(
-                label="⬇️ Baixar CSV",
-                data=csv_data,
-                file_name=f"{uploaded_file.name.rsplit('.', 1)[0]}_convertido.csv",
-                mime="text/csv",
-                use_container_width=True
+            export_all_sheets = len(sheet_names) > 1 and st.checkbox(
+                f"📚 Exportar todas as {len(sheet_names)} planilhas (um CSV por planilha, em ZIP)",
+                value=False,
+                help="As planilhas são lidas numa única abertura do arquivo e convertidas em paralelo, cada uma com seus metadados."
             )
             
-            st.success("✅ Arquivo pronto para download!")
+            if export_all_sheets:
+                # Planilhas nunca configuradas usam os tipos inferidos. Cópias: o job em segundo plano não pode
+                # ver edições feitas na sessão enquanto roda
+                all_configs = {
+                    sheet: copy.deepcopy(sheet_configs[(digest, sheet)])
+                    for sheet in sheet_names if (digest, sheet) in sheet_configs
+                }
+                if split:
+                    st.caption("A divisão em partes não se aplica à exportação de todas as planilhas: cada planilha gera um único CSV no ZIP.")
+                if not is_csv:
+                    st.caption("A exportação de todas as planilhas gera sempre CSVs.")
+                export_signature = repr((
+                    digest, sorted(all_configs.items(), key=lambda item: str(item[0])),
+                    st.session_state.row_filter_mode, st.session_state.row_filter_n, encoding_option, sep, compression
+                ))
+                export_kind = 'zip'
+                download_name, download_mime = f"{base_name}.zip", "application/zip"
+                button_label = "Gerar ZIP com todas as planilhas"
+                
+                def write_export(out, progress, file_data=file_data, filename=uploaded_file.name, digest=digest):
+                    progress('read')
+                    frames = read_all_sheets(
+                        workbook_cache, digest, file_data, filename, engine=reader_engine, compact=compact_storage
+                    )
+                    results = convert_sheets_to_zip(
+                        frames, all_configs, out,
+                        row_limit=row_limit,
+                        encoding=encoding_option,
+                        sep=sep,
+                        compression=compression,
+                        executor=sheet_executor,
+                        progress=progress,
+                    )
+                    zip_configs = {
+                        sheet: all_configs.get(sheet) or default_sheet_config(frames[sheet], exact=True)
+                        for sheet in results
+                    }
+                    return results, zip_configs
+                
+                sheet_executor = get_sheet_executor()
+                export_total = len(sheet_names)
+            else:
+                export_signature = repr((
+                    digest, selected_sheet, st.session_state.selected_columns, st.session_state.column_types,
+                    st.session_state.column_lengths, sheet_config.get('column_formats'), st.session_state.row_filter_mode,
+                    st.session_state.row_filter_n, encoding_option, sep, export_options, streaming_mode
+                ))
+                download_name = export_file_name(base_name, compression, split, export_format)
+                download_mime = export_mime(compression, split, export_format)
+                button_label = f"Gerar {export_format_labels[export_format]}"
+                selected_columns = list(st.session_state.selected_columns)
+                column_types = dict(st.session_state.column_types)
+                column_lengths = dict(st.session_state.column_lengths)
+                column_formats = dict(sheet_config.get('column_formats') or {})
+                
+                if streaming_mode:
+                    # Conversão completa em blocos, lendo a planilha de novo
+                    export_kind = 'stream'
+                    export_total = total_rows if row_limit is None or total_rows is None else min(row_limit, total_rows)
+                    
+                    def write_export(out, progress, file_data=file_data, filename=uploaded_file.name):
+                        result = stream_convert_to_csv(
+                            file_data, filename, out,
+                            selected_columns,
+                            column_types,
+                            column_lengths,
+                            row_limit=row_limit,
+                            encoding=encoding_option,
+                            sep=sep,
+                            sheet_name=selected_sheet,
+                            column_formats=column_formats,
+                            engine=reader_engine,
+                            progress=progress,
+                            **export_options
+                        )
+                        return result.profiles
+                else:
+                    # Linhas lidas (ou tiradas do cache) e convertidas por inteiro só no job, codificadas em
+                    # blocos direto para bytes
+                    export_kind = 'frame'
+                    export_total = total_rows if row_limit is None or total_rows is None else min(row_limit, total_rows)
+                    column_cache = get_column_cache()
+                    frame_columns = list(df.columns)
+                    
+                    def write_export(out, progress, file_data=file_data, filename=uploaded_file.name):
+                        progress('read')
+                        frame = read_sheet_rows(
+                            workbook_cache, digest, file_data, filename,
+                            nrows=row_limit, sheet_name=selected_sheet, engine=reader_engine, compact=compact_storage,
+                            usecols=[col for col in frame_columns if col in selected_columns]
+                        )[selected_columns]
+                        cache_key = (digest, selected_sheet, reader_engine, compact_storage, len(frame))
+                        progress('convert')
+                        full_profiles = profile_columns(
+                            frame, selected_columns, column_types, column_lengths,
+                            column_cache=column_cache, cache_key=cache_key, column_formats=column_formats,
+                        )
+                        export_frame(
+                            assemble_output(full_profiles, frame.index), out,
+                            column_types=column_types, column_lengths=column_lengths,
+                            encoding=encoding_option, sep=sep, progress=progress, **export_options
+                        )
+                        return full_profiles
+            
+            # A conversão roda num job em segundo plano: a página continua respondendo e pode cancelá-la
+            export_job = current_export_job(export_kind, export_signature)
+            running = export_job is not None and export_job.status in ('queued', 'running')
+            if st.button(f"⚙️ {button_label}", use_container_width=True, disabled=running):
+                export_job = submit_export_job(
+                    export_kind, export_signature, os.path.splitext(download_name)[1], write_export,
+                    label=download_name, total=export_total
+                )
+                running = True
+            
+            if running:
+                show_job_progress(export_job.id)
+            elif export_job is not None:
+                artifact_path, payload = show_job_outcome(export_job)
+                if artifact_path is not None:
+                    if export_kind == 'zip':
+                        results, zip_configs = payload
+                        for sheet, result in results.items():
+                            config = zip_configs[sheet]
+                            sheet_warnings = build_warnings(result.profiles, config['column_types'], config['column_lengths'])
+                            st.markdown(f"**{sheet}**: {result.rows} linha(s), {len(result.profiles)} coluna(s)")
+                            for warning in sheet_warnings:
+                                st.markdown(warning)
+                    else:
+                        full_warnings = build_warnings(payload, column_types, column_lengths)
+                        if full_warnings:
+                            st.warning("🚨 **Arquivo completo**: problemas detectados e corrigidos automaticamente:")
+                            for warning in full_warnings:
+                                st.markdown(warning)
+                    
+                    # Botão de download (lido do arquivo guardado); depois do download ele expira mais cedo
+                    with open(artifact_path, 'rb') as artifact:
+                        st.download_button(
+                            label=f"⬇️ Baixar {'ZIP' if export_kind == 'zip' else export_format_labels[export_format]}",
+                            data=artifact,
+                            file_name=download_name,
+                            mime=download_mime,
+                            on_click=get_job_manager().store.extend,
+                            args=(artifact_path, DOWNLOADED_TTL_SECONDS),
+                            use_container_width=True
+                        )
+                    st.success(f"✅ Arquivo pronto para download! ({export_job.elapsed:.1f}s)")
+            else:
+                st.info(f"Clique em **{button_label}** para converter o arquivo em segundo plano.")
             
         else:
             st.warning("⚠️ Selecione pelo menos uma coluna para exportar.")
             
+    except UnicodeEncodeError as e:
+        st.error(f"❌ O encoding {e.encoding} não representa alguns caracteres dos dados ({e.object[e.start:e.end]!r}).")
+        st.info("Escolha um encoding UTF-8 ou ajuste os dados de origem.")
     except Exception as e:
         st.error(f"❌ Erro ao processar o arquivo: {str(e)}")
         st.info("Verifique se o arquivo está no formato correto (XLS ou XLSX) e não está corrompido.")
@@ -491,6 +1118,43 @@ else:
     6. **Baixe**: Clique no botão de download para obter seu CSV
     """)
 
+# Painel de desempenho (spans da instrumentação desta sessão)
+if tracer is not None:
+    with st.expander("⏱️ Performance", expanded=False):
+        summary = tracer.summary()
+        if summary:
+            st.dataframe(pd.DataFrame([
+                {
+                    'Etapa': name,
+                    'Chamadas': total['calls'],
+                    'Segundos': total['seconds'],
+                    'Linhas': total['rows'],
+                    'Linhas/s': total['rows_per_sec'],
+                    'Pico (MB)': total['peak_bytes'] / 1024 ** 2 if total['peak_bytes'] is not None else None,
+                }
+                for name, total in sorted(summary.items(), key=lambda item: -item[1]['seconds'])
+            ]), hide_index=True, use_container_width=True)
+            st.caption("Últimos spans")
+            st.dataframe(pd.DataFrame(tracer.records()[-200:]), hide_index=True, use_container_width=True)
+            col_json, col_chrome, col_clear = st.columns(3)
+            with col_json:
+                st.download_button(
+                    "⬇️ JSON", data=tracer.to_json(), file_name="conversor_trace.json",
+                    mime="application/json", use_container_width=True
+                )
+            with col_chrome:
+                st.download_button(
+                    "⬇️ Chrome trace", data=tracer.to_chrome_trace(), file_name="conversor_chrome_trace.json",
+                    mime="application/json", use_container_width=True,
+                    help="Abrir em chrome://tracing ou em ui.perfetto.dev"
+                )
+            with col_clear:
+                if st.button("🧹 Limpar", use_container_width=True):
+                    tracer.clear()
+                    st.rerun()
+        else:
+            st.caption("Nenhuma etapa medida ainda.")
+
 # Footer
 st.markdown("---")
 st.markdown(
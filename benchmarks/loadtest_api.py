@@ -0,0 +1,173 @@
+"""Teste de carga da API HTTP (api.py): latência e vazão de conversões simultâneas
+
+Sem --url, sobe a API localmente (requer uvicorn) numa porta livre e a encerra ao final:
+
+    python benchmarks/loadtest_api.py --requests 40 --concurrency 8 --rows 20000
+    python benchmarks/loadtest_api.py --url http://127.0.0.1:8000 --workbook dados.xlsx --format parquet
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from conversor import EXPORT_FORMATS  # noqa: E402
+from run import workbook_path  # noqa: E402
+
+# Tempo máximo para a API local começar a responder
+STARTUP_TIMEOUT_SECONDS = 30
+# Pedaço lido da resposta por vez
+READ_BYTES = 64 * 1024
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, max_concurrent):
+    """Sobe api.py num subprocesso e espera o /health responder"""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT_DIR, 'api.py'), '--port', str(port),
+         '--max-concurrent', str(max_concurrent), '--log-level', 'warning'],
+        cwd=ROOT_DIR,
+    )
+    deadline = time.time() + STARTUP_TIMEOUT_SECONDS
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"A API encerrou ao iniciar (código {process.returncode}); o uvicorn está instalado?")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/health')
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("A API não respondeu a tempo")
+
+
+def convert_once(url, body, query):
+    """Uma conversão: status, tempo até o primeiro byte, tempo total e bytes recebidos"""
+    parsed = urllib.parse.urlsplit(url)
+    connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=600)
+    started = time.perf_counter()
+    first_byte = None
+    received = 0
+    try:
+        connection.request(
+            'POST', f"{parsed.path.rstrip('/')}/convert?{urllib.parse.urlencode(query)}", body=body,
+            headers={'Content-Type': 'application/octet-stream'},
+        )
+        response = connection.getresponse()
+        # Só o primeiro byte do corpo: ler um pedaço inteiro mediria o tempo até READ_BYTES chegarem
+        data = response.read(1)
+        first_byte = time.perf_counter() - started
+        while data:
+            received += len(data)
+            data = response.read(READ_BYTES)
+        status = response.status
+    except (OSError, http.client.HTTPException) as e:
+        status = type(e).__name__
+    finally:
+        connection.close()
+    return {'status': status, 'ttfb': first_byte, 'seconds': time.perf_counter() - started, 'bytes': received}
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(fraction):
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+    return {'p50': pick(0.5), 'p90': pick(0.9), 'p99': pick(0.99), 'max': ordered[-1], 'mean': statistics.mean(ordered)}
+
+
+def run_load(url, body, query, requests, concurrency):
+    """Dispara requests conversões com concurrency clientes simultâneos; retorna o relatório"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _: convert_once(url, body, query), range(requests)))
+    elapsed = time.perf_counter() - started
+    statuses = {}
+    for result in results:
+        statuses[str(result['status'])] = statuses.get(str(result['status']), 0) + 1
+    ok = [result for result in results if result['status'] == 200]
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'seconds': elapsed,
+        'statuses': statuses,
+        'requests_per_sec': len(ok) / elapsed if elapsed else None,
+        'upload_mb_per_sec': len(ok) * len(body) / 1024 ** 2 / elapsed if elapsed else None,
+        'output_mb_per_sec': sum(result['bytes'] for result in ok) / 1024 ** 2 / elapsed if elapsed else None,
+        'ttfb': percentiles([result['ttfb'] for result in ok if result['ttfb'] is not None]),
+        'latency': percentiles([result['seconds'] for result in ok]),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Teste de carga da API de conversão.")
+    parser.add_argument('--url', help="API já em execução (padrão: sobe uma local numa porta livre)")
+    parser.add_argument('--requests', type=int, default=20, help="Total de conversões (padrão: 20)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Clientes simultâneos (padrão: 4)")
+    parser.add_argument('--max-concurrent', type=int, default=os.cpu_count() or 1,
+                        help="Conversões simultâneas da API local (padrão: número de CPUs)")
+    parser.add_argument('--workbook', help="Workbook enviado (padrão: um sintético gerado com --rows linhas)")
+    parser.add_argument('--rows', type=int, default=10000, help="Linhas do workbook sintético (padrão: 10000)")
+    parser.add_argument('--format', default='csv', choices=EXPORT_FORMATS, help="Formato pedido (padrão: csv)")
+    parser.add_argument('--spec', help="Especificação JSON das colunas, enviada em ?spec=")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    path = args.workbook or workbook_path({
+        'rows': args.rows, 'columns': 7, 'text_length': 30, 'invalid_share': 0.01, 'out_of_range_share': 0.01,
+        'sheets': 1,
+    })
+    with open(path, 'rb') as workbook_file:
+        body = workbook_file.read()
+    query = {'filename': os.path.basename(path), 'format': args.format}
+    if args.spec:
+        with open(args.spec, encoding='utf-8') as spec_file:
+            query['spec'] = json.dumps(json.load(spec_file))
+
+    process = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        process = start_server(port, args.max_concurrent)
+        url = f"http://127.0.0.1:{port}"
+    try:
+        # Uma conversão antes da medição (importações e caches do servidor)
+        convert_once(url, body, query)
+        report = run_load(url, body, query, args.requests, args.concurrency)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report.update(url=url, workbook=os.path.basename(path), upload_bytes=len(body), format=args.format)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"{report['statuses']} | {report['requests_per_sec']:.2f} req/s | "
+          f"latência p50 {report['latency'].get('p50', 0):.3f}s p99 {report['latency'].get('p99', 0):.3f}s | "
+          f"primeiro byte p50 {report['ttfb'].get('p50', 0):.3f}s", file=sys.stderr)
+    return 0 if set(report['statuses']) == {'200'} else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
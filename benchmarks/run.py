@@ -0,0 +1,254 @@
+"""Benchmark das etapas da conversão: leitura, inferência, conversão, validação e exportação
+
+Gera (uma vez por combinação de parâmetros) um workbook sintético com create_test_problematic.py, mede cada
+etapa separadamente (menor tempo e mediana de --repeat execuções, pico de memória pelo tracemalloc) e grava ou
+compara um baseline em JSON:
+
+    python benchmarks/run.py --rows 100000 --save antes
+    python benchmarks/run.py --rows 100000 --compare antes
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from conversor import (  # noqa: E402
+    AUTO_ENGINE,
+    ENGINES,
+    EXPORT_FORMATS,
+    assemble_output,
+    compact_frame,
+    default_sheet_config,
+    export_frame,
+    profile_columns,
+    read_excel,
+    stream_convert_to_csv,
+    warning_records,
+)
+from create_test_problematic import COLUMN_KINDS, generate_workbook  # noqa: E402
+
+# Diretório dos baselines gravados com --save
+BASELINE_DIR = os.path.join(BENCH_DIR, 'baselines')
+# Aumento relativo (tempo ou memória) a partir do qual uma etapa é apontada como regressão
+DEFAULT_TOLERANCE = 0.2
+# Diferenças abaixo destes valores são ruído de medição, mesmo quando a variação relativa é grande
+MIN_SIGNIFICANT_SECONDS = 0.005
+MIN_SIGNIFICANT_BYTES = 1024 ** 2
+
+
+def workbook_path(params):
+    """Workbook sintético dos parâmetros, gerado só na primeira vez (fica no diretório temporário)"""
+    name = 'conversor_bench_' + '_'.join(f"{key}{value}" for key, value in sorted(params.items())) + '.xlsx'
+    path = os.path.join(tempfile.gettempdir(), name)
+    if not os.path.exists(path):
+        print(f"Gerando {path}...", file=sys.stderr)
+        generate_workbook(path, **params)
+    return path
+
+
+def build_stages(path, engine, formats, compact=False):
+    """Etapas na ordem de execução: cada uma recebe e atualiza o estado produzido pelas anteriores"""
+    with open(path, 'rb') as workbook_file:
+        data = workbook_file.read()
+    filename = os.path.basename(path)
+
+    def read(state):
+        state['frame'] = read_excel(data, filename, engine=engine)
+        if compact:
+            state['frame'] = compact_frame(state['frame'])
+
+    def infer(state):
+        state['config'] = default_sheet_config(state['frame'], exact=True)
+
+    def convert(state):
+        config = state['config']
+        state['profiles'] = profile_columns(
+            state['frame'], config['selected_columns'], config['column_types'], config['column_lengths'],
+            column_formats=config['column_formats'],
+        )
+        state['output'] = assemble_output(state['profiles'], state['frame'].index)
+
+    def validate(state):
+        config = state['config']
+        state['warnings'] = warning_records(state['profiles'], config['column_types'], config['column_lengths'])
+
+    def exporter(export_format):
+        def export(state):
+            config = state['config']
+            with tempfile.TemporaryFile() as out:
+                export_frame(
+                    state['output'], out, export_format=export_format,
+                    column_types=config['column_types'], column_lengths=config['column_lengths'],
+                )
+        return export
+
+    def stream(state):
+        config = state['config']
+        with tempfile.TemporaryFile() as out:
+            stream_convert_to_csv(
+                data, filename, out, config['selected_columns'], config['column_types'], config['column_lengths'],
+                column_formats=config['column_formats'], engine=engine,
+            )
+
+    stages = [('read', read), ('infer', infer), ('convert', convert), ('validate', validate)]
+    stages += [(f"export_{export_format}", exporter(export_format)) for export_format in formats]
+    stages.append(('stream_csv', stream))
+    return stages
+
+
+def run_stages(stages, repeat, memory=True):
+    """Tempos (menor, mediana e todas as execuções) e pico de memória de cada etapa"""
+    state = {}
+    results = {}
+    for name, stage in stages:
+        runs = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            stage(state)
+            runs.append(time.perf_counter() - started)
+        result = {'min': min(runs), 'median': statistics.median(runs), 'runs': runs}
+        if memory:
+            # Execução separada: o tracemalloc deixa o código medido bem mais lento
+            tracemalloc.start()
+            try:
+                stage(state)
+                result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        results[name] = result
+        print(f"{name:>20}: {result['min']:.4f}s (mediana {result['median']:.4f}s)"
+              + (f", pico {result['peak_bytes'] / 1024 ** 2:.1f} MB" if memory else ''), file=sys.stderr)
+    return results
+
+
+def environment():
+    """Versões e máquina em que o benchmark rodou"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'commit': commit,
+    }
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Linhas do relatório e etapas que ficaram mais lentas (ou usaram mais memória) que o baseline"""
+    lines = []
+    regressions = []
+    if current['params'] != baseline['params']:
+        lines.append(f"Atenção: parâmetros diferentes do baseline ({baseline['params']})")
+    for name, result in current['stages'].items():
+        base = baseline['stages'].get(name)
+        if base is None:
+            lines.append(f"{name:>20}: sem baseline")
+            continue
+        time_ratio = result['min'] / base['min'] if base['min'] else 1.0
+        line = f"{name:>20}: {base['min']:.4f}s -> {result['min']:.4f}s ({time_ratio - 1:+.0%})"
+        slower = time_ratio > 1 + tolerance and result['min'] - base['min'] >= MIN_SIGNIFICANT_SECONDS
+        if 'peak_bytes' in result and base.get('peak_bytes'):
+            memory_ratio = result['peak_bytes'] / base['peak_bytes']
+            line += f", pico {base['peak_bytes'] / 1024 ** 2:.1f} -> {result['peak_bytes'] / 1024 ** 2:.1f} MB ({memory_ratio - 1:+.0%})"
+            slower = slower or (
+                memory_ratio > 1 + tolerance and result['peak_bytes'] - base['peak_bytes'] >= MIN_SIGNIFICANT_BYTES
+            )
+        if slower:
+            line += "  <-- REGRESSÃO"
+            regressions.append(name)
+        lines.append(line)
+    return lines, regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Mede as etapas da conversão num workbook sintético.")
+    parser.add_argument('--rows', type=int, default=50000, help="Linhas por planilha (padrão: 50000)")
+    parser.add_argument('--columns', type=int, default=len(COLUMN_KINDS), help="Número de colunas")
+    parser.add_argument('--text-length', type=int, default=30, help="Tamanho máximo dos textos")
+    parser.add_argument('--invalid-share', type=float, default=0.01, help="Fração dos textos com caracteres inválidos")
+    parser.add_argument('--out-of-range-share', type=float, default=0.01, help="Fração dos inteiros fora do INTEGER")
+    parser.add_argument('--sheets', type=int, default=1, help="Número de planilhas (as etapas usam a primeira)")
+    parser.add_argument('--workbook', help="Usa um workbook existente em vez de gerar um sintético")
+    parser.add_argument('--engine', default=AUTO_ENGINE, choices=[AUTO_ENGINE, *ENGINES], help="Motor de leitura")
+    parser.add_argument('--compact', action='store_true', help="Compacta o DataFrame lido (categorias, inteiros menores)")
+    parser.add_argument('--formats', default='csv', help=f"Formatos exportados, separados por vírgula ({', '.join(EXPORT_FORMATS)})")
+    parser.add_argument('--repeat', type=int, default=3, help="Execuções por etapa (padrão: 3)")
+    parser.add_argument('--no-memory', action='store_true', help="Não mede o pico de memória")
+    parser.add_argument('--save', metavar='NOME', help="Grava o resultado em benchmarks/baselines/NOME.json")
+    parser.add_argument('--compare', metavar='NOME', help="Compara com benchmarks/baselines/NOME.json (ou um caminho .json)")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Aumento relativo tolerado antes de apontar regressão (padrão: 0.2 = 20%%)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in EXPORT_FORMATS]
+    if unknown:
+        print(f"Formatos desconhecidos: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    if args.workbook:
+        params = {'workbook': os.path.basename(args.workbook)}
+        path = args.workbook
+    else:
+        params = {
+            'rows': args.rows, 'columns': args.columns, 'text_length': args.text_length,
+            'invalid_share': args.invalid_share, 'out_of_range_share': args.out_of_range_share, 'sheets': args.sheets,
+        }
+        path = workbook_path(params)
+    params.update(engine=args.engine, compact=args.compact, formats=formats, repeat=args.repeat)
+
+    current = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'params': params,
+        'stages': run_stages(build_stages(path, args.engine, formats, args.compact), args.repeat, memory=not args.no_memory),
+    }
+    print(json.dumps(current, indent=2, ensure_ascii=False))
+
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        target = os.path.join(BASELINE_DIR, f"{args.save}.json")
+        with open(target, 'w', encoding='utf-8') as baseline_file:
+            json.dump(current, baseline_file, indent=2, ensure_ascii=False)
+            baseline_file.write('\n')
+        print(f"Baseline gravado em {target}", file=sys.stderr)
+
+    if args.compare:
+        source = args.compare if args.compare.endswith('.json') else os.path.join(BASELINE_DIR, f"{args.compare}.json")
+        with open(source, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        lines, regressions = compare(current, baseline, args.tolerance)
+        print(f"\nComparação com {source}:", file=sys.stderr)
+        for line in lines:
+            print(line, file=sys.stderr)
+        if regressions:
+            print(f"{len(regressions)} etapa(s) com regressão acima de {args.tolerance:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""Núcleo do conversor XLS/XLSX para CSV, utilizável sem o Streamlit"""
+from .cache import ColumnCache, WorkbookCache
+from .columnar import (
+    ARROW_CODECS,
+    ARROW_TYPES,
+    PARQUET_CODECS,
+    ColumnarExporter,
+    arrow_schema,
+)
+from .compact import (
+    ARROW_STRING_DTYPE,
+    CATEGORY_MAX_RATIO,
+    compact_frame,
+    compact_series,
+    frame_memory,
+)
+from .core import (
+    BIGINT_MAX,
+    BIGINT_MIN,
+    FALSE_TOKENS,
+    INT_MAX,
+    INT_MIN,
+    TRUE_TOKENS,
+    TYPE_OPTIONS,
+    ColumnProfile,
+    clamp_int_series,
+    clean_string,
+    clean_string_series,
+    convert_dtype,
+    infer_dtype,
+    merge_profiles,
+    profile_column,
+    validate_int_range,
+)
+from .dates import (
+    DATE_CACHE,
+    DATE_FORMATS,
+    DateCache,
+    detect_date_format,
+    excel_serial_to_datetime,
+    parse_datetimes,
+)
+from .engines import (
+    AUTO_ENGINE,
+    CALAMINE_MIN_BYTES,
+    ENGINE_TIMINGS,
+    ENGINES,
+    EngineTimings,
+    engine_available,
+    engine_candidates,
+)
+from .export import (
+    COLUMNAR_FORMATS,
+    EXPORT_FORMATS,
+    CsvExporter,
+    PgCopyExporter,
+    export_file_name,
+    export_frame,
+    export_mime,
+    iter_frame_chunks,
+    open_exporter,
+)
+from .jobs import (
+    ARTIFACT_TTL_SECONDS,
+    DOWNLOADED_TTL_SECONDS,
+    JOB_STAGES,
+    JOB_WORKERS,
+    ArtifactStore,
+    Job,
+    JobCancelled,
+    JobManager,
+    JobProgress,
+)
+from .pgcopy import (
+    PG_TYPES,
+    PgCopyBinaryWriter,
+    PgCopyTextWriter,
+    copy_statement,
+    create_table_ddl,
+    default_table_name,
+    pg_type,
+)
+from .inference import (
+    INFERENCE_EDGE_ROWS,
+    INFERENCE_SAMPLE_ROWS,
+    ColumnStats,
+    TypeProposal,
+    infer_column,
+    infer_file,
+    infer_frame,
+    sample_column,
+    suggest_length,
+)
+from .pipeline import (
+    PREVIEW_PAGE_SIZES,
+    ROW_FILTER_MODES,
+    ConversionResult,
+    SpecConversion,
+    assemble_output,
+    column_samples,
+    convert_file,
+    convert_frame,
+    convert_frame_to_csv,
+    convert_sheets_to_zip,
+    convert_with_spec,
+    default_sheet_config,
+    filter_rows,
+    load_spec,
+    output_base_names,
+    page_count,
+    page_rows,
+    profile_columns,
+    row_limit_for,
+    sheet_csv_names,
+    stream_convert_to_csv,
+    warning_records,
+)
+from .reader import (
+    ALL_SHEETS,
+    PREVIEW_SAMPLE_ROWS,
+    STREAM_CHUNK_ROWS,
+    count_sheet_rows,
+    iter_excel_chunks,
+    iter_excel_rows,
+    list_sheets,
+    peek_sheet_rows,
+    read_all_sheets,
+    read_excel,
+    read_sheet_rows,
+)
+from .tracing import (
+    Tracer,
+    current_tracer,
+    set_tracer,
+    trace_span,
+    use_tracer,
+)
@@ -0,0 +1,254 @@
+"""Caches LRU de workbooks já lidos e de colunas já convertidas"""
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Limites do cache de workbooks já lidos (em memória e despejados em disco)
+WORKBOOK_CACHE_MAX_ENTRIES = 4
+WORKBOOK_CACHE_MAX_SPILLED = 16
+# Limites do cache de colunas convertidas (entradas e memória ocupada pelos valores)
+COLUMN_CACHE_MAX_ENTRIES = 512
+COLUMN_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def _encode_name(name):
+    """Nome de coluna em JSON, com o tipo (o pd.read_excel mantém números e datas do cabeçalho)"""
+    if isinstance(name, (bool, np.bool_)):
+        return ['bool', bool(name)]
+    if isinstance(name, (int, np.integer)):
+        return ['int', int(name)]
+    if isinstance(name, (float, np.floating)):
+        return ['float', float(name)]
+    if isinstance(name, str):
+        return ['str', name]
+    if isinstance(name, datetime.datetime):
+        return ['datetime', name.isoformat()]
+    raise TypeError(f"Nome de coluna não serializável: {name!r}")
+
+
+def _decode_name(encoded):
+    kind, value = encoded
+    if kind == 'datetime':
+        return datetime.datetime.fromisoformat(value)
+    return {'bool': bool, 'int': int, 'float': float, 'str': str}[kind](value)
+
+
+class WorkbookCache:
+    """Cache LRU de DataFrames lidos, indexado pelo hash do conteúdo do arquivo
+
+    Com spill_dir, as entradas removidas da memória vão para o disco (no máximo max_spilled, as mais
+    antigas são apagadas) e voltam sem reler o workbook.
+    """
+
+    def __init__(self, max_entries=WORKBOOK_CACHE_MAX_ENTRIES, spill_dir=None, max_spilled=WORKBOOK_CACHE_MAX_SPILLED):
+        self.max_entries = max_entries
+        self.spill_dir = spill_dir
+        self.max_spilled = max_spilled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self._entries = OrderedDict()
+        self._spilled = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _spill_path(self, key):
+        """Diretório da entrada despejada: um .feather por DataFrame e o manifest.json com nomes e attrs"""
+        name = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.spill_dir, name)
+
+    def _spill(self, key, value):
+        """Grava em disco (Arrow/Feather) uma entrada removida do cache: um DataFrame ou {planilha: DataFrame}"""
+        if not self.spill_dir:
+            return
+        path = self._spill_path(key)
+        try:
+            sheets = value if isinstance(value, dict) else {None: value}
+            os.makedirs(path, exist_ok=True)
+            frames = []
+            for position, (sheet, df) in enumerate(sheets.items()):
+                # O Feather só aceita nomes de coluna em texto: os originais (e os tipos deles) vão no manifesto
+                columns = [_encode_name(col) for col in df.columns]
+                stored = df.reset_index(drop=True)
+                stored.columns = [str(i) for i in range(df.shape[1])]
+                stored.to_feather(os.path.join(path, f"{position}.feather"))
+                frames.append({'sheet': sheet, 'columns': columns, 'attrs': df.attrs})
+            # O manifesto é gravado por último: sem ele a entrada é ignorada
+            with open(os.path.join(path, 'manifest.json'), 'w', encoding='utf-8') as manifest:
+                json.dump({'sheets': isinstance(value, dict), 'frames': frames}, manifest)
+        except Exception:
+            # pyarrow ausente, nomes ou colunas não serializáveis: o workbook é apenas descartado
+            shutil.rmtree(path, ignore_errors=True)
+            return
+        self._trim_spilled(path)
+
+    def _trim_spilled(self, path):
+        """Registra a entrada despejada e apaga as mais antigas além de max_spilled
+
+        Entradas deixadas por execuções anteriores (fora da ordem registrada) são as primeiras a sair.
+        """
+        with self._lock:
+            self._spilled.pop(path, None)
+            self._spilled[path] = None
+            order = list(self._spilled)
+        try:
+            names = os.listdir(self.spill_dir)
+        except OSError:
+            return
+        known = set(order)
+        leftovers = sorted(
+            (os.path.join(self.spill_dir, name) for name in names),
+            key=os.path.getmtime,
+        )
+        entries = [entry for entry in leftovers if entry not in known and os.path.isdir(entry)] + order
+        for entry in entries[:max(len(entries) - self.max_spilled, 0)]:
+            shutil.rmtree(entry, ignore_errors=True)
+            with self._lock:
+                self._spilled.pop(entry, None)
+
+    def _load_spilled(self, key):
+        """Recupera do disco uma entrada despejada anteriormente (e apaga os arquivos); None se não existir"""
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(key)
+        if not os.path.exists(os.path.join(path, 'manifest.json')):
+            return None
+        try:
+            with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as manifest:
+                manifest = json.load(manifest)
+            sheets = {}
+            for position, frame in enumerate(manifest['frames']):
+                df = pd.read_feather(os.path.join(path, f"{position}.feather"))
+                df.columns = [_decode_name(col) for col in frame['columns']]
+                df.attrs = frame['attrs']
+                sheets[frame['sheet']] = df
+            return sheets if manifest['sheets'] else sheets[None]
+        except Exception:
+            return None
+        finally:
+            # De volta à memória: será gravada de novo se for removida outra vez
+            shutil.rmtree(path, ignore_errors=True)
+            with self._lock:
+                self._spilled.pop(path, None)
+
+    def get_or_load(self, key, loader):
+        """Retorna o DataFrame da chave, chamando loader() apenas em caso de miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        df = self._load_spilled(key)
+        if df is not None:
+            with self._lock:
+                self.disk_hits += 1
+        else:
+            df = loader()
+            with self._lock:
+                self.misses += 1
+
+        evicted = []
+        with self._lock:
+            self._entries[key] = df
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False))
+                self.evictions += 1
+
+        for old_key, old_df in evicted:
+            self._spill(old_key, old_df)
+        return df
+
+    def peek(self, key):
+        """Retorna o DataFrame da chave se já estiver em memória (conta como hit), sem carregar"""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def keys(self):
+        """Chaves das entradas em memória, da menos para a mais recente"""
+        with self._lock:
+            return list(self._entries)
+
+    def stats(self):
+        """Contadores de uso do cache"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+            }
+
+
+def _profile_bytes(profile):
+    """Memória ocupada pelos valores convertidos de uma coluna (inclui o texto das colunas object)"""
+    values = profile.values
+    if not hasattr(values, 'memory_usage'):
+        return 0
+    return int(values.memory_usage(index=False, deep=values.dtype == object))
+
+
+class ColumnCache:
+    """Cache LRU de colunas convertidas (ColumnProfile), limitado por número de entradas e por memória
+
+    A chave identifica a coluna de origem e a configuração da conversão, por exemplo
+    (hash do arquivo, planilha, motor de leitura, armazenamento compacto, linhas lidas, coluna, tipo,
+    tamanho máximo): ao mudar o tipo ou o tamanho de uma coluna, só ela é convertida de novo.
+    """
+
+    def __init__(self, max_entries=COLUMN_CACHE_MAX_ENTRIES, max_bytes=COLUMN_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """Retorna o perfil da chave, chamando compute() apenas em caso de miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+
+        profile = compute()
+        size = _profile_bytes(profile)
+        with self._lock:
+            self.misses += 1
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (profile, size)
+            self.bytes += size
+            # A entrada recém-inserida nunca é removida, mesmo maior que o limite
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self.bytes -= old_size
+                self.evictions += 1
+        return profile
+
+    def stats(self):
+        """Contadores de uso do cache"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+            }
@@ -0,0 +1,133 @@
+"""Conversão em lote pela linha de comando: python -m conversor"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .engines import AUTO_ENGINE, ENGINES
+from .export import EXPORT_FORMATS
+from .pipeline import convert_file, load_spec, output_base_names
+from .reader import STREAM_CHUNK_ROWS
+
+EXCEL_EXTENSIONS = ('.xls', '.xlsx')
+
+
+def expand_inputs(inputs):
+    """Expande diretórios e padrões glob na lista de planilhas a converter"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = sorted(glob.glob(os.path.join(item, '*')))
+        elif glob.has_magic(item):
+            candidates = sorted(glob.glob(item, recursive=True))
+        else:
+            candidates = [item]
+        for path in candidates:
+            if path.lower().endswith(EXCEL_EXTENSIONS) and os.path.isfile(path) and path not in paths:
+                paths.append(path)
+    return paths
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m conversor',
+        description="Converte planilhas XLS/XLSX para CSV em lote, em paralelo, a partir de uma especificação de colunas."
+    )
+    parser.add_argument('inputs', nargs='+', help="Arquivos, diretórios ou padrões glob (ex: 'dados/**/*.xlsx')")
+    parser.add_argument('-s', '--spec', help="Especificação das colunas em JSON ou YAML (tipos, tamanhos, seleção e filtro de linhas)")
+    parser.add_argument('-o', '--output-dir', default='.', help="Diretório de saída dos CSVs (padrão: diretório atual)")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1, help="Número de processos (padrão: número de CPUs)")
+    parser.add_argument('--encoding', default='utf-8-sig', help="Encoding do CSV (padrão: utf-8-sig)")
+    parser.add_argument('--sep', default=',', help="Separador do CSV; use '\\t' para tabulação (padrão: ,)")
+    parser.add_argument('-f', '--format', default='csv', choices=EXPORT_FORMATS,
+                        help="Formato de saída: CSV, COPY do PostgreSQL em texto/binário (com o CREATE TABLE num .sql), "
+                             "Parquet ou Arrow IPC (requerem pyarrow) (padrão: csv)")
+    parser.add_argument('--compression', choices=['gzip', 'zstd'], help="Comprime cada CSV gerado (zstd requer o pacote zstandard)")
+    parser.add_argument('--codec', default='default', choices=['default', 'snappy', 'zstd', 'gzip', 'lz4', 'none'],
+                        help="Codec interno do Parquet (padrão: snappy) ou do Arrow IPC (padrão: lz4; aceita lz4 ou zstd)")
+    parser.add_argument('--no-dictionary', action='store_true', help="Desliga a codificação por dicionário do Parquet")
+    parser.add_argument('--split-rows', type=int, help="Divide a saída em partes de N linhas, num ZIP")
+    parser.add_argument('--split-mb', type=float, help="Divide a saída em partes de N MB (antes da compressão), num ZIP")
+    parser.add_argument('--engine', default=AUTO_ENGINE, choices=[AUTO_ENGINE, *ENGINES],
+                        help="Motor de leitura; 'auto' usa o calamine (se instalado) nos arquivos grandes e recorre "
+                             "aos demais se um motor falhar (padrão: auto)")
+    parser.add_argument('--chunk-rows', type=int, default=STREAM_CHUNK_ROWS, help="Linhas por bloco de conversão")
+    parser.add_argument('--summary', default='-', help="Arquivo para o resumo JSON ('-' = saída padrão)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sep = '\t' if args.sep == '\\t' else args.sep
+
+    try:
+        spec = load_spec(args.spec) if args.spec else {}
+    except Exception as e:
+        print(f"Erro ao ler a especificação: {e}", file=sys.stderr)
+        return 2
+
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("Nenhum arquivo XLS/XLSX encontrado.", file=sys.stderr)
+        return 2
+    # Nomes de saída resolvidos antes de despachar: duas planilhas nunca gravam no mesmo arquivo
+    try:
+        base_names = output_base_names(paths)
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    workers = max(1, min(args.workers, len(paths)))
+    options = dict(
+        encoding=args.encoding, sep=sep, chunk_rows=args.chunk_rows, engine=args.engine, export_format=args.format,
+        compression=args.compression, codec=None if args.codec == 'none' else args.codec,
+        dictionary=not args.no_dictionary,
+        split_rows=args.split_rows, split_bytes=int(args.split_mb * 1024 * 1024) if args.split_mb else None,
+    )
+    results = []
+
+    def report(result):
+        results.append(result)
+        if result['status'] == 'ok':
+            print(f"[ok] {result['input']} -> {result['output']} ({result['rows']} linhas, "
+                  f"{result['seconds']:.2f}s, {len(result['warnings'])} aviso(s))", file=sys.stderr)
+        else:
+            print(f"[erro] {result['input']}: {result['error']} ({result['seconds']:.2f}s)", file=sys.stderr)
+
+    if workers == 1:
+        for path in paths:
+            report(convert_file(path, spec, args.output_dir, base_name=base_names[path], **options))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(convert_file, path, spec, args.output_dir, base_name=base_names[path], **options)
+                for path in paths
+            ]
+            for future in as_completed(futures):
+                report(future.result())
+
+    # Resumo na ordem dos arquivos de entrada
+    order = {path: i for i, path in enumerate(paths)}
+    results.sort(key=lambda result: order[result['input']])
+    errors = sum(1 for result in results if result['status'] != 'ok')
+    summary = {
+        'workers': workers,
+        'files': len(results),
+        'ok': len(results) - errors,
+        'errors': errors,
+        'seconds': round(time.perf_counter() - started, 4),
+        'results': results,
+    }
+
+    text = json.dumps(summary, ensure_ascii=False, indent=2, default=str)
+    if args.summary == '-':
+        print(text)
+    else:
+        with open(args.summary, 'w', encoding='utf-8') as summary_file:
+            summary_file.write(text + '\n')
+    return 1 if errors else 0
@@ -0,0 +1,104 @@
+"""Exportação colunar (Parquet e Arrow IPC) com o schema derivado dos metadados das colunas"""
+
+# Tipo Arrow de cada tipo configurado nas colunas
+ARROW_TYPES = {
+    'int': 'int32',
+    'bigint': 'int64',
+    'float': 'float64',
+    'bool': 'bool_',
+    'datetime': 'timestamp',
+    'varchar': 'string',
+}
+# Codecs aceitos por formato (o primeiro é o padrão; None = sem compressão)
+PARQUET_CODECS = ['snappy', 'zstd', 'gzip', 'lz4', None]
+ARROW_CODECS = ['lz4', 'zstd', None]
+COLUMNAR_SUFFIX = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise RuntimeError("pyarrow não está instalado: exporte em CSV ou execute 'pip install pyarrow'")
+    return pyarrow
+
+
+def arrow_schema(columns, column_types, column_lengths):
+    """Schema Arrow das colunas; o tamanho do varchar fica nos metadados do campo (max_length)"""
+    pa = _pyarrow()
+    fields = []
+    for col in columns:
+        col_type = column_types[col]
+        if col_type == 'datetime':
+            arrow_type = pa.timestamp('us')
+        else:
+            arrow_type = getattr(pa, ARROW_TYPES.get(col_type, 'string'))()
+        metadata = {'type': col_type}
+        if col_type == 'varchar':
+            metadata['max_length'] = str(column_lengths.get(col, 255))
+        fields.append(pa.field(str(col), arrow_type, metadata=metadata))
+    return pa.schema(fields)
+
+
+class ColumnarExporter:
+    """Grava blocos de DataFrame como Parquet (um row group por bloco) ou Arrow IPC (um record batch por bloco)
+
+    dictionary liga a codificação por dicionário do Parquet; no Arrow IPC as colunas varchar são
+    gravadas como texto simples, já que o formato de arquivo não aceita um dicionário por bloco.
+    """
+
+    def __init__(self, out, column_types, column_lengths=None, export_format='parquet', codec='default',
+                 dictionary=True, base_name='dados'):
+        self.pa = _pyarrow()
+        self.out = out
+        self.column_types = column_types
+        self.column_lengths = column_lengths or {}
+        self.export_format = export_format
+        codecs = PARQUET_CODECS if export_format == 'parquet' else ARROW_CODECS
+        self.codec = codecs[0] if codec == 'default' else codec
+        if self.codec not in codecs:
+            raise ValueError(f"Codec {self.codec} não é suportado no formato {export_format}")
+        self.dictionary = dictionary
+        self.parts = [f"{base_name}{COLUMNAR_SUFFIX[export_format]}"]
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+
+    def _open(self, columns):
+        self._schema = arrow_schema(columns, self.column_types, self.column_lengths)
+        if self.export_format == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(
+                self.out, self._schema, compression=self.codec or 'none', use_dictionary=self.dictionary
+            )
+        else:
+            options = self.pa.ipc.IpcWriteOptions(compression=self.codec)
+            self._writer = self.pa.ipc.new_file(self.out, self._schema, options=options)
+
+    def _table(self, frame):
+        """Converte o bloco para uma tabela Arrow no schema (NaN e NaT viram nulos)"""
+        arrays = [
+            self.pa.array(frame[col], from_pandas=True).cast(field.type, safe=False)
+            for col, field in zip(frame.columns, self._schema)
+        ]
+        return self.pa.Table.from_arrays(arrays, schema=self._schema)
+
+    def write(self, frame):
+        """Acrescenta um bloco de linhas"""
+        if self._writer is None:
+            self._open(list(frame.columns))
+        if len(frame) == 0:
+            return
+        table = self._table(frame)
+        if self.export_format == 'parquet':
+            self._writer.write_table(table, row_group_size=len(frame))
+        else:
+            self._writer.write_table(table)
+        self.rows += len(frame)
+
+    def close(self):
+        """Finaliza o arquivo (rodapé do Parquet / Arrow); retorna estatísticas da exportação"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        return {'rows': self.rows, 'parts': list(self.parts)}
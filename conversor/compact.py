@@ -0,0 +1,74 @@
+"""Representação compacta dos DataFrames mantidos em memória: categorias, textos Arrow e inteiros menores"""
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+# Colunas de texto com até esta fração de valores distintos viram categóricas
+CATEGORY_MAX_RATIO = 0.5
+# Abaixo deste número de linhas o dicionário das categorias não compensa
+CATEGORY_MIN_ROWS = 100
+# Textos sem repetição suficiente ficam num buffer Arrow, se o pyarrow estiver instalado
+ARROW_STRING_DTYPE = pd.StringDtype('pyarrow') if importlib.util.find_spec('pyarrow') else None
+
+
+def is_arrow_string(dtype):
+    """Indica se o dtype guarda textos num buffer Arrow (StringDtype com storage pyarrow)"""
+    return isinstance(dtype, pd.StringDtype) and dtype.storage == 'pyarrow'
+
+
+def _is_text(series):
+    """Coluna só com textos (além dos vazios); colunas mistas guardam o tipo de cada valor e não são compactadas"""
+    if isinstance(series.dtype, pd.StringDtype):
+        return True
+    return series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) == 'string'
+
+
+def compact_series(series, category_max_ratio=CATEGORY_MAX_RATIO):
+    """Versão compacta da coluna, com os mesmos valores; a própria série quando não há ganho
+
+    Textos repetidos viram categóricos e os demais textos object vão para um buffer Arrow; inteiros vão para
+    o menor dtype que comporta a faixa. Floats ficam em float64: em float32 o CSV escreveria outra
+    representação decimal para os mesmos números.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    if _is_text(series):
+        present = series.count()
+        try:
+            if len(series) >= CATEGORY_MIN_ROWS and series.nunique(dropna=True) <= present * category_max_ratio:
+                return series.astype('category')
+            if series.dtype == object and ARROW_STRING_DTYPE is not None:
+                return series.astype(ARROW_STRING_DTYPE)
+        except UnicodeEncodeError:
+            # Surrogates isolados não cabem num buffer Arrow (UTF-8): a coluna fica em object
+            pass
+        return series
+    if pd.api.types.is_integer_dtype(series.dtype) and isinstance(series.dtype, np.dtype):
+        return pd.to_numeric(series, downcast='unsigned' if series.dtype.kind == 'u' else 'integer')
+    return series
+
+
+def compact_frame(frame, category_max_ratio=CATEGORY_MAX_RATIO):
+    """DataFrame com as colunas compactadas; as colunas sem ganho são reaproveitadas sem cópia"""
+    columns = {}
+    changed = False
+    for position in range(frame.shape[1]):
+        series = frame.iloc[:, position]
+        compacted = compact_series(series, category_max_ratio)
+        changed = changed or compacted is not series
+        columns[position] = compacted
+    if not changed:
+        return frame
+    result = pd.DataFrame(columns, index=frame.index, copy=False)
+    result.columns = frame.columns
+    result.attrs = dict(frame.attrs)
+    return result
+
+
+def frame_memory(frame):
+    """Bytes ocupados pelo DataFrame, contando os textos das colunas object (as demais dispensam a varredura)"""
+    return int(sum(
+        frame.iloc[:, position].memory_usage(index=False, deep=frame.dtypes.iloc[position] == object)
+        for position in range(frame.shape[1])
+    ))
@@ -0,0 +1,326 @@
+"""Núcleo de conversão de tipos (sem dependência do Streamlit)"""
+import decimal
+import functools
+import re
+import sys
+import warnings
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from .compact import is_arrow_string
+from .dates import parse_datetimes
+from .tracing import trace_span
+
+# Limites do INTEGER e do BIGINT no PostgreSQL
+INT_MIN, INT_MAX = -2147483648, 2147483647
+BIGINT_MIN, BIGINT_MAX = -9223372036854775808, 9223372036854775807
+# Acima deste módulo um float64 não representa mais todos os inteiros
+FLOAT_EXACT_INT_LIMIT = 2 ** 53
+
+# Tipos de dado aceitos para as colunas
+TYPE_OPTIONS = ['varchar', 'int', 'bigint', 'float', 'bool', 'datetime']
+# Textos reconhecidos como booleanos (sem diferenciar maiúsculas)
+TRUE_TOKENS = {'true', 'verdadeiro', 'sim', 'yes'}
+FALSE_TOKENS = {'false', 'falso', 'não', 'nao', 'no'}
+
+
+# Função para inferir tipo de dado
+def infer_dtype(series):
+    """Infere o tipo de dado de uma série pandas a partir de uma amostra dos valores"""
+    from .inference import infer_column
+    return infer_column(series).type
+
+# Função para validar e limitar valores inteiros
+def validate_int_range(value, use_bigint=False):
+    """Valida se o valor está dentro do intervalo de INTEGER ou BIGINT do PostgreSQL"""
+    try:
+        val = float(value)
+        if pd.isna(val):
+            return 0
+        
+        if use_bigint and FLOAT_EXACT_INT_LIMIT <= abs(val) < float('inf'):
+            # Acima de 2**53 o float perde precisão: usar o inteiro exato quando o valor for um inteiro
+            exact = _exact_int(value)
+            if exact is not None:
+                return min(max(exact, BIGINT_MIN), BIGINT_MAX)
+        
+        if use_bigint:
+            # Limite do BIGINT no PostgreSQL: -9223372036854775808 a 9223372036854775807
+            if val > 9223372036854775807:
+                return 9223372036854775807
+            elif val < -9223372036854775808:
+                return -9223372036854775808
+        else:
+            # Limite do INTEGER no PostgreSQL: -2147483648 a 2147483647
+            if val > 2147483647:
+                return 2147483647
+            elif val < -2147483648:
+                return -2147483648
+        
+        return int(val)
+    except:
+        return 0
+
+def _exact_int(value):
+    """Converte um inteiro grande (int ou texto) sem passar por float; None se não for possível"""
+    if isinstance(value, (bool, np.bool_)):
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(decimal.Decimal(value.strip()))
+        except (decimal.InvalidOperation, ValueError, OverflowError):
+            return None
+    return None
+
+
+def _float_or_nan(value):
+    """float(value) como em validate_int_range; NaN quando o valor não é conversível"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _clamp_int(series, use_bigint=False):
+    """Versão vetorizada de validate_int_range; retorna (série int64, quantidade fora do intervalo)"""
+    lo, hi = (BIGINT_MIN, BIGINT_MAX) if use_bigint else (INT_MIN, INT_MAX)
+
+    # Datas não são convertidas por float(): validate_int_range retorna 0
+    if pd.api.types.is_datetime64_any_dtype(series) or pd.api.types.is_timedelta64_dtype(series):
+        return pd.Series(np.zeros(len(series), dtype=np.int64), index=series.index), 0
+
+    numeric = pd.to_numeric(series, errors='coerce')
+
+    if pd.api.types.is_bool_dtype(numeric):
+        return pd.Series(numeric.to_numpy(dtype=np.int64), index=series.index), 0
+
+    if pd.api.types.is_integer_dtype(numeric) and not numeric.hasnans:
+        values = numeric.to_numpy()
+        if values.dtype.itemsize < 8:
+            # Colunas compactadas (int8/int16/int32): os limites não cabem no dtype original
+            values = values.astype(np.int64)
+        over = values > hi
+        under = values < lo
+        result = np.where(over, hi, np.where(under, lo, values)).astype(np.int64)
+        return pd.Series(result, index=series.index), int(over.sum() + under.sum())
+
+    values = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+    text_like = series.dtype == object or isinstance(series.dtype, pd.StringDtype)
+    if text_like:
+        # float() aceita textos que o to_numeric recusa ('1_000', dígitos de largura total): tentar de novo,
+        # uma vez por valor distinto, só nas posições que viraram NaN sem estarem vazias
+        retry = np.flatnonzero(np.isnan(values) & series.notna().to_numpy())
+        if len(retry):
+            codes, uniques = pd.factorize(series.to_numpy(dtype=object)[retry])
+            values = values.copy()
+            values[retry] = np.array([_float_or_nan(value) for value in uniques], dtype=np.float64)[codes]
+    # float(BIGINT_MAX) arredonda para 2**63, então a comparação precisa ser >=
+    over = values >= 2.0 ** 63 if use_bigint else values > hi
+    under = values < lo
+    valid = ~(np.isnan(values) | over | under)
+
+    result = np.zeros(len(values), dtype=np.int64)
+    result[valid] = np.trunc(values[valid]).astype(np.int64)
+    result[over] = hi
+    result[under] = lo
+
+    # Inteiros acima de 2**53 perdem precisão em float64: recalcular só esses valores, de forma exata
+    if use_bigint and text_like:
+        imprecise = np.flatnonzero(~np.isnan(values) & (np.abs(values) >= FLOAT_EXACT_INT_LIMIT))
+        original = series.to_numpy(dtype=object)
+        for pos in imprecise:
+            exact = _exact_int(original[pos])
+            if exact is None:
+                continue
+            over[pos] = exact > hi
+            under[pos] = exact < lo
+            result[pos] = min(max(exact, lo), hi)
+
+    return pd.Series(result, index=series.index), int(over.sum() + under.sum())
+
+
+def clamp_int_series(series, use_bigint=False):
+    """Limita uma série inteira ao intervalo do INTEGER ou BIGINT do PostgreSQL (NaN e lixo viram 0)"""
+    return _clamp_int(series, use_bigint=use_bigint)[0]
+
+
+# Função para limpar strings com problemas de encoding
+def clean_string(value):
+    """Remove caracteres inválidos e garante encoding UTF-8 correto"""
+    try:
+        if pd.isna(value):
+            return ''
+        # Converter para string
+        text = str(value)
+        # Remover caracteres de controle e não-UTF-8
+        text = text.encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
+        # Remover caracteres de controle exceto quebras de linha e tabs
+        text = ''.join(char for char in text if char.isprintable() or char in '\n\r\t')
+        return text.strip()
+    except:
+        return ''
+
+@functools.lru_cache(maxsize=None)
+def _non_printable_pattern():
+    """Regex com os caracteres removidos por clean_string (não imprimíveis, exceto \\n, \\r e \\t)"""
+    ranges = []
+    start = None
+    for code in range(sys.maxunicode + 2):
+        char = chr(code) if code <= sys.maxunicode else None
+        removable = char is not None and not char.isprintable() and char not in '\n\r\t'
+        if removable and start is None:
+            start = code
+        elif not removable and start is not None:
+            ranges.append(f"\\U{start:08x}-\\U{code - 1:08x}")
+            start = None
+    # Surrogates isolados (inválidos em UTF-8) também caem nesta classe
+    return re.compile(f"[{''.join(ranges)}]+")
+
+
+def _string_result(series, values, codes):
+    """Série de saída com values[codes] (código -1 = vazio), no mesmo armazenamento da coluna de origem
+
+    Categóricas continuam categóricas e textos Arrow continuam Arrow: nenhum objeto Python é criado por linha.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Valores distintos podem coincidir depois da limpeza e do truncamento
+        value_codes, categories = pd.factorize(np.append(values, ''))
+        codes = value_codes[np.where(codes < 0, len(values), codes)]
+        return pd.Series(pd.Categorical.from_codes(codes, categories), index=series.index)
+    if is_arrow_string(series.dtype):
+        import pyarrow as pa
+        taken = pa.array(np.append(values, ''), type=pa.string()).take(np.where(codes < 0, len(values), codes))
+        return pd.Series(pd.array(taken, dtype=series.dtype), index=series.index)
+    result = np.full(len(series), '', dtype=object)
+    present = codes >= 0
+    result[present] = values[codes[present]]
+    return pd.Series(result, index=series.index, dtype=object)
+
+
+def _as_text(series):
+    """str() de cada valor num array object (sem inferir o dtype str, que recusa surrogates isolados)"""
+    return np.array([str(value) for value in series.to_numpy(dtype=object)], dtype=object)
+
+
+def _clean_strings(series, max_len=None):
+    """Versão vetorizada de clean_string, com truncamento opcional em max_len
+
+    Retorna (série limpa, valores alterados pela limpeza, valores truncados).
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # As categorias já são os valores distintos
+        codes = series.cat.codes.to_numpy()
+        texts = pd.Series(series.cat.categories.map(str), dtype=object)
+    else:
+        missing = series.isna().to_numpy()
+        codes = np.full(len(series), -1, dtype=np.intp)
+        valid = series[~missing]
+        if valid.empty:
+            texts = pd.Series([], dtype=object)
+        elif isinstance(valid.dtype, pd.StringDtype) or pd.api.types.infer_dtype(valid, skipna=True) == 'string':
+            codes[~missing], uniques = pd.factorize(valid)
+            texts = pd.Series(np.asarray(uniques, dtype=object), dtype=object)
+        elif valid.dtype == object:
+            # Tipos mistos: str(valor) antes de agrupar, pois 1, 1.0 e True são a mesma chave num hash.
+            # Em object: o dtype str (Arrow) não aceita surrogates isolados, que clean_string remove
+            codes[~missing], uniques = pd.factorize(_as_text(valid))
+            texts = pd.Series(np.asarray(uniques, dtype=object), dtype=object)
+        else:
+            codes[~missing], uniques = pd.factorize(valid)
+            texts = pd.Series(uniques).map(str).astype(object)
+
+    # Limpar e truncar apenas os valores distintos e contar pelas posições
+    present = codes[codes >= 0]
+    cleaned = texts.str.replace(_non_printable_pattern(), '', regex=True).str.strip()
+    changed = int((cleaned.to_numpy(dtype=object) != texts.to_numpy(dtype=object))[present].sum())
+    truncated = 0
+    if max_len is not None and max_len > 0:
+        too_long = (cleaned.str.len() > max_len).to_numpy(dtype=bool)
+        truncated = int(too_long[present].sum())
+        if truncated:
+            cleaned = cleaned.str[:max_len]
+    return _string_result(series, cleaned.to_numpy(dtype=object), codes), changed, truncated
+
+
+def clean_string_series(series):
+    """Aplica clean_string a uma série inteira, limpando cada valor distinto uma única vez"""
+    return _clean_strings(series)[0]
+
+
+def _to_bool(series):
+    """Converte para bool; textos como 'false' e 'não' viram False em vez de contar como texto não vazio"""
+    values = series.astype(bool)
+    if series.dtype != object and not isinstance(series.dtype, pd.StringDtype):
+        return values
+    text = pd.Series(_as_text(series), index=series.index, dtype=object).str.strip().str.lower()
+    return values.mask(text.isin(TRUE_TOKENS), True).mask(text.isin(FALSE_TOKENS), False)
+
+
+class ColumnProfile(NamedTuple):
+    """Coluna convertida junto com as contagens de validação produzidas na mesma passada"""
+    values: pd.Series
+    clamped: int = 0
+    truncated: int = 0
+    cleaned: int = 0
+    date_failed: int = 0
+    error: Optional[str] = None
+
+
+def profile_column(series, target_type, max_len=None, date_format=None):
+    """Converte a coluna e conta os valores ajustados, truncados e limpos numa única passada
+
+    date_format (ex: '%d/%m/%Y') fixa o formato das datas em texto; sem ele, o formato é detectado numa amostra.
+    """
+    with trace_span('convert', column=str(series.name), type=target_type, rows=len(series)):
+        return _profile_column(series, target_type, max_len, date_format)
+
+
+def _profile_column(series, target_type, max_len, date_format):
+    if target_type != 'varchar' and isinstance(series.dtype, pd.CategoricalDtype):
+        # Colunas compactadas: as conversões numéricas, booleanas e de datas esperam os valores em si
+        series = series.astype(series.cat.categories.dtype)
+    try:
+        if target_type in ('int', 'bigint'):
+            # Limitar os valores ao intervalo do INTEGER/BIGINT (vetorizado)
+            values, clamped = _clamp_int(series, use_bigint=(target_type == 'bigint'))
+            return ColumnProfile(values, clamped=clamped)
+        elif target_type == 'float':
+            return ColumnProfile(pd.to_numeric(series, errors='coerce'))
+        elif target_type == 'bool':
+            return ColumnProfile(_to_bool(series))
+        elif target_type == 'datetime':
+            values, date_failed = parse_datetimes(series, date_format=date_format)
+            return ColumnProfile(values, date_failed=date_failed)
+        else:  # varchar
+            # Limpar strings para garantir UTF-8 válido e truncar em max_len (cada valor distinto uma única vez)
+            values, cleaned, truncated = _clean_strings(series, max_len=max_len)
+            return ColumnProfile(values, truncated=truncated, cleaned=cleaned)
+
+    except Exception as e:
+        return ColumnProfile(series, error=str(e))
+
+
+# Função para converter tipo de dado
+def convert_dtype(series, target_type, max_len=None):
+    """Converte uma série para o tipo de dado especificado com tratamento robusto de erros"""
+    profile = profile_column(series, target_type, max_len=max_len)
+    if profile.error:
+        warnings.warn(f"Aviso ao converter coluna: {profile.error}")
+    return profile.values
+
+
+def merge_profiles(total, profile):
+    """Soma as contagens de dois perfis da mesma coluna (usado na conversão em blocos)"""
+    if total is None:
+        return profile._replace(values=None)
+    return total._replace(
+        clamped=total.clamped + profile.clamped,
+        truncated=total.truncated + profile.truncated,
+        cleaned=total.cleaned + profile.cleaned,
+        date_failed=total.date_failed + profile.date_failed,
+        error=total.error or profile.error,
+    )
@@ -0,0 +1,164 @@
+"""Conversão de datas: formato detectado uma vez por coluna, datas seriais do Excel e cache de textos já lidos"""
+import datetime
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Formatos de data testados, na ordem de preferência (dia/mês/ano antes de mês/dia/ano)
+DATE_FORMATS = [
+    '%d/%m/%Y', '%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S',
+    '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S',
+    '%d-%m-%Y', '%d.%m.%Y', '%m/%d/%Y',
+]
+# Valores distintos usados para detectar o formato de uma coluna
+FORMAT_SAMPLE_SIZE = 500
+# Datas seriais do Excel: dias desde 1899-12-30, até 9999-12-31
+EXCEL_EPOCH = pd.Timestamp('1899-12-30')
+EXCEL_SERIAL_MAX = 2958465
+# Limite do cache de textos já convertidos (esvaziado ao ser atingido)
+DATE_CACHE_MAX_ENTRIES = 200000
+
+_RESOLUTION = 'datetime64[us]'
+
+
+class DateCache:
+    """Cache de texto → data por formato, compartilhado entre blocos e colunas repetitivas"""
+
+    def __init__(self, max_entries=DATE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, date_format, texts):
+        """Datas já conhecidas (NaT onde não há entrada) e a máscara dos textos encontrados"""
+        with self._lock:
+            known = self._entries.get(date_format, {})
+            found = [known.get(text) for text in texts]
+        hit = np.array([value is not None for value in found], dtype=bool)
+        values = np.array([value if value is not None else np.datetime64('NaT') for value in found], dtype=_RESOLUTION)
+        with self._lock:
+            self.hits += int(hit.sum())
+            self.misses += int(len(hit) - hit.sum())
+        return values, hit
+
+    def store(self, date_format, texts, values):
+        with self._lock:
+            if sum(len(entries) for entries in self._entries.values()) + len(texts) > self.max_entries:
+                self._entries.clear()
+            self._entries.setdefault(date_format, {}).update(zip(texts, values))
+
+    def stats(self):
+        """Contadores de uso do cache"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': sum(len(entries) for entries in self._entries.values()),
+            }
+
+
+DATE_CACHE = DateCache()
+
+
+def detect_date_format(texts, sample_size=FORMAT_SAMPLE_SIZE):
+    """Formato (de DATE_FORMATS) que reconhece mais textos de uma amostra; None se nenhum reconhece"""
+    texts = pd.Series(texts, dtype=object)
+    if len(texts) > sample_size:
+        texts = texts.iloc[np.linspace(0, len(texts) - 1, sample_size).astype(int)]
+    best, best_count = None, 0
+    for fmt in DATE_FORMATS:
+        count = int(pd.to_datetime(texts, format=fmt, errors='coerce').notna().sum())
+        if count > best_count:
+            best, best_count = fmt, count
+        if count == len(texts):
+            break
+    return best
+
+
+def excel_serial_to_datetime(numbers):
+    """Datas seriais do Excel (dias, com fração para o horário) → datas; fora do intervalo válido vira NaT"""
+    numbers = np.asarray(numbers, dtype=np.float64)
+    valid = np.isfinite(numbers) & (numbers >= 0) & (numbers <= EXCEL_SERIAL_MAX)
+    micros = np.where(valid, np.round(numbers * 86400 * 1e6), 0).astype(np.int64)
+    values = EXCEL_EPOCH.to_datetime64().astype(_RESOLUTION) + micros.astype('timedelta64[us]')
+    values[~valid] = np.datetime64('NaT')
+    return values
+
+
+def _parse_texts(texts, date_format, cache):
+    """Converte textos distintos: cache, depois o formato explícito, e só as sobras valor a valor"""
+    values, hit = cache.lookup(date_format, texts) if cache is not None else (
+        np.full(len(texts), np.datetime64('NaT'), dtype=_RESOLUTION), np.zeros(len(texts), dtype=bool)
+    )
+    missing = np.flatnonzero(~hit)
+    if len(missing):
+        pending = pd.Series(texts[missing], dtype=object)
+        parsed = pd.to_datetime(pending, format=date_format, errors='coerce') if date_format else pd.Series(
+            pd.NaT, index=pending.index
+        )
+        # Textos fora do formato detectado (ex: uma data ISO numa coluna dd/mm/aaaa): os demais formatos
+        # conhecidos e, por último, a análise valor a valor
+        for fmt in DATE_FORMATS + ['mixed']:
+            rest = parsed.isna().to_numpy()
+            if not rest.any():
+                break
+            if fmt != date_format:
+                parsed[rest] = pd.to_datetime(pending[rest], format=fmt, errors='coerce', dayfirst=True)
+        parsed = parsed.to_numpy(dtype=_RESOLUTION)
+        values[missing] = parsed
+        if cache is not None:
+            cache.store(date_format, texts[missing].tolist(), parsed.tolist())
+    return values
+
+
+def parse_datetimes(series, date_format=None, cache=DATE_CACHE):
+    """Converte uma coluna para datas; retorna (Series datetime64, quantidade de valores não reconhecidos)
+
+    Texto é convertido por valor distinto, com o formato informado ou detectado numa amostra; números
+    são datas seriais do Excel; objetos date/datetime passam direto. Texto vazio conta como ausente.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series, 0
+    result = np.full(len(series), np.datetime64('NaT'), dtype=_RESOLUTION)
+    present = series.notna().to_numpy().copy()
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return pd.Series(result, index=series.index), int(present.sum())
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        result[present] = excel_serial_to_datetime(series.to_numpy()[present])
+        return pd.Series(result, index=series.index), int(present.sum() - pd.notna(result).sum())
+
+    values = series.to_numpy(dtype=object)
+    if isinstance(series.dtype, pd.StringDtype) or pd.api.types.infer_dtype(values, skipna=True) == 'string':
+        is_text = present.copy()
+        is_number = is_date = np.zeros(len(values), dtype=bool)
+    else:
+        kinds = np.array([type(value) for value in values], dtype=object)
+        is_text = present & np.isin(kinds, [str, np.str_])
+        is_number = present & np.isin(kinds, [int, float, np.int64, np.float64])
+        is_date = present & ~is_text & ~is_number
+
+    if is_number.any():
+        result[is_number] = excel_serial_to_datetime(values[is_number].astype(np.float64))
+    if is_date.any():
+        others = pd.Series(values[is_date], dtype=object)
+        dates = others.map(lambda value: isinstance(value, (datetime.date, np.datetime64)))
+        parsed = pd.to_datetime(others.where(dates), errors='coerce')
+        result[is_date] = parsed.to_numpy(dtype=_RESOLUTION)
+    if is_text.any():
+        # Espaços são removidos só dos valores distintos
+        codes, uniques = pd.factorize(values[is_text])
+        uniques = pd.Series(np.asarray(uniques, dtype=object), dtype=object).str.strip()
+        blank = (uniques == '').to_numpy()
+        present[np.flatnonzero(is_text)[blank[codes]]] = False
+        if not blank.all():
+            if date_format is None:
+                date_format = detect_date_format(uniques[~blank])
+            parsed = np.full(len(uniques), np.datetime64('NaT'), dtype=_RESOLUTION)
+            parsed[~blank] = _parse_texts(uniques[~blank].to_numpy(), date_format, cache)
+            result[is_text] = parsed[codes]
+
+    failed = int((present & pd.isna(result)).sum())
+    return pd.Series(result, index=series.index), failed
@@ -0,0 +1,107 @@
+"""Motores de leitura de planilhas (openpyxl, xlrd, calamine): escolha automática, fallback e tempos de leitura"""
+import importlib.util
+import os
+import threading
+import time
+
+# Escolha automática do motor
+AUTO_ENGINE = 'auto'
+# Extensões aceitas e módulo exigido por cada motor, na ordem de preferência como fallback
+ENGINES = {
+    'openpyxl': {'extensions': ('.xlsx', '.xlsm'), 'module': 'openpyxl'},
+    'xlrd': {'extensions': ('.xls',), 'module': 'xlrd'},
+    'calamine': {'extensions': ('.xls', '.xlsx', '.xlsm', '.xlsb', '.ods'), 'module': 'python_calamine'},
+}
+# A partir deste tamanho o calamine (Rust) é preferido; abaixo dele a leitura leva milissegundos com
+# o motor de referência do pandas
+CALAMINE_MIN_BYTES = 64 * 1024
+
+
+def engine_available(engine):
+    """Indica se o pacote do motor está instalado"""
+    return importlib.util.find_spec(ENGINES[engine]['module']) is not None
+
+
+def source_size(source):
+    """Tamanho em bytes do arquivo (conteúdo em memória ou caminho); None se desconhecido"""
+    if isinstance(source, (bytes, bytearray)):
+        return len(source)
+    try:
+        return os.path.getsize(source)
+    except (OSError, TypeError):
+        return None
+
+
+def engine_candidates(filename, size=None, engine=AUTO_ENGINE):
+    """Motores a tentar, em ordem: o escolhido (ou o automático) seguido dos demais que aceitam a extensão
+
+    Na escolha automática, arquivos a partir de CALAMINE_MIN_BYTES vão para o calamine, se instalado.
+    """
+    extension = os.path.splitext(filename.lower())[1]
+    compatible = [name for name, spec in ENGINES.items() if extension in spec['extensions'] and engine_available(name)]
+    if engine != AUTO_ENGINE:
+        if engine not in ENGINES:
+            raise ValueError(f"Motor de leitura desconhecido: {engine}")
+        preferred = [engine]
+    elif size is not None and size >= CALAMINE_MIN_BYTES:
+        preferred = ['calamine']
+    else:
+        preferred = []
+    ordered = [name for name in preferred if name in compatible]
+    ordered += [name for name in compatible if name not in ordered]
+    if not ordered:
+        raise RuntimeError(
+            f"Nenhum motor de leitura instalado aceita arquivos '{extension}': "
+            "execute 'pip install openpyxl xlrd python-calamine'"
+        )
+    return ordered
+
+
+class EngineTimings:
+    """Tempos de leitura acumulados por motor, para comparar os motores nos próprios arquivos"""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, engine, seconds, size=None, failed=False):
+        with self._lock:
+            stats = self._stats.setdefault(
+                engine, {'reads': 0, 'failures': 0, 'seconds': 0.0, 'last_seconds': None, 'bytes': 0}
+            )
+            if failed:
+                stats['failures'] += 1
+                return
+            stats['reads'] += 1
+            stats['seconds'] += seconds
+            stats['last_seconds'] = seconds
+            stats['bytes'] += size or 0
+
+    def stats(self):
+        """{motor: leituras, falhas, segundos (total e da última leitura) e bytes lidos}"""
+        with self._lock:
+            return {engine: dict(stats) for engine, stats in self._stats.items()}
+
+
+ENGINE_TIMINGS = EngineTimings()
+
+
+def run_with_fallback(read, filename, size=None, engine=AUTO_ENGINE, timings=ENGINE_TIMINGS):
+    """Chama read(motor) com cada candidato até um funcionar; retorna (resultado, motor usado)
+
+    Se nenhum motor conseguir ler o arquivo, o erro do último é propagado; timings=None não registra tempos.
+    """
+    error = None
+    for candidate in engine_candidates(filename, size, engine):
+        started = time.perf_counter()
+        try:
+            result = read(candidate)
+        except Exception as e:
+            if timings is not None:
+                timings.record(candidate, time.perf_counter() - started, failed=True)
+            error = e
+            continue
+        if timings is not None:
+            timings.record(candidate, time.perf_counter() - started, size)
+        return result, candidate
+    raise error
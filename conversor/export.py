@@ -0,0 +1,273 @@
+"""Exportação em streaming: bytes no encoding escolhido, compressão opcional e divisão em partes"""
+import codecs
+import gzip
+import zipfile
+
+from .columnar import COLUMNAR_SUFFIX, ColumnarExporter
+from .pgcopy import PgCopyBinaryWriter, PgCopyTextWriter
+from .tracing import trace_span
+
+# Linhas convertidas para texto por vez durante a exportação
+EXPORT_CHUNK_ROWS = 50000
+# Linhas usadas para estimar o tamanho médio de uma linha ao dividir por tamanho
+_PROBE_ROWS = 100
+
+COMPRESSIONS = [None, 'gzip', 'zstd']
+_COMPRESSION_SUFFIX = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+_COMPRESSION_MIME = {'gzip': 'application/gzip', 'zstd': 'application/zstd'}
+
+# Formatos de saída: CSV, os formatos texto e binário do COPY do PostgreSQL e os colunares (Parquet, Arrow IPC)
+EXPORT_FORMATS = ['csv', 'pgcopy', 'pgcopy_binary', 'parquet', 'arrow']
+COLUMNAR_FORMATS = list(COLUMNAR_SUFFIX)
+_FORMAT_SUFFIX = dict({'csv': '.csv', 'pgcopy': '.copy', 'pgcopy_binary': '.pgcopy'}, **COLUMNAR_SUFFIX)
+_FORMAT_MIME = {
+    'csv': 'text/csv',
+    'pgcopy': 'text/plain',
+    'pgcopy_binary': 'application/octet-stream',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.file',
+}
+
+
+def export_file_name(base_name, compression=None, split=False, export_format='csv'):
+    """Nome do arquivo final da exportação (ZIP quando dividido em partes)"""
+    if split:
+        return f"{base_name}.zip"
+    return f"{base_name}{_FORMAT_SUFFIX[export_format]}{_COMPRESSION_SUFFIX[compression]}"
+
+
+def export_mime(compression=None, split=False, export_format='csv'):
+    """Tipo MIME do arquivo final da exportação"""
+    if split:
+        return 'application/zip'
+    return _COMPRESSION_MIME[compression] if compression else _FORMAT_MIME[export_format]
+
+
+def iter_frame_chunks(frame, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Fatia um DataFrame em blocos de linhas (views, sem cópia); um frame vazio gera um bloco vazio"""
+    if len(frame) == 0:
+        yield frame
+        return
+    for start in range(0, len(frame), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+
+class _Uncloseable:
+    """Repassa escritas para o arquivo de destino sem fechá-lo ao final"""
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def write(self, data):
+        return self._raw.write(data)
+
+    def close(self):
+        pass
+
+
+def _open_compressed(raw, compression):
+    """Envolve o arquivo binário num compressor em streaming"""
+    if compression is None:
+        return _Uncloseable(raw)
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='wb', mtime=0)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstandard não está instalado: escolha gzip ou execute 'pip install zstandard'")
+        return zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+    raise ValueError(f"Compressão desconhecida: {compression}")
+
+
+class CsvExporter:
+    """Grava blocos de DataFrame como CSV codificado direto em bytes, com compressão e divisão opcionais
+
+    Sem divisão, o CSV (comprimido ou não) é gravado diretamente em out. Com split_rows ou
+    split_bytes, out recebe um ZIP e cada parte é um CSV completo, com cabeçalho, gravado em
+    streaming dentro dele. split_bytes considera o tamanho do CSV antes da compressão.
+    """
+
+    def __init__(self, out, encoding='utf-8-sig', sep=',', errors='strict', compression=None,
+                 split_rows=None, split_bytes=None, base_name='dados'):
+        self.out = out
+        self.encoding = encoding
+        self.sep = sep
+        self.errors = errors
+        self.compression = compression
+        self.split_rows = split_rows or None
+        self.split_bytes = split_bytes or None
+        self.base_name = base_name
+        self.rows = 0
+        self.bytes = 0
+        self.parts = []
+        self._archive = None
+        self._part_file = None
+        self._stream = None
+        self._encoder = None
+        self._header = True
+        self._part_rows = 0
+        self._part_bytes = 0
+        self._avg_row_bytes = None
+        if self.split_rows or self.split_bytes:
+            # Partes já comprimidas não ganham nada com a compressão do ZIP
+            self._archive = zipfile.ZipFile(
+                out, 'w', compression=zipfile.ZIP_STORED if compression else zipfile.ZIP_DEFLATED
+            )
+
+    @property
+    def split(self):
+        return self._archive is not None
+
+    def _open_part(self):
+        """Inicia uma nova parte (ou o arquivo único), com encoder e cabeçalho próprios"""
+        if self._archive is not None:
+            name = f"{self.base_name}_parte{len(self.parts) + 1:04d}.csv{_COMPRESSION_SUFFIX[self.compression]}"
+            self._part_file = self._archive.open(name, 'w', force_zip64=True)
+            target = self._part_file
+        else:
+            name = export_file_name(self.base_name, self.compression)
+            target = self.out
+        self.parts.append(name)
+        self._stream = _open_compressed(target, self.compression)
+        self._encoder = codecs.getincrementalencoder(self.encoding)(self.errors)
+        self._header = True
+        self._part_rows = 0
+        self._part_bytes = 0
+
+    def _close_part(self):
+        if self._stream is None:
+            return
+        tail = self._encoder.encode('', final=True)
+        if tail:
+            self._stream.write(tail)
+        self._stream.close()
+        if self._part_file is not None:
+            self._part_file.close()
+        self._stream = None
+        self._part_file = None
+
+    def _emit(self, frame):
+        """Converte um bloco para CSV e grava os bytes na parte atual"""
+        if self._stream is None:
+            self._open_part()
+        data = self._encoder.encode(frame.to_csv(index=False, header=self._header, sep=self.sep))
+        self._stream.write(data)
+        self._header = False
+        self._part_rows += len(frame)
+        self._part_bytes += len(data)
+        self.rows += len(frame)
+        self.bytes += len(data)
+        if self.rows:
+            self._avg_row_bytes = self.bytes / self.rows
+
+    def _next_slice_rows(self, remaining):
+        """Quantas linhas cabem na parte atual; abre uma parte nova quando a atual está cheia"""
+        if self.split_rows:
+            if self._part_rows >= self.split_rows:
+                self._close_part()
+                self._open_part()
+            return min(remaining, self.split_rows - self._part_rows)
+        if self._avg_row_bytes is None:
+            return min(remaining, _PROBE_ROWS)
+        room = self.split_bytes - self._part_bytes
+        if room < self._avg_row_bytes and self._part_rows > 0:
+            self._close_part()
+            self._open_part()
+            room = self.split_bytes
+        return min(remaining, max(1, int(room // self._avg_row_bytes)))
+
+    def write(self, frame):
+        """Acrescenta um bloco de linhas ao CSV"""
+        if not self.split:
+            self._emit(frame)
+            return
+        if self._stream is None:
+            self._open_part()
+        if len(frame) == 0:
+            if self._part_rows == 0:
+                self._emit(frame)
+            return
+        pos = 0
+        while pos < len(frame):
+            rows = self._next_slice_rows(len(frame) - pos)
+            self._emit(frame.iloc[pos:pos + rows])
+            pos += rows
+
+    def close(self):
+        """Finaliza a última parte (e o ZIP); retorna estatísticas da exportação"""
+        self._close_part()
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+        return {'rows': self.rows, 'bytes': self.bytes, 'parts': list(self.parts)}
+
+
+class PgCopyExporter:
+    """Grava blocos de DataFrame no formato do COPY do PostgreSQL (texto ou binário), com compressão opcional
+
+    O formato texto usa o encoding escolhido sem BOM (utf-8-sig vira utf-8), já que o COPY não o ignora.
+    """
+
+    def __init__(self, out, column_types, binary=False, encoding='utf-8', errors='strict', compression=None,
+                 base_name='dados'):
+        self._stream = _open_compressed(out, compression)
+        if binary:
+            self._writer = PgCopyBinaryWriter(self._stream, column_types)
+        else:
+            encoding = 'utf-8' if codecs.lookup(encoding).name == 'utf-8-sig' else encoding
+            self._writer = PgCopyTextWriter(self._stream, column_types, encoding=encoding, errors=errors)
+        export_format = 'pgcopy_binary' if binary else 'pgcopy'
+        self.parts = [export_file_name(base_name, compression, export_format=export_format)]
+
+    def write(self, frame):
+        """Acrescenta um bloco de linhas"""
+        self._writer.write(frame)
+
+    def close(self):
+        """Finaliza o arquivo (trailer do formato binário e compressão); retorna estatísticas da exportação"""
+        stats = self._writer.close()
+        self._stream.close()
+        return dict(stats, parts=list(self.parts))
+
+
+def open_exporter(out, export_format='csv', column_types=None, column_lengths=None, sep=',', split_rows=None,
+                  split_bytes=None, codec='default', dictionary=True, **options):
+    """Cria o exportador do formato escolhido
+
+    Os formatos do COPY e os colunares exigem column_types e não são divididos em partes; os colunares
+    usam o codec interno do formato (codec, dictionary) em vez da compressão do arquivo inteiro.
+    """
+    if export_format == 'csv':
+        return CsvExporter(out, sep=sep, split_rows=split_rows, split_bytes=split_bytes, **options)
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportação desconhecido: {export_format}")
+    if split_rows or split_bytes:
+        raise ValueError("A divisão em partes só está disponível para CSV")
+    if export_format in COLUMNAR_FORMATS:
+        if options.get('compression'):
+            raise ValueError(f"O formato {export_format} usa compressão interna: escolha o codec em vez da compressão")
+        return ColumnarExporter(
+            out, column_types, column_lengths, export_format=export_format, codec=codec,
+            dictionary=dictionary, base_name=options.get('base_name', 'dados')
+        )
+    return PgCopyExporter(out, column_types, binary=export_format == 'pgcopy_binary', **options)
+
+
+def export_frame(frame, out, chunk_rows=EXPORT_CHUNK_ROWS, progress=None, **options):
+    """Exporta um DataFrame inteiro em blocos para out; as opções são as de open_exporter
+
+    progress, se informado, é chamado como progress('write', linhas gravadas, total de linhas) a cada bloco.
+    """
+    exporter = open_exporter(out, **options)
+    try:
+        written = 0
+        for chunk in iter_frame_chunks(frame, chunk_rows):
+            if progress:
+                progress('write', written, len(frame))
+            with trace_span('export', format=options.get('export_format', 'csv'), rows=len(chunk)):
+                exporter.write(chunk)
+            written += len(chunk)
+    finally:
+        stats = exporter.close()
+    return stats
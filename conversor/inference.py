@@ -0,0 +1,191 @@
+"""Inferência de tipo e tamanho das colunas a partir de uma amostra limitada (ou de uma passada completa)"""
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from .core import BIGINT_MAX, BIGINT_MIN, FALSE_TOKENS, INT_MAX, TRUE_TOKENS, _as_text
+from .dates import DATE_FORMATS
+from .engines import AUTO_ENGINE
+from .tracing import trace_span
+from .reader import STREAM_CHUNK_ROWS, iter_excel_chunks
+
+# Linhas sorteadas do miolo da coluna e linhas lidas de cada ponta (início e fim)
+INFERENCE_SAMPLE_ROWS = 1000
+INFERENCE_EDGE_ROWS = 100
+# Numa amostra, inteiros acima deste módulo já sugerem BIGINT (valores maiores podem ter ficado de fora)
+SAMPLED_BIGINT_THRESHOLD = 2 ** 30
+# Folga aplicada ao maior tamanho de texto visto numa amostra
+SAMPLED_LENGTH_MARGIN = 1.25
+# Tamanhos de varchar sugeridos (o maior observado é arredondado para cima)
+VARCHAR_LENGTH_STEPS = [10, 20, 30, 50, 100, 150, 200, 255, 500, 1000, 2000, 4000, 8000]
+
+# Textos tratados como valor ausente e como booleanos
+NULL_TOKENS = {'', 'na', 'n/a', 'nan', 'null', 'none', '-'}
+BOOL_TOKENS = TRUE_TOKENS | FALSE_TOKENS
+_DATE_LIKE = r'^\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}'
+
+
+class TypeProposal(NamedTuple):
+    """Tipo sugerido para uma coluna
+
+    confidence é a fração dos valores observados compatíveis com o tipo, descontada pela incerteza
+    de amostras pequenas (n / (n + 3), a "regra de três"); exact indica que todas as linhas foram lidas.
+    """
+    type: str
+    max_len: Optional[int] = None
+    datetime_format: Optional[str] = None
+    confidence: float = 0.0
+    observed: int = 0
+    exact: bool = False
+
+
+def suggest_length(observed_max, exact=False):
+    """Tamanho de varchar para o maior texto observado, com folga quando veio de uma amostra"""
+    target = observed_max if exact else int(np.ceil(observed_max * SAMPLED_LENGTH_MARGIN))
+    for step in VARCHAR_LENGTH_STEPS:
+        if target <= step:
+            return step
+    return int(np.ceil(target / 1000) * 1000)
+
+
+def sample_column(series, sample_rows=INFERENCE_SAMPLE_ROWS, edge_rows=INFERENCE_EDGE_ROWS, seed=0):
+    """Início, fim e um sorteio do miolo da coluna; o custo não depende do número de linhas"""
+    n = len(series)
+    if n <= sample_rows + 2 * edge_rows:
+        return series
+    rng = np.random.default_rng(seed)
+    middle = np.unique(rng.integers(edge_rows, n - edge_rows, size=sample_rows))
+    positions = np.concatenate((np.arange(edge_rows), middle, np.arange(n - edge_rows, n)))
+    return series.iloc[positions]
+
+
+class ColumnStats:
+    """Contagens acumuladas de uma coluna, bloco a bloco, para propor o tipo ao final"""
+
+    def __init__(self):
+        self.values = 0
+        self.bools = 0
+        self.numbers = 0
+        self.integers = 0
+        self.datetimes = 0
+        self.date_formats = dict.fromkeys(DATE_FORMATS, 0)
+        self.int_min = None
+        self.int_max = None
+        self.max_len = 0
+
+    def _observe_integers(self, numbers):
+        """Registra os números inteiros (sem parte fracionária) e sua faixa"""
+        numbers = numbers[np.isfinite(numbers)]
+        whole = numbers[numbers == np.floor(numbers)]
+        self.integers += len(whole)
+        if len(whole):
+            low, high = int(whole.min()), int(whole.max())
+            self.int_min = low if self.int_min is None else min(self.int_min, low)
+            self.int_max = high if self.int_max is None else max(self.int_max, high)
+
+    def observe(self, series):
+        """Acumula as contagens de um bloco (ou de uma amostra) da coluna"""
+        series = series[series.notna()]
+        if pd.api.types.is_bool_dtype(series.dtype):
+            self.values += len(series)
+            self.bools += len(series)
+            self.max_len = max(self.max_len, 5 if len(series) else 0)
+            return
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            self.values += len(series)
+            self.datetimes += len(series)
+            return
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            self.values += len(series)
+            self.numbers += len(series)
+            self._observe_integers(series.to_numpy(dtype=np.float64))
+            if len(series):
+                self.max_len = max(self.max_len, int(series.astype(str).str.len().max()))
+            return
+
+        text = pd.Series(_as_text(series), index=series.index, dtype=object).str.strip()
+        text = text[~text.str.lower().isin(NULL_TOKENS)]
+        if len(text) == 0:
+            return
+        self.values += len(text)
+        self.max_len = max(self.max_len, int(text.str.len().max()))
+        self.bools += int(text.str.lower().isin(BOOL_TOKENS).sum())
+
+        numeric = pd.to_numeric(text, errors='coerce')
+        numeric = numeric[numeric.notna()]
+        self.numbers += len(numeric)
+        self._observe_integers(numeric.to_numpy(dtype=np.float64))
+
+        # Valores datetime de colunas mistas viram 'AAAA-MM-DD HH:MM:SS' no texto
+        dates = text[text.str.match(_DATE_LIKE)]
+        if len(dates):
+            for fmt in DATE_FORMATS:
+                self.date_formats[fmt] += int(pd.to_datetime(dates, format=fmt, errors='coerce').notna().sum())
+
+    def _confidence(self, matched, exact):
+        if self.values == 0:
+            return 0.0
+        ratio = matched / self.values
+        return ratio if exact else ratio * self.values / (self.values + 3)
+
+    def propose(self, exact=False):
+        """Tipo mais específico compatível com todos os valores observados; varchar caso contrário"""
+        n = self.values
+        if n == 0:
+            return TypeProposal('varchar', max_len=255, confidence=0.0, observed=0, exact=exact)
+        best_format = max(DATE_FORMATS, key=lambda fmt: self.date_formats[fmt])
+        if self.bools == n:
+            return TypeProposal('bool', confidence=self._confidence(n, exact), observed=n, exact=exact)
+        if self.integers == n:
+            limit = INT_MAX if exact else SAMPLED_BIGINT_THRESHOLD
+            if -limit - 1 <= self.int_min and self.int_max <= limit:
+                return TypeProposal('int', confidence=self._confidence(n, exact), observed=n, exact=exact)
+            if BIGINT_MIN <= self.int_min and self.int_max <= BIGINT_MAX:
+                return TypeProposal('bigint', confidence=self._confidence(n, exact), observed=n, exact=exact)
+            # Inteiros além do BIGINT (códigos longos) ficam como texto para não perder dígitos
+        elif self.numbers == n:
+            return TypeProposal('float', confidence=self._confidence(n, exact), observed=n, exact=exact)
+        if self.datetimes == n:
+            return TypeProposal('datetime', confidence=self._confidence(n, exact), observed=n, exact=exact)
+        if self.date_formats[best_format] == n:
+            return TypeProposal(
+                'datetime', datetime_format=best_format, confidence=self._confidence(n, exact), observed=n, exact=exact
+            )
+        # Texto: a confiança cai quando a maior parte dos valores caberia num tipo mais específico
+        numbers = 0 if self.integers == n else self.numbers
+        typed = max(self.bools, numbers, self.datetimes, self.date_formats[best_format])
+        return TypeProposal(
+            'varchar', max_len=suggest_length(max(self.max_len, 1), exact),
+            confidence=self._confidence(n - typed, exact), observed=n, exact=exact,
+        )
+
+
+def infer_column(series, exact=None):
+    """Propõe o tipo de uma coluna em memória a partir de uma amostra (início, fim e sorteio do miolo)"""
+    with trace_span('infer', column=str(series.name)) as span:
+        sample = sample_column(series)
+        stats = ColumnStats()
+        stats.observe(sample)
+        if exact is None:
+            exact = len(sample) == len(series)
+        span.set(rows=len(sample))
+        return stats.propose(exact=exact)
+
+
+def infer_frame(frame, exact=None):
+    """Propõe o tipo de cada coluna de um DataFrame; exact=False quando o frame é só parte da planilha"""
+    return {col: infer_column(frame[col], exact=exact) for col in frame.columns}
+
+
+def infer_file(source, filename, sheet_name=0, chunk_rows=STREAM_CHUNK_ROWS, engine=AUTO_ENGINE):
+    """Passada completa sobre a planilha, em blocos: propostas exatas para todas as colunas"""
+    stats = {}
+    rows = 0
+    with trace_span('infer_file', file=filename) as span:
+        for chunk in iter_excel_chunks(source, filename, chunk_rows=chunk_rows, sheet_name=sheet_name, engine=engine):
+            for col in chunk.columns:
+                stats.setdefault(col, ColumnStats()).observe(chunk[col])
+            rows += len(chunk)
+        span.set(rows=rows)
+    return {col: column_stats.propose(exact=True) for col, column_stats in stats.items()}
@@ -0,0 +1,228 @@
+"""Conversões em segundo plano: pool limitado, progresso por etapa, cancelamento e arquivos gerados com validade"""
+import contextvars
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Etapas reportadas pelas conversões, na ordem em que acontecem
+JOB_STAGES = ('read', 'convert', 'validate', 'write')
+# Conversões simultâneas no servidor (as demais esperam na fila)
+JOB_WORKERS = os.cpu_count() or 1
+# Validade dos arquivos gerados e, depois do primeiro download, o tempo extra para baixar de novo
+ARTIFACT_TTL_SECONDS = 60 * 60
+DOWNLOADED_TTL_SECONDS = 5 * 60
+# Jobs terminados continuam consultáveis por este tempo
+FINISHED_JOB_TTL_SECONDS = 60 * 60
+
+
+class JobCancelled(Exception):
+    """Interrompe uma conversão cujo cancelamento foi pedido"""
+
+
+class JobProgress:
+    """Progresso de um job, atualizado pela conversão: progress(etapa, feito, total)
+
+    Cada chamada também verifica o cancelamento: a conversão é interrompida (JobCancelled) no próximo
+    relato de progresso depois de cancel().
+    """
+
+    def __init__(self, total=None):
+        self.total = total
+        self.stage = None
+        self.done = 0
+        self._cancelled = threading.Event()
+
+    def __call__(self, stage, done=None, total=None):
+        if self._cancelled.is_set():
+            raise JobCancelled()
+        self.stage = stage
+        if total is not None:
+            self.total = total
+        if done is not None:
+            self.done = done
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def fraction(self):
+        """Fração concluída (0 a 1); None quando o total não é conhecido"""
+        if not self.total:
+            return None
+        return min(self.done / self.total, 1.0)
+
+
+class Job:
+    """Conversão submetida ao JobManager"""
+
+    def __init__(self, job_id, label, progress):
+        self.id = job_id
+        self.label = label
+        self.progress = progress
+        self.future = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def status(self):
+        """'queued', 'running', 'done', 'error' ou 'cancelled'"""
+        if self.future.cancelled():
+            return 'cancelled'
+        if not self.future.done():
+            return 'running' if self.started else 'queued'
+        error = self.future.exception()
+        if isinstance(error, JobCancelled):
+            return 'cancelled'
+        return 'error' if error else 'done'
+
+    @property
+    def result(self):
+        return self.future.result()
+
+    @property
+    def error(self):
+        error = None if self.future.cancelled() or not self.future.done() else self.future.exception()
+        return None if isinstance(error, JobCancelled) else error
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def cancel(self):
+        """Pede o cancelamento: jobs na fila nem começam; os em execução param no próximo relato de progresso"""
+        self.progress.cancel()
+        if self.future.cancel():
+            # Cancelado ainda na fila: a função do job nunca roda para registrar o fim
+            self.finished = time.time()
+
+
+class ArtifactStore:
+    """Diretório temporário com os arquivos gerados pelos jobs, apagados ao vencer a validade"""
+
+    def __init__(self, directory=None, ttl=ARTIFACT_TTL_SECONDS):
+        self.directory = directory or tempfile.mkdtemp(prefix='conversor_')
+        self.ttl = ttl
+        self._expires = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def create(self, suffix=''):
+        """Caminho de um novo arquivo no diretório, válido por ttl segundos"""
+        self.purge_expired()
+        handle, path = tempfile.mkstemp(suffix=suffix, dir=self.directory)
+        os.close(handle)
+        with self._lock:
+            self._expires[path] = time.time() + self.ttl
+        return path
+
+    def exists(self, path):
+        with self._lock:
+            return path in self._expires and os.path.exists(path)
+
+    def extend(self, path, seconds):
+        """Redefine a validade do arquivo para daqui a seconds segundos (ex: depois do download)"""
+        with self._lock:
+            if path in self._expires:
+                self._expires[path] = time.time() + seconds
+
+    def discard(self, path):
+        with self._lock:
+            self._expires.pop(path, None)
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def purge_expired(self):
+        """Apaga os arquivos vencidos; retorna quantos foram apagados"""
+        now = time.time()
+        with self._lock:
+            expired = [path for path, expires in self._expires.items() if expires <= now]
+            for path in expired:
+                del self._expires[path]
+        for path in expired:
+            if os.path.exists(path):
+                os.remove(path)
+        return len(expired)
+
+    def stats(self):
+        """Arquivos guardados e espaço ocupado"""
+        with self._lock:
+            paths = [path for path in self._expires if os.path.exists(path)]
+        return {'artifacts': len(paths), 'bytes': sum(os.path.getsize(path) for path in paths)}
+
+    def clear(self):
+        with self._lock:
+            self._expires.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class JobManager:
+    """Pool limitado de threads para as conversões, compartilhado por todas as sessões
+
+    A função do job recebe um JobProgress no argumento progress e deve chamá-lo a cada bloco processado.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, store=None):
+        self.max_workers = max_workers
+        self.store = store or ArtifactStore()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='conversor-job')
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, label='', total=None, **kwargs):
+        """Enfileira fn(*args, progress=..., **kwargs); retorna o Job"""
+        self._prune()
+        job = Job(next(self._ids), label, JobProgress(total))
+
+        def run():
+            job.started = time.time()
+            try:
+                return fn(*args, progress=job.progress, **kwargs)
+            finally:
+                job.finished = time.time()
+
+        # O job herda o contexto de quem o submeteu (ex: o Tracer ativo da sessão)
+        context = contextvars.copy_context()
+        with self._lock:
+            self._jobs[job.id] = job
+            job.future = self._executor.submit(context.run, run)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        """Esquece jobs terminados há mais de FINISHED_JOB_TTL_SECONDS e apaga artefatos vencidos"""
+        limit = time.time() - FINISHED_JOB_TTL_SECONDS
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < limit]:
+                del self._jobs[job_id]
+        self.store.purge_expired()
+
+    def stats(self):
+        """Jobs por situação (na fila, em execução, terminados...)"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = dict.fromkeys(('queued', 'running', 'done', 'error', 'cancelled'), 0)
+        for job in jobs:
+            counts[job.status] += 1
+        return counts
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel()
+        self._executor.shutdown(wait=wait)
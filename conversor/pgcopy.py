@@ -0,0 +1,195 @@
+"""Escrita nos formatos nativos do COPY do PostgreSQL (texto e binário) e geração do DDL"""
+import re
+import struct
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+# Tipos do PostgreSQL correspondentes aos tipos configurados nas colunas
+PG_TYPES = {
+    'int': 'integer',
+    'bigint': 'bigint',
+    'float': 'double precision',
+    'bool': 'boolean',
+    'datetime': 'timestamp',
+    'varchar': 'varchar',
+}
+
+# Assinatura, flags e tamanho da extensão do cabeçalho do formato binário
+PGCOPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+PGCOPY_TRAILER = struct.pack('>h', -1)
+_NULL_FIELD = struct.pack('>i', -1)
+# Timestamps binários contam microssegundos a partir de 2000-01-01
+_PG_EPOCH_US = 946684800 * 1000000
+
+# Formato de cada tipo de tamanho fixo no COPY binário
+_BINARY_FIXED = {
+    'int': '>i4',
+    'bigint': '>i8',
+    'float': '>f8',
+    'bool': 'u1',
+    'datetime': '>i8',
+}
+
+
+def default_table_name(name):
+    """Nome de tabela seguro derivado do nome do arquivo (minúsculas, letras, dígitos e _)"""
+    table = re.sub(r'\W+', '_', str(name).lower()).strip('_') or 'dados'
+    return f"t_{table}" if table[0].isdigit() else table
+
+
+def quote_ident(name):
+    """Identificador PostgreSQL entre aspas duplas"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def pg_type(col_type, max_len=None):
+    """Tipo PostgreSQL da coluna (varchar com o tamanho configurado)"""
+    if col_type == 'varchar' and max_len:
+        return f"varchar({int(max_len)})"
+    return PG_TYPES.get(col_type, 'text')
+
+
+def create_table_ddl(table_name, columns, column_types, column_lengths):
+    """CREATE TABLE com os tipos e tamanhos configurados para as colunas"""
+    lines = [
+        f"    {quote_ident(col)} {pg_type(column_types[col], column_lengths.get(col, 255))}"
+        for col in columns
+    ]
+    return f"CREATE TABLE {quote_ident(table_name)} (\n" + ",\n".join(lines) + "\n);\n"
+
+
+def copy_statement(table_name, columns, binary=False):
+    """Comando COPY ... FROM STDIN correspondente ao arquivo gerado"""
+    column_list = ', '.join(quote_ident(col) for col in columns)
+    options = " WITH (FORMAT binary)" if binary else ""
+    return f"COPY {quote_ident(table_name)} ({column_list}) FROM STDIN{options};\n"
+
+
+def _missing(series, col_type):
+    """Máscara de valores gravados como NULL
+
+    Texto vazio vira NULL, como acontece com o campo vazio no COPY ... CSV do arquivo CSV.
+    """
+    if col_type in ('int', 'bigint', 'bool'):
+        return np.zeros(len(series), dtype=bool)
+    missing = series.isna().to_numpy()
+    if col_type == 'varchar':
+        missing = missing | (series.astype(object) == '').to_numpy()
+    return missing
+
+
+def _text_values(series, col_type):
+    """Representação textual (formato texto do COPY) de uma coluna já convertida"""
+    if col_type in ('int', 'bigint'):
+        return series.astype('int64').astype(str).astype(object)
+    if col_type == 'bool':
+        return pd.Series(np.where(series.to_numpy(dtype=bool), 't', 'f'), index=series.index, dtype=object)
+    if col_type == 'float':
+        values = pd.to_numeric(series, errors='coerce').astype('float64')
+        text = values.astype(str).astype(object)
+        text[np.isposinf(values.to_numpy())] = 'Infinity'
+        text[np.isneginf(values.to_numpy())] = '-Infinity'
+        return text
+    if col_type == 'datetime':
+        stamps = pd.to_datetime(series, errors='coerce').to_numpy(dtype='datetime64[us]')
+        # ISO 8601 (com 'T'), aceito pela entrada de timestamp do PostgreSQL
+        return pd.Series(np.datetime_as_string(stamps, unit='us'), index=series.index, dtype=object)
+    text = series.astype(object).where(series.notna(), '').astype(str)
+    # Escapes do formato texto: barra invertida primeiro, depois os delimitadores
+    for char, escaped in (('\\', '\\\\'), ('\t', '\\t'), ('\n', '\\n'), ('\r', '\\r')):
+        text = text.str.replace(char, escaped, regex=False)
+    return text.astype(object)
+
+
+def _binary_fields(series, col_type):
+    """Campos binários (comprimento + dados) de uma coluna, um bytes por linha"""
+    n = len(series)
+    missing = _missing(series, col_type)
+    if col_type in _BINARY_FIXED:
+        fmt = _BINARY_FIXED[col_type]
+        if col_type == 'datetime':
+            stamps = pd.to_datetime(series, errors='coerce')
+            values = stamps.to_numpy(dtype='datetime64[us]').astype(np.int64) - _PG_EPOCH_US
+        elif col_type == 'float':
+            values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            values = series.to_numpy()
+        width = np.dtype(fmt).itemsize
+        packed = np.empty(n, dtype=[('len', '>i4'), ('val', fmt)])
+        packed['len'] = width
+        packed['val'] = np.where(missing, 0, values)
+        buffer = packed.tobytes()
+        size = 4 + width
+        fields = [buffer[i * size:(i + 1) * size] for i in range(n)]
+    else:
+        encoded = [value.encode('utf-8') for value in series.astype(object).where(series.notna(), '').astype(str)]
+        lengths = np.fromiter((len(value) for value in encoded), dtype='>i4', count=n).tobytes()
+        fields = [lengths[i * 4:(i + 1) * 4] + encoded[i] for i in range(n)]
+    for pos in np.flatnonzero(missing):
+        fields[pos] = _NULL_FIELD
+    return fields
+
+
+class PgCopyTextWriter:
+    """Grava blocos de DataFrame no formato texto do COPY (tabulação, \\N para NULL)"""
+
+    def __init__(self, out, column_types, encoding='utf-8', errors='strict'):
+        self.out = out
+        self.column_types = column_types
+        self.encoding = encoding
+        self.errors = errors
+        self.rows = 0
+        self.bytes = 0
+
+    def write(self, frame):
+        if len(frame) == 0:
+            return
+        columns = []
+        for col in frame.columns:
+            col_type = self.column_types[col]
+            text = _text_values(frame[col], col_type)
+            text[_missing(frame[col], col_type)] = '\\N'
+            columns.append(text)
+        lines = columns[0].str.cat(columns[1:], sep='\t') if len(columns) > 1 else columns[0]
+        data = ('\n'.join(lines.tolist()) + '\n').encode(self.encoding, self.errors)
+        self.out.write(data)
+        self.rows += len(frame)
+        self.bytes += len(data)
+
+    def close(self):
+        return {'rows': self.rows, 'bytes': self.bytes}
+
+
+class PgCopyBinaryWriter:
+    """Grava blocos de DataFrame no formato binário do COPY (PGCOPY)"""
+
+    def __init__(self, out, column_types):
+        self.out = out
+        self.column_types = column_types
+        self.rows = 0
+        self.bytes = 0
+        self._started = False
+
+    def _emit(self, data):
+        self.out.write(data)
+        self.bytes += len(data)
+
+    def write(self, frame):
+        if not self._started:
+            self._emit(PGCOPY_HEADER)
+            self._started = True
+        if len(frame) == 0:
+            return
+        fields = [_binary_fields(frame[col], self.column_types[col]) for col in frame.columns]
+        field_count = struct.pack('>h', len(fields))
+        self._emit(b''.join(map(b''.join, zip(repeat(field_count, len(frame)), *fields))))
+        self.rows += len(frame)
+
+    def close(self):
+        if not self._started:
+            self._emit(PGCOPY_HEADER)
+            self._started = True
+        self._emit(PGCOPY_TRAILER)
+        return {'rows': self.rows, 'bytes': self.bytes}
@@ -0,0 +1,453 @@
+"""Conversão completa de um workbook para CSV a partir de uma especificação de colunas"""
+import io
+import json
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import as_completed
+from typing import Dict, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .core import ColumnProfile, _as_text, merge_profiles, profile_column
+from .engines import AUTO_ENGINE
+from .export import export_file_name, export_frame, open_exporter
+from .inference import infer_frame
+from .pgcopy import copy_statement, create_table_ddl, default_table_name
+from .reader import PREVIEW_SAMPLE_ROWS, STREAM_CHUNK_ROWS, iter_excel_chunks, read_excel
+from .tracing import trace_span
+
+# Modos de filtragem de linhas (os mesmos rótulos exibidos na interface)
+ROW_FILTER_MODES = ['Manter todas', 'Manter as N primeiras', 'Remover todas']
+# Tamanhos de página oferecidos nas prévias paginadas
+PREVIEW_PAGE_SIZES = (50, 100, 500, 1000)
+
+
+class ConversionResult(NamedTuple):
+    """Contagens de validação por coluna, número de linhas gravadas e arquivos (partes) gerados"""
+    profiles: Dict[str, ColumnProfile]
+    rows: int
+    parts: tuple = ()
+
+
+def row_limit_for(mode, n):
+    """Número máximo de linhas de dados para o modo de filtragem (None = todas)"""
+    if mode == 'Manter as N primeiras':
+        return int(n)
+    elif mode == 'Remover todas':
+        return 0
+    return None
+
+
+def _column_options(col, column_types, column_lengths, column_formats=None):
+    """Tipo, tamanho máximo (varchar) e formato de data (datetime) configurados para a coluna"""
+    target_type = column_types[col]
+    max_len = column_lengths.get(col, 255) if target_type == 'varchar' else None
+    date_format = (column_formats or {}).get(col) if target_type == 'datetime' else None
+    return target_type, max_len, date_format
+
+
+def stream_convert_to_csv(source, filename, out, selected_columns, column_types, column_lengths,
+                          row_limit=None, encoding='utf-8-sig', sep=',', chunk_rows=STREAM_CHUNK_ROWS, sheet_name=0,
+                          column_formats=None, engine=AUTO_ENGINE, progress=None, **export_options):
+    """Converte o workbook para CSV bloco a bloco, gravando bytes incrementalmente em out
+
+    export_options são repassadas a open_exporter (export_format, compression, codec, split_rows, split_bytes, base_name).
+    progress, se informado, é chamado como progress(etapa, linhas gravadas) a cada etapa de cada bloco.
+    Os valores vêm de iter_excel_chunks, que não reproduz as conversões de coluna inteira do pd.read_excel
+    (textos numéricos como '001', booleanos entre números); veja a documentação dela.
+    """
+    totals = {col: None for col in selected_columns}
+    report = progress or (lambda stage, done=None, total=None: None)
+    exporter = open_exporter(
+        out, column_types=column_types, column_lengths=column_lengths, encoding=encoding, sep=sep, **export_options
+    )
+    written = 0
+    try:
+        report('read', written)
+        chunks = iter_excel_chunks(
+            source, filename, chunk_rows=chunk_rows, nrows=row_limit, usecols=selected_columns, sheet_name=sheet_name,
+            engine=engine,
+        )
+        while True:
+            with trace_span('read_chunk', file=filename) as span:
+                chunk = next(chunks, None)
+                span.set(rows=0 if chunk is None else len(chunk))
+            if chunk is None:
+                break
+            report('convert', written)
+            profiles = {}
+            for col in selected_columns:
+                target_type, max_len, date_format = _column_options(col, column_types, column_lengths, column_formats)
+                profiles[col] = profile_column(chunk[col], target_type, max_len=max_len, date_format=date_format)
+                chunk[col] = profiles[col].values
+            report('validate', written)
+            with trace_span('validate', check='merge_profiles', rows=len(chunk)):
+                for col, profile in profiles.items():
+                    totals[col] = merge_profiles(totals[col], profile)
+            report('write', written)
+            with trace_span('export', format=export_options.get('export_format', 'csv'), rows=len(chunk)):
+                exporter.write(chunk)
+            written += len(chunk)
+            report('read', written)
+    finally:
+        stats = exporter.close()
+    return ConversionResult(totals, stats['rows'], tuple(stats['parts']))
+
+
+def profile_columns(frame, selected_columns, column_types, column_lengths, column_cache=None, cache_key=None,
+                    column_formats=None):
+    """Converte cada coluna selecionada; retorna {coluna: ColumnProfile}
+
+    Com column_cache, cada coluna é memorizada pela chave cache_key + (coluna, tipo, tamanho, formato de data):
+    cache_key deve identificar as linhas de origem (ex: hash do arquivo, planilha, motor de leitura,
+    armazenamento e número de linhas).
+    """
+    profiles = {}
+    for col in selected_columns:
+        target_type, max_len, date_format = _column_options(col, column_types, column_lengths, column_formats)
+        if column_cache is None:
+            profiles[col] = profile_column(frame[col], target_type, max_len=max_len, date_format=date_format)
+        else:
+            profiles[col] = column_cache.get_or_compute(
+                tuple(cache_key) + (col, target_type, max_len, date_format),
+                lambda: profile_column(frame[col], target_type, max_len=max_len, date_format=date_format),
+            )
+    return profiles
+
+
+def assemble_output(profiles, index):
+    """Monta o DataFrame de saída com os valores convertidos, sem copiar as colunas"""
+    with trace_span('assemble', rows=len(index)):
+        return pd.DataFrame({col: profile.values for col, profile in profiles.items()}, index=index, copy=False)
+
+
+def filter_rows(frame, column, value):
+    """Posições das linhas cujo valor na coluna contém o texto value (sem diferenciar maiúsculas)
+
+    Retorna None (todas as linhas) quando value está vazio. Colunas categóricas comparam só as categorias.
+    """
+    if not value:
+        return None
+    with trace_span('filter', rows=len(frame), column=column):
+        series = frame[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = series.cat.categories.astype(str)
+            matched = np.append(categories.str.contains(value, case=False, regex=False), False)
+            # Código -1 (vazio) aponta para o False acrescentado no fim
+            mask = matched[series.cat.codes.to_numpy()]
+        else:
+            present = series.notna().to_numpy()
+            mask = np.zeros(len(series), dtype=bool)
+            # Textos em object: o dtype str (Arrow) recusa surrogates isolados
+            text = pd.Series(_as_text(series[present]), dtype=object)
+            mask[present] = text.str.contains(value, case=False, regex=False).to_numpy(dtype=bool)
+        return np.flatnonzero(mask)
+
+
+def page_count(rows, page_size):
+    """Número de páginas para rows linhas (ao menos uma, mesmo sem linhas)"""
+    return max(1, -(-rows // page_size))
+
+
+def page_rows(frame, page, page_size, positions=None):
+    """Linhas da página (começando em 1) e o número de páginas; positions restringe às linhas filtradas
+
+    Só a fatia da página é copiada: o índice original é mantido para identificar as linhas.
+    """
+    rows = len(frame) if positions is None else len(positions)
+    pages = page_count(rows, page_size)
+    start = (min(max(page, 1), pages) - 1) * page_size
+    stop = min(start + page_size, rows)
+    if positions is None:
+        return frame.iloc[start:stop], pages
+    return frame.iloc[positions[start:stop]], pages
+
+
+def convert_frame(frame, selected_columns, column_types, column_lengths, row_limit=None, column_formats=None):
+    """Converte as colunas selecionadas de um DataFrame já lido; retorna (DataFrame convertido, perfis)"""
+    if row_limit is not None:
+        frame = frame.head(row_limit)
+    profiles = profile_columns(frame, selected_columns, column_types, column_lengths, column_formats=column_formats)
+    return assemble_output(profiles, frame.index), profiles
+
+
+def convert_frame_to_csv(frame, selected_columns, column_types, column_lengths,
+                         row_limit=None, encoding='utf-8-sig', sep=',', compression=None, column_formats=None):
+    """Converte um DataFrame já lido para CSV; retorna (bytes no encoding escolhido, ConversionResult)"""
+    output, profiles = convert_frame(
+        frame, selected_columns, column_types, column_lengths, row_limit=row_limit, column_formats=column_formats
+    )
+    buffer = io.BytesIO()
+    stats = export_frame(output, buffer, encoding=encoding, sep=sep, compression=compression)
+    return buffer.getvalue(), ConversionResult(profiles, stats['rows'], tuple(stats['parts']))
+
+
+def default_sheet_config(frame, exact=None):
+    """Configuração inicial de uma planilha: tipos, tamanhos e formatos inferidos e todas as colunas selecionadas
+
+    exact=False indica que o frame é só o início da planilha (a confiança das propostas considera isso).
+    """
+    proposals = infer_frame(frame, exact=exact)
+    return {
+        'column_types': {col: proposal.type for col, proposal in proposals.items()},
+        'column_lengths': {col: proposal.max_len or 255 for col, proposal in proposals.items()},
+        'column_formats': {col: proposal.datetime_format for col, proposal in proposals.items() if proposal.datetime_format},
+        'selected_columns': list(frame.columns),
+        'inference': proposals,
+    }
+
+
+def column_samples(frame, n=3):
+    """Texto com os n primeiros valores não vazios de cada coluna, calculado numa única passada"""
+    if frame.shape[1] == 0:
+        return []
+    present = frame.notna().to_numpy()
+    # Posição de cada valor entre os não vazios da sua coluna; ficam os n primeiros
+    keep = present & (present.cumsum(axis=0) <= n)
+    col_idx, row_idx = np.nonzero(keep.T)
+    # Só as linhas até o último valor usado são convertidas para objetos Python
+    last_row = row_idx.max() + 1 if len(row_idx) else 0
+    values = frame.iloc[:last_row].to_numpy(dtype=object)[row_idx, col_idx]
+    bounds = np.cumsum(np.bincount(col_idx, minlength=frame.shape[1]))
+    starts = np.concatenate(([0], bounds[:-1]))
+    return [', '.join(map(str, values[start:end])) for start, end in zip(starts, bounds)]
+
+
+def _convert_sheet(sheet, frame, config, row_limit, encoding, sep, compression):
+    """Tarefa executada nos workers: converte uma planilha inteira para CSV"""
+    data, result = convert_frame_to_csv(
+        frame, config['selected_columns'], config['column_types'], config['column_lengths'],
+        row_limit=row_limit, encoding=encoding, sep=sep, compression=compression,
+        column_formats=config.get('column_formats'),
+    )
+    return sheet, data, result
+
+
+def sheet_csv_names(sheets, suffix='.csv'):
+    """Nomes de arquivo seguros e únicos para cada planilha dentro do ZIP"""
+    names = {}
+    used = set()
+    for sheet in sheets:
+        base = re.sub(r'[\\/:*?"<>|]+', '_', str(sheet)).strip() or 'planilha'
+        name = f"{base}{suffix}"
+        counter = 2
+        while name.lower() in used:
+            name = f"{base}_{counter}{suffix}"
+            counter += 1
+        used.add(name.lower())
+        names[sheet] = name
+    return names
+
+
+def convert_sheets_to_zip(frames, configs, out, row_limit=None, encoding='utf-8-sig', sep=',',
+                          compression=None, executor=None, progress=None):
+    """Converte cada planilha (em paralelo, se houver executor) e grava um CSV por planilha num ZIP
+
+    progress, se informado, é chamado como progress(etapa, planilhas gravadas, total de planilhas).
+    """
+    tasks = [
+        (sheet, frame, configs.get(sheet) or default_sheet_config(frame, exact=True), row_limit, encoding, sep, compression)
+        for sheet, frame in frames.items()
+    ]
+    report = progress or (lambda stage, done=None, total=None: None)
+    report('convert', 0, len(tasks))
+    futures = []
+    if executor is None:
+        converted = (_convert_sheet(*task) for task in tasks)
+    else:
+        futures = [executor.submit(_convert_sheet, *task) for task in tasks]
+        converted = (future.result() for future in as_completed(futures))
+
+    names = sheet_csv_names(frames, suffix=export_file_name('', compression))
+    results = {}
+    zip_compression = zipfile.ZIP_STORED if compression else zipfile.ZIP_DEFLATED
+    try:
+        with zipfile.ZipFile(out, 'w', compression=zip_compression) as archive:
+            for sheet, data, result in converted:
+                report('write', len(results), len(tasks))
+                archive.writestr(names[sheet], data)
+                results[sheet] = result
+                report('convert', len(results), len(tasks))
+    except BaseException:
+        # Planilhas ainda na fila do executor não precisam mais ser convertidas
+        for future in futures:
+            future.cancel()
+        raise
+    return {sheet: results[sheet] for sheet in frames}
+
+
+def warning_records(profiles, column_types, column_lengths):
+    """Avisos de validação em formato estruturado (um registro por coluna e tipo de ajuste)"""
+    records = []
+    with trace_span('validate', check='warning_records'):
+        for col, profile in profiles.items():
+            col_type = column_types.get(col)
+            for kind in ('clamped', 'truncated', 'cleaned', 'date_failed'):
+                count = getattr(profile, kind)
+                if count:
+                    record = {'column': str(col), 'type': col_type, 'kind': kind, 'count': int(count)}
+                    if kind == 'truncated':
+                        record['max_len'] = column_lengths.get(col, 255)
+                    records.append(record)
+            if profile.error:
+                records.append({'column': str(col), 'type': col_type, 'kind': 'error', 'message': profile.error})
+    return records
+
+
+def load_spec(path):
+    """Lê a especificação de colunas de um arquivo JSON ou YAML"""
+    with open(path, encoding='utf-8') as spec_file:
+        if path.lower().endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError("PyYAML não está instalado: use uma especificação JSON ou execute 'pip install pyyaml'")
+            spec = yaml.safe_load(spec_file)
+        else:
+            spec = json.load(spec_file)
+    return spec or {}
+
+
+def resolve_spec(spec, sample, exact=False):
+    """Completa a especificação com tipos, tamanhos e formatos inferidos da amostra
+
+    Retorna (colunas, tipos, tamanhos, formatos de data, limite de linhas).
+    """
+    # Colunas são casadas pelo nome em texto (cabeçalhos numéricos viram chaves de texto em JSON/YAML)
+    by_name = {str(col): col for col in sample.columns}
+    spec_types = {str(k): v for k, v in (spec.get('column_types') or {}).items()}
+    spec_lengths = {str(k): int(v) for k, v in (spec.get('column_lengths') or {}).items()}
+    spec_formats = {str(k): v for k, v in (spec.get('column_formats') or {}).items()}
+
+    if spec.get('selected_columns'):
+        missing = [str(name) for name in spec['selected_columns'] if str(name) not in by_name]
+        if missing:
+            raise ValueError(f"Colunas não encontradas na planilha: {', '.join(missing)}")
+        selected = [by_name[str(name)] for name in spec['selected_columns']]
+    else:
+        selected = list(sample.columns)
+
+    proposals = infer_frame(sample[selected], exact=exact)
+    column_types = {col: spec_types.get(str(col)) or proposals[col].type for col in selected}
+    column_lengths = {col: spec_lengths.get(str(col), proposals[col].max_len or 255) for col in selected}
+    column_formats = {
+        col: spec_formats.get(str(col), proposals[col].datetime_format)
+        for col in selected if spec_formats.get(str(col), proposals[col].datetime_format)
+    }
+
+    row_filter = spec.get('row_filter') or {}
+    row_limit = row_limit_for(row_filter.get('mode', 'Manter todas'), row_filter.get('n', 0))
+    return selected, column_types, column_lengths, column_formats, row_limit
+
+
+class SpecConversion(NamedTuple):
+    """Resultado de convert_with_spec: contagens e linhas gravadas, configuração resolvida e motor da amostra"""
+    result: ConversionResult
+    selected_columns: list
+    column_types: dict
+    column_lengths: dict
+    engine: str
+
+
+def convert_with_spec(source, filename, spec, out, sheet_name=0, engine=AUTO_ENGINE, **convert_options):
+    """Completa a especificação com a amostra da planilha e converte o workbook inteiro, em blocos, para out
+
+    convert_options são repassadas a stream_convert_to_csv (encoding, sep, chunk_rows, progress, export_format...).
+    """
+    sample = read_excel(source, filename, engine=engine, sheet_name=sheet_name, nrows=PREVIEW_SAMPLE_ROWS)
+    selected, column_types, column_lengths, column_formats, row_limit = resolve_spec(
+        spec, sample, exact=len(sample) < PREVIEW_SAMPLE_ROWS
+    )
+    result = stream_convert_to_csv(
+        source, filename, out, selected, column_types, column_lengths, row_limit=row_limit, sheet_name=sheet_name,
+        column_formats=column_formats, engine=engine, **convert_options
+    )
+    return SpecConversion(result, selected, column_types, column_lengths, sample.attrs.get('engine'))
+
+
+def output_base_names(paths):
+    """Nome base da saída de cada planilha ({caminho: nome}), sem repetições entre os arquivos do lote
+
+    O padrão é "<nome>_convertido". Planilhas com o mesmo nome em pastas diferentes levam no nome o caminho
+    relativo à pasta comum entre elas (a/x.xlsx -> a_x_convertido); com o mesmo nome na mesma pasta, a extensão
+    (x.xls -> x_xls_convertido). Levanta ValueError se ainda restar algum nome repetido.
+    """
+    groups = {}
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        groups.setdefault(os.path.normcase(stem), []).append(path)
+
+    names = {}
+    for group in groups.values():
+        if len(group) == 1:
+            names[group[0]] = os.path.splitext(os.path.basename(group[0]))[0]
+            continue
+        common = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in group])
+        for path in group:
+            relative, extension = os.path.splitext(os.path.relpath(os.path.abspath(path), common))
+            names[path] = '_'.join(part for part in relative.split(os.sep) if part)
+        stems = [os.path.normcase(names[path]) for path in group]
+        for path in group:
+            if stems.count(os.path.normcase(names[path])) > 1:
+                names[path] = f"{names[path]}_{os.path.splitext(path)[1].lstrip('.').lower()}"
+
+    clashes = {}
+    for path, name in names.items():
+        clashes.setdefault(os.path.normcase(name), []).append(path)
+    clashes = [group for group in clashes.values() if len(group) > 1]
+    if clashes:
+        raise ValueError("Arquivos gerariam a mesma saída: " + "; ".join(", ".join(group) for group in clashes))
+    return {path: f"{names[path]}_convertido" for path in paths}
+
+
+def convert_file(path, spec, output_dir, encoding='utf-8-sig', sep=',', chunk_rows=STREAM_CHUNK_ROWS,
+                 engine=AUTO_ENGINE, base_name=None, **export_options):
+    """Converte uma planilha em disco para CSV (ou COPY do PostgreSQL); retorna um resumo serializável em JSON
+
+    Nos formatos do COPY, grava também um .sql com o CREATE TABLE correspondente. base_name é o nome da
+    saída sem extensão (padrão: "<nome>_convertido"); em lotes, use output_base_names para evitar repetições.
+    """
+    started = time.perf_counter()
+    stem = os.path.splitext(os.path.basename(path))[0]
+    base_name = base_name or f"{stem}_convertido"
+    export_format = export_options.get('export_format', 'csv')
+    split = bool(export_options.get('split_rows') or export_options.get('split_bytes'))
+    output = os.path.join(
+        output_dir, export_file_name(base_name, export_options.get('compression'), split, export_format)
+    )
+    summary = {'input': path, 'output': output}
+    try:
+        with open(output, 'wb') as out:
+            conversion = convert_with_spec(
+                path, path, spec, out, engine=engine, encoding=encoding, sep=sep, chunk_rows=chunk_rows,
+                base_name=base_name, **export_options
+            )
+        if export_format in ('pgcopy', 'pgcopy_binary'):
+            summary['ddl'] = os.path.join(output_dir, f"{base_name}.sql")
+            table = default_table_name(stem)
+            with open(summary['ddl'], 'w', encoding='utf-8') as ddl_file:
+                ddl_file.write(create_table_ddl(
+                    table, conversion.selected_columns, conversion.column_types, conversion.column_lengths
+                ))
+                ddl_file.write("-- " + copy_statement(
+                    table, conversion.selected_columns, binary=export_format == 'pgcopy_binary'
+                ))
+        summary.update(
+            status='ok',
+            rows=conversion.result.rows,
+            parts=list(conversion.result.parts),
+            column_types={str(col): col_type for col, col_type in conversion.column_types.items()},
+            engine=conversion.engine,
+            warnings=warning_records(conversion.result.profiles, conversion.column_types, conversion.column_lengths),
+        )
+    except Exception as e:
+        # Não deixar saídas vazias ou pela metade para trás
+        for leftover in (output, summary.pop('ddl', None)):
+            if leftover and os.path.exists(leftover):
+                os.remove(leftover)
+        summary.update(status='error', error=f"{type(e).__name__}: {e}", warnings=[])
+    summary['seconds'] = round(time.perf_counter() - started, 4)
+    return summary
@@ -0,0 +1,345 @@
+"""Leitura de planilhas Excel: amostras limitadas e iteração em blocos"""
+import datetime
+import io
+import os
+
+import pandas as pd
+
+from .compact import compact_frame
+from .engines import AUTO_ENGINE, run_with_fallback, source_size
+from .tracing import trace_span
+
+# Linhas por bloco no modo streaming e tamanho da amostra usada no preview
+STREAM_CHUNK_ROWS = 50000
+PREVIEW_SAMPLE_ROWS = 1000
+# Chave de cache para a leitura de todas as planilhas de uma vez
+ALL_SHEETS = '*'
+
+
+def _as_file(source):
+    """Aceita o conteúdo do arquivo (bytes) ou um caminho e devolve algo que os leitores sabem abrir"""
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    return source
+
+
+def _open_xls(source):
+    """Abre um .xls com o xlrd sob demanda, a partir de bytes ou de um caminho"""
+    import xlrd
+    if isinstance(source, (bytes, bytearray)):
+        return xlrd.open_workbook(file_contents=source, on_demand=True)
+    return xlrd.open_workbook(os.fspath(source), on_demand=True)
+
+
+def _xls_sheet(book, sheet_name):
+    """Planilha do xlrd pelo nome ou pela posição"""
+    if isinstance(sheet_name, int):
+        return book.sheet_by_index(sheet_name)
+    return book.sheet_by_name(sheet_name)
+
+
+def _openpyxl_sheet(workbook, sheet_name):
+    """Planilha do openpyxl pelo nome ou pela posição"""
+    if isinstance(sheet_name, int):
+        return workbook.worksheets[sheet_name]
+    return workbook[sheet_name]
+
+
+def list_sheets(source, filename):
+    """Nomes das planilhas do workbook, sem ler as células"""
+    if filename.lower().endswith('.xls'):
+        book = _open_xls(source)
+        try:
+            return book.sheet_names()
+        finally:
+            book.release_resources()
+    from openpyxl import load_workbook
+    workbook = load_workbook(_as_file(source), read_only=True, data_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def count_sheet_rows(source, filename, sheet_name=0):
+    """Número de linhas de dados da planilha, lido das dimensões (sem percorrer as células)"""
+    try:
+        if filename.lower().endswith('.xls'):
+            book = _open_xls(source)
+            try:
+                return max(_xls_sheet(book, sheet_name).nrows - 1, 0)
+            finally:
+                book.release_resources()
+        from openpyxl import load_workbook
+        workbook = load_workbook(_as_file(source), read_only=True, data_only=True)
+        try:
+            max_row = _openpyxl_sheet(workbook, sheet_name).max_row
+        finally:
+            workbook.close()
+        return None if max_row is None else max(max_row - 1, 0)
+    except Exception:
+        return None
+
+
+def read_excel(source, filename, engine=AUTO_ENGINE, **read_options):
+    """pd.read_excel com o motor escolhido (ou o automático) e fallback para os demais
+
+    O motor usado fica em frame.attrs['engine'] (em cada DataFrame, quando sheet_name=None).
+    """
+    with trace_span('read_excel', file=filename) as span:
+        frames, used = run_with_fallback(
+            lambda candidate: pd.read_excel(_as_file(source), engine=candidate, **read_options),
+            filename, source_size(source), engine,
+        )
+        for frame in frames.values() if isinstance(frames, dict) else (frames,):
+            frame.attrs['engine'] = used
+        span.set(engine=used, rows=sum(len(frame) for frame in frames.values()) if isinstance(frames, dict) else len(frames))
+    return frames
+
+
+def _engine_key(digest, engine):
+    """Chave do workbook no cache: leituras com motor forçado não se misturam às automáticas"""
+    return digest if engine == AUTO_ENGINE else (digest, engine)
+
+
+def read_all_sheets(cache, digest, source, filename, engine=AUTO_ENGINE, compact=False):
+    """Lê todas as planilhas abrindo o workbook uma única vez; retorna {nome: DataFrame}
+
+    compact=True guarda os DataFrames no cache em formato compacto (ver compact_frame); os valores são os
+    mesmos, por isso a chave do cache não muda.
+    """
+    def load():
+        frames = read_excel(source, filename, engine=engine, sheet_name=None)
+        return {name: compact_frame(frame) for name, frame in frames.items()} if compact else frames
+
+    return cache.get_or_load((_engine_key(digest, engine), ALL_SHEETS), load)
+
+
+def _select_columns(frame, usecols):
+    """As colunas usecols do frame (None = todas); None se alguma delas não foi lida"""
+    if usecols is None:
+        return frame
+    if any(col not in frame.columns for col in usecols):
+        return None
+    return frame[list(usecols)]
+
+
+def peek_sheet_rows(cache, digest, nrows=None, sheet_name=0, engine=AUTO_ENGINE, usecols=None):
+    """As primeiras nrows linhas (None = todas) se alguma leitura em cache já as contém; None caso contrário
+
+    Com usecols, serve também uma leitura em cache de todas as colunas ou de outras colunas que as incluam.
+    """
+    digest = _engine_key(digest, engine)
+    all_sheets = cache.peek((digest, ALL_SHEETS))
+    if all_sheets is not None and sheet_name in all_sheets:
+        frame = _select_columns(all_sheets[sheet_name], usecols)
+        if frame is not None:
+            return frame if nrows is None else frame.head(nrows)
+
+    column_keys = [()]
+    if usecols is not None:
+        # Leituras de só algumas colunas têm a tupla das colunas como último elemento da chave
+        column_keys += [key[3:] for key in cache.keys() if len(key) == 4 and key[:2] == (digest, sheet_name)]
+    for cached_rows in (None, PREVIEW_SAMPLE_ROWS, nrows):
+        for columns_key in column_keys:
+            cached = cache.peek((digest, sheet_name, cached_rows) + columns_key)
+            if cached is None:
+                continue
+            # Uma leitura limitada que trouxe menos linhas que o limite já contém a planilha inteira
+            complete = cached_rows is None or len(cached) < cached_rows
+            if complete or (nrows is not None and nrows <= cached_rows):
+                cached = _select_columns(cached, usecols)
+                if cached is not None:
+                    return cached if nrows is None else cached.head(nrows)
+    return None
+
+
+def read_sheet_rows(cache, digest, source, filename, nrows=None, sheet_name=0, engine=AUTO_ENGINE, compact=False,
+                    usecols=None):
+    """Lê só as primeiras nrows linhas (None = todas), reaproveitando leituras maiores já em cache
+
+    usecols (nomes de coluna, como no cabeçalho lido pelo pd.read_excel) restringe a leitura a essas colunas;
+    o resultado vem na ordem de usecols.
+    """
+    cached = peek_sheet_rows(cache, digest, nrows=nrows, sheet_name=sheet_name, engine=engine, usecols=usecols)
+    if cached is not None:
+        return cached
+
+    def load():
+        if usecols is None:
+            frame = read_excel(source, filename, engine=engine, sheet_name=sheet_name, nrows=nrows)
+        else:
+            frame = _read_columns(source, filename, cache, digest, nrows, sheet_name, engine, usecols)
+        return compact_frame(frame) if compact else frame
+
+    columns_key = () if usecols is None else (tuple(usecols),)
+    return cache.get_or_load((_engine_key(digest, engine), sheet_name, nrows) + columns_key, load)
+
+
+def _unnamed_position(name):
+    """Posição de uma coluna 'Unnamed: i' (None para os demais nomes)"""
+    if isinstance(name, str) and name.startswith('Unnamed: ') and name[len('Unnamed: '):].isdigit():
+        return int(name[len('Unnamed: '):])
+    return None
+
+
+def _read_columns(source, filename, cache, digest, nrows, sheet_name, engine, usecols):
+    """pd.read_excel só das colunas usecols, localizadas pela posição no cabeçalho
+
+    Os nomes vêm do cabeçalho completo: lida sozinha, uma coluna duplicada ('a.1') ou sem nome
+    ('Unnamed: 3') receberia outro nome.
+    """
+    header = peek_sheet_rows(cache, digest, nrows=0, sheet_name=sheet_name, engine=engine)
+    if header is None:
+        header = read_excel(source, filename, engine=engine, sheet_name=sheet_name, nrows=0)
+    names = list(header.columns)
+    # Colunas sem cabeçalho depois da última preenchida só existem nas linhas em que têm dados;
+    # pedir uma delas por posição falharia quando as linhas lidas não chegam até lá
+    width = max((i + 1 for i, name in enumerate(names) if _unnamed_position(name) != i), default=0)
+    positions = [names.index(col) if col in names else width for col in usecols]
+    if max(positions, default=0) >= width:
+        frame = read_excel(source, filename, engine=engine, sheet_name=sheet_name, nrows=nrows)
+        # Sem dados nas linhas lidas, a coluna fica vazia em vez de sumir
+        trailing = [col for col in usecols if col not in frame.columns and _unnamed_position(col) is not None]
+        for col in trailing:
+            frame[col] = pd.Series(None, index=frame.index, dtype=object)
+        return frame[list(usecols)]
+    positions = sorted(positions)
+    frame = read_excel(source, filename, engine=engine, sheet_name=sheet_name, nrows=nrows, usecols=positions)
+    frame.columns = [names[pos] for pos in positions]
+    return frame[list(usecols)]
+
+
+def _header_names(raw_header):
+    """Reproduz os nomes de coluna do pd.read_excel ('Unnamed: i' e duplicadas com sufixo .1, .2)
+
+    Mesma regra do leitor do pandas: os nomes preenchidos são desduplicados antes dos 'Unnamed', e um
+    sufixo que já existe no cabeçalho é pulado (a, a, a.1 -> a, a.2, a.1).
+    """
+    names = []
+    unnamed = []
+    for i, name in enumerate(raw_header):
+        if name is None or name == '':
+            names.append(f"Unnamed: {i}")
+            unnamed.append(i)
+        else:
+            names.append(name)
+    counts = {}
+    for i in [i for i in range(len(names)) if i not in unnamed] + unnamed:
+        name = original = names[i]
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[original] = count + 1
+            name = f"{original}.{count}"
+            count = count + 1 if name in names else counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+
+def _xlrd_value(cell, datemode):
+    """Converte uma célula do xlrd no mesmo valor Python que o pd.read_excel produziria"""
+    import xlrd
+    if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+        return None
+    if cell.ctype == xlrd.XL_CELL_DATE:
+        return xlrd.xldate_as_datetime(cell.value, datemode)
+    if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+        return bool(cell.value)
+    if cell.ctype == xlrd.XL_CELL_NUMBER and float(cell.value).is_integer():
+        return int(cell.value)
+    return cell.value
+
+
+def _calamine_value(value):
+    """Converte uma célula do calamine no mesmo valor Python que o openpyxl produziria"""
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else value
+    if value == '':
+        return None
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        return datetime.datetime(value.year, value.month, value.day)
+    return value
+
+
+def _calamine_rows(workbook, sheet_name):
+    """Linhas do calamine a partir da célula A1 (ele começa na primeira célula preenchida)"""
+    if isinstance(sheet_name, int):
+        sheet = workbook.get_sheet_by_index(sheet_name)
+    else:
+        sheet = workbook.get_sheet_by_name(sheet_name)
+    first_row, first_col = sheet.start or (0, 0)
+    for _ in range(first_row):
+        yield ()
+    for row in sheet.iter_rows():
+        yield (None,) * first_col + tuple(_calamine_value(value) for value in row)
+
+
+def _open_rows(source, sheet_name, engine):
+    """Abre a planilha com o motor e retorna (iterador de linhas, função que libera o arquivo)"""
+    if engine == 'xlrd':
+        book = _open_xls(source)
+        sheet = _xls_sheet(book, sheet_name)
+        rows = (tuple(_xlrd_value(cell, book.datemode) for cell in sheet.row(r)) for r in range(sheet.nrows))
+        return rows, book.release_resources
+    if engine == 'calamine':
+        from python_calamine import CalamineWorkbook
+        if isinstance(source, (bytes, bytearray)):
+            workbook = CalamineWorkbook.from_filelike(io.BytesIO(source))
+        else:
+            workbook = CalamineWorkbook.from_path(os.fspath(source))
+        return _calamine_rows(workbook, sheet_name), workbook.close
+    from openpyxl import load_workbook
+    workbook = load_workbook(_as_file(source), read_only=True, data_only=True)
+    return _openpyxl_sheet(workbook, sheet_name).iter_rows(values_only=True), workbook.close
+
+
+def iter_excel_rows(source, filename, sheet_name=0, engine=AUTO_ENGINE):
+    """Itera as linhas da planilha sem montar o workbook inteiro num DataFrame"""
+    (rows, close), _ = run_with_fallback(
+        lambda candidate: _open_rows(source, sheet_name, candidate),
+        filename, source_size(source), engine, timings=None,
+    )
+    try:
+        yield from rows
+    finally:
+        close()
+
+
+def iter_excel_chunks(source, filename, chunk_rows=STREAM_CHUNK_ROWS, nrows=None, usecols=None, sheet_name=0,
+                      engine=AUTO_ENGINE):
+    """Lê a planilha em blocos de DataFrames; a memória fica limitada ao tamanho do bloco
+
+    As células chegam como o motor as lê. O pd.read_excel, que precisa da coluna inteira, ainda converte
+    colunas em que todos os valores parecem números: textos ('001' -> 1, ' 12 ' -> 12), booleanos no meio de
+    números (True -> 1.0) e textos de vazio ('NA', 'nan' -> vazio). Aqui esses valores ficam como estão, então
+    colunas assim podem gerar saídas diferentes no modo streaming; as demais células são idênticas.
+    """
+    rows = iter_excel_rows(source, filename, sheet_name=sheet_name, engine=engine)
+    header = _header_names(next(rows, ()))
+    positions = list(range(len(header))) if usecols is None else [header.index(col) for col in usecols]
+    names = [header[i] for i in positions]
+
+    buffer = []
+    emitted = 0
+    seen = 0
+    pending_blank = 0
+    for row in rows:
+        if nrows is not None and seen >= nrows:
+            break
+        seen += 1
+        # Linhas vazias só entram se houver dados depois delas (o pd.read_excel descarta as finais)
+        if all(v is None for v in row):
+            pending_blank += 1
+            continue
+        for _ in range(pending_blank):
+            buffer.append([None] * len(positions))
+        pending_blank = 0
+        buffer.append([row[i] if i < len(row) else None for i in positions])
+        if len(buffer) >= chunk_rows:
+            yield pd.DataFrame(buffer, columns=names, index=pd.RangeIndex(emitted, emitted + len(buffer)))
+            emitted += len(buffer)
+            buffer = []
+
+    if buffer or emitted == 0:
+        yield pd.DataFrame(buffer, columns=names, index=pd.RangeIndex(emitted, emitted + len(buffer)))
@@ -0,0 +1,213 @@
+"""Instrumentação das etapas (leitura, inferência, conversão, validação, exportação): tempo, linhas/s e pico de memória
+
+Sem um Tracer ativo, trace_span devolve um contexto vazio compartilhado: o custo é uma consulta a uma ContextVar.
+"""
+import collections
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+logger = logging.getLogger('conversor.trace')
+
+# Spans guardados por tracer; os mais antigos são descartados (a sessão pode ficar aberta por horas)
+MAX_SPANS = 20000
+
+_CURRENT = contextvars.ContextVar('conversor_tracer', default=None)
+
+
+class _NullSpan:
+    """Span usado quando a instrumentação está desligada"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Medição de uma etapa; use set(rows=..., ...) para informar dados só conhecidos no fim"""
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start = None
+        self.duration = None
+        self.peak_bytes = None
+        self._base = 0
+        self._high = 0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.tracer._enter(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer._exit(self)
+        return False
+
+    def record(self, origin=0.0):
+        """Registro serializável em JSON (start em segundos desde origin)"""
+        record = {'name': self.name, 'start': self.start - origin, 'seconds': self.duration}
+        rows = self.attrs.get('rows')
+        if rows is not None and self.duration:
+            record['rows_per_sec'] = rows / self.duration
+        if self.peak_bytes is not None:
+            record['peak_bytes'] = self.peak_bytes
+        record.update(self.attrs)
+        return record
+
+
+class Tracer:
+    """Coleta os spans das etapas executadas enquanto está ativo (ver set_tracer e use_tracer)
+
+    Com memory=True, o tracemalloc é ligado e cada span registra o pico de memória alocada acima do nível
+    em que começou (as medições de threads simultâneas se misturam, pois o tracemalloc é global).
+    """
+
+    def __init__(self, memory=False, log=True, max_spans=MAX_SPANS):
+        self.memory = memory
+        self.log = log
+        self.origin = time.perf_counter()
+        self.spans = collections.deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._stacks = threading.local()
+        self._started_tracemalloc = False
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def span(self, name, **attrs):
+        return Span(self, name, attrs)
+
+    def _stack(self):
+        stack = getattr(self._stacks, 'spans', None)
+        if stack is None:
+            stack = self._stacks.spans = []
+        return stack
+
+    def _update_peaks(self, stack):
+        """Propaga o pico desde o último reset para os spans abertos e recomeça a medição"""
+        current, peak = tracemalloc.get_traced_memory()
+        for open_span in stack:
+            open_span._high = max(open_span._high, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def _enter(self, span):
+        stack = self._stack()
+        if self.memory and tracemalloc.is_tracing():
+            span._base = span._high = self._update_peaks(stack)
+        stack.append(span)
+
+    def _exit(self, span):
+        stack = self._stack()
+        if self.memory and tracemalloc.is_tracing():
+            self._update_peaks(stack)
+            span.peak_bytes = max(span._high - span._base, 0)
+        if stack and stack[-1] is span:
+            stack.pop()
+        span.attrs.setdefault('thread', threading.current_thread().name)
+        with self._lock:
+            self.spans.append(span)
+        if self.log and logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(span.record(self.origin), ensure_ascii=False, default=str))
+
+    def records(self):
+        """Spans concluídos, em ordem de início"""
+        with self._lock:
+            spans = list(self.spans)
+        return sorted((span.record(self.origin) for span in spans), key=lambda record: record['start'])
+
+    def summary(self):
+        """Totais por etapa: chamadas, segundos, linhas, linhas/s e maior pico de memória"""
+        totals = {}
+        for record in self.records():
+            total = totals.setdefault(record['name'], {'calls': 0, 'seconds': 0.0, 'rows': 0, 'peak_bytes': None})
+            total['calls'] += 1
+            total['seconds'] += record['seconds']
+            total['rows'] += record.get('rows') or 0
+            if record.get('peak_bytes') is not None:
+                total['peak_bytes'] = max(total['peak_bytes'] or 0, record['peak_bytes'])
+        for total in totals.values():
+            total['rows_per_sec'] = total['rows'] / total['seconds'] if total['rows'] and total['seconds'] else None
+        return totals
+
+    def to_json(self):
+        """Spans e totais por etapa em JSON"""
+        return json.dumps(
+            {'spans': self.records(), 'summary': self.summary()}, ensure_ascii=False, indent=2, default=str
+        )
+
+    def to_chrome_trace(self):
+        """Spans no formato Trace Event do Chrome (abrir em chrome://tracing ou no Perfetto)"""
+        pid = os.getpid()
+        threads = {}
+        events = []
+        for record in self.records():
+            args = {key: value for key, value in record.items() if key not in ('name', 'start', 'seconds', 'thread')}
+            tid = threads.setdefault(record.get('thread'), len(threads) + 1)
+            events.append({
+                'name': record['name'] if 'column' not in record else f"{record['name']}:{record['column']}",
+                'cat': 'conversor', 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': record['start'] * 1e6, 'dur': record['seconds'] * 1e6, 'args': args,
+            })
+        for thread, tid in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': str(thread)}})
+        return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}, ensure_ascii=False, default=str)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+        self.origin = time.perf_counter()
+
+    def close(self):
+        """Desliga o tracemalloc, se foi ligado por este tracer"""
+        if self._started_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracemalloc = False
+
+
+def trace_span(name, **attrs):
+    """Mede um trecho no Tracer ativo: with trace_span('convert', column=col, rows=n): ..."""
+    tracer = _CURRENT.get()
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, **attrs)
+
+
+def current_tracer():
+    return _CURRENT.get()
+
+
+def set_tracer(tracer):
+    """Ativa o tracer (None desliga) no contexto atual; retorna o token para restaurar o anterior"""
+    return _CURRENT.set(tracer)
+
+
+@contextlib.contextmanager
+def use_tracer(tracer):
+    """Ativa um tracer dentro de um bloco with"""
+    token = _CURRENT.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _CURRENT.reset(token)
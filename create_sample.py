@@ -1,6 +1,10 @@
+import os
 import pandas as pd
 from datetime import datetime, timedelta
 
+# Diretório do projeto: o arquivo de exemplo fica ao lado do script
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # Criar dados de exemplo
 data = {
     'ID': [1, 2, 3, 4, 5],
@@ -23,6 +27,6 @@ data = {
 df = pd.DataFrame(data)
 
 # Salvar como Excel
-df.to_excel('/home/ubuntu/xls-to-csv-converter/exemplo_funcionarios.xlsx', index=False)
+df.to_excel(os.path.join(BASE_DIR, 'exemplo_funcionarios.xlsx'), index=False)
 print("Arquivo de exemplo criado: exemplo_funcionarios.xlsx")
 
@@ -1,44 +1,172 @@
-import pandas as pd
+import argparse
+import os
 from datetime import datetime
 
-# Criar dados com problemas típicos
-data = {
-    'ID_Pequeno': [1, 2, 3, 4, 5],
-    'ID_Grande': [3000000000, 5000000000, 9999999999, 1234567890123, 999999999],  # Valores fora do range INTEGER
-    'Nome_Problematico': [
-        'João Silva',
-        'María García',  # Caracteres especiais
-        'Test•Invalid',  # Caractere especial
-        'Normal Name',
-        'Émilie Château'  # Acentos franceses
-    ],
-    'Valor_Extremo': [2147483647, 2147483648, -2147483648, -2147483649, 1000000000],  # No limite e além
-    'Texto_UTF8': [
-        'Olá Mundo! 🌍',
-        'Привет мир',  # Russo
-        '你好世界',  # Chinês
-        'مرحبا بالعالم',  # Árabe
-        'Hello World'
-    ],
-    'Salario': [3500.50, 4200.75, 5100.00, 3800.25, 6500.00],
-    'Data': [
-        datetime(2020, 1, 15),
-        datetime(2019, 5, 20),
-        datetime(2018, 3, 10),
-        datetime(2021, 7, 1),
-        datetime(2017, 11, 25)
-    ]
-}
-
-# Criar DataFrame
-df = pd.DataFrame(data)
-
-# Salvar como Excel
-df.to_excel('/home/ubuntu/xls-to-csv-converter/teste_problematico.xlsx', index=False)
-print("Arquivo de teste com problemas criado: teste_problematico.xlsx")
-print("\nProblemas incluídos:")
-print("- Valores INTEGER fora do intervalo (-2147483648 a 2147483647)")
-print("- Caracteres especiais e acentuação")
-print("- Múltiplos encodings (russo, chinês, árabe, emojis)")
-print("- Caracteres de controle inválidos")
+import numpy as np
+import pandas as pd
+
+# Diretório do projeto: os arquivos gerados ficam ao lado dos scripts
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Tipos de coluna do gerador sintético, repetidos em ciclo até completar o número de colunas
+COLUMN_KINDS = ['id', 'bigint', 'text', 'int_extreme', 'utf8', 'float', 'date']
+# Caracteres removidos pela limpeza de strings (não imprimíveis, mas aceitos pelo formato XLSX)
+INVALID_CHARS = ['\u200b', '\x85', '\x9f', '\u00ad', '\ufeff']
+UTF8_WORDS = ['Olá Mundo! 🌍', 'Привет мир', '你好世界', 'مرحبا بالعالم', 'Émilie Château', 'María García']
+
+
+def problematic_frame():
+    """Os 5 registros clássicos com problemas típicos"""
+    data = {
+        'ID_Pequeno': [1, 2, 3, 4, 5],
+        'ID_Grande': [3000000000, 5000000000, 9999999999, 1234567890123, 999999999],  # Valores fora do range INTEGER
+        'Nome_Problematico': [
+            'João Silva',
+            'María García',  # Caracteres especiais
+            'Test•Invalid',  # Caractere especial
+            'Normal Name',
+            'Émilie Château'  # Acentos franceses
+        ],
+        'Valor_Extremo': [2147483647, 2147483648, -2147483648, -2147483649, 1000000000],  # No limite e além
+        'Texto_UTF8': [
+            'Olá Mundo! 🌍',
+            'Привет мир',  # Russo
+            '你好世界',  # Chinês
+            'مرحبا بالعالم',  # Árabe
+            'Hello World'
+        ],
+        'Salario': [3500.50, 4200.75, 5100.00, 3800.25, 6500.00],
+        'Data': [
+            datetime(2020, 1, 15),
+            datetime(2019, 5, 20),
+            datetime(2018, 3, 10),
+            datetime(2021, 7, 1),
+            datetime(2017, 11, 25)
+        ]
+    }
+    return pd.DataFrame(data)
+
+
+def _texts(rng, rows, text_length, invalid_share, words=None):
+    """Textos de até text_length caracteres; uma fração invalid_share recebe um caractere inválido"""
+    if words is None:
+        alphabet = np.array(list('abcdefghijklmnopqrstuvwxyz áéíóúãõç'))
+        lengths = rng.integers(1, text_length + 1, size=rows)
+        # Um conjunto limitado de textos distintos, como em colunas reais (nomes, cidades...)
+        pool = [''.join(rng.choice(alphabet, size=n)).strip() or 'x' for n in lengths[:min(rows, 5000)]]
+        texts = np.array(pool, dtype=object)[rng.integers(0, len(pool), size=rows)]
+    else:
+        texts = np.array(words, dtype=object)[rng.integers(0, len(words), size=rows)]
+    invalid = np.flatnonzero(rng.random(rows) < invalid_share)
+    chars = rng.choice(INVALID_CHARS, size=len(invalid))
+    for pos, char in zip(invalid, chars):
+        texts[pos] = texts[pos][:1] + char + texts[pos][1:]
+    return texts
+
+
+def _extreme_ints(rng, rows, out_of_range_share, limit):
+    """Inteiros dentro de [-limit-1, limit]; uma fração out_of_range_share passa do limite"""
+    values = rng.integers(-limit - 1, limit, size=rows, endpoint=True)
+    outside = rng.random(rows) < out_of_range_share
+    overflow = rng.integers(1, 1000, size=int(outside.sum()))
+    values[outside] = np.where(rng.random(len(overflow)) < 0.5, limit + overflow, -limit - 1 - overflow)
+    return values
+
+
+def synthetic_frame(rows, columns=len(COLUMN_KINDS), text_length=30, invalid_share=0.01, out_of_range_share=0.01,
+                    seed=0):
+    """Planilha sintética com os mesmos tipos de problema de problematic_frame, em qualquer tamanho"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(columns):
+        kind = COLUMN_KINDS[i % len(COLUMN_KINDS)]
+        name = kind if i < len(COLUMN_KINDS) else f"{kind}_{i // len(COLUMN_KINDS)}"
+        if kind == 'id':
+            data[name] = np.arange(1, rows + 1)
+        elif kind == 'bigint':
+            data[name] = rng.integers(2 ** 31, 2 ** 40, size=rows)
+        elif kind == 'text':
+            data[name] = _texts(rng, rows, text_length, invalid_share)
+        elif kind == 'int_extreme':
+            data[name] = _extreme_ints(rng, rows, out_of_range_share, 2 ** 31 - 1)
+        elif kind == 'utf8':
+            data[name] = _texts(rng, rows, text_length, invalid_share, words=UTF8_WORDS)
+        elif kind == 'float':
+            data[name] = np.round(rng.uniform(1000, 20000, size=rows), 2)
+        else:
+            days = rng.integers(0, 365 * 30, size=rows)
+            data[name] = pd.Timestamp('1995-01-01') + pd.to_timedelta(days, unit='D')
+    return pd.DataFrame(data)
+
+
+def write_workbook(path, frames):
+    """Grava {planilha: DataFrame} em XLSX
+
+    Usa o xlsxwriter, se instalado (bem mais rápido); senão, o modo write-only do openpyxl (memória constante por linha).
+    """
+    try:
+        import xlsxwriter  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        with pd.ExcelWriter(path, engine='xlsxwriter') as writer:
+            for sheet, frame in frames.items():
+                frame.to_excel(writer, sheet_name=str(sheet)[:31], index=False)
+        return path
+
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    for sheet, frame in frames.items():
+        worksheet = workbook.create_sheet(str(sheet)[:31])
+        worksheet.append([str(col) for col in frame.columns])
+        columns = [frame[col].to_numpy(dtype=object) for col in frame.columns]
+        for row in zip(*columns):
+            worksheet.append([value.to_pydatetime() if isinstance(value, pd.Timestamp) else value for value in row])
+    workbook.save(path)
+    return path
+
+
+def generate_workbook(path, rows, columns=len(COLUMN_KINDS), text_length=30, invalid_share=0.01,
+                      out_of_range_share=0.01, sheets=1, seed=0):
+    """Gera um workbook sintético com sheets planilhas de rows linhas"""
+    frames = {
+        f"Planilha{i + 1}": synthetic_frame(rows, columns, text_length, invalid_share, out_of_range_share, seed + i)
+        for i in range(sheets)
+    }
+    return write_workbook(path, frames)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Gera o arquivo de teste com problemas típicos; com --rows, gera um workbook sintético do tamanho pedido."
+    )
+    parser.add_argument('--rows', type=int, help="Linhas por planilha (sem esta opção, gera os 5 registros clássicos)")
+    parser.add_argument('--columns', type=int, default=len(COLUMN_KINDS), help="Número de colunas (os tipos se repetem em ciclo)")
+    parser.add_argument('--text-length', type=int, default=30, help="Tamanho máximo dos textos gerados")
+    parser.add_argument('--invalid-share', type=float, default=0.01, help="Fração dos textos com caracteres inválidos")
+    parser.add_argument('--out-of-range-share', type=float, default=0.01, help="Fração dos inteiros fora do intervalo INTEGER")
+    parser.add_argument('--sheets', type=int, default=1, help="Número de planilhas")
+    parser.add_argument('--seed', type=int, default=0, help="Semente do gerador aleatório")
+    parser.add_argument('-o', '--output', help="Arquivo de saída (padrão: teste_problematico.xlsx no diretório do projeto)")
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_parser().parse_args()
+    output = args.output or os.path.join(BASE_DIR, 'teste_problematico.xlsx')
 
+    if args.rows is None:
+        # Criar DataFrame e salvar como Excel
+        problematic_frame().to_excel(output, index=False)
+        print(f"Arquivo de teste com problemas criado: {output}")
+        print("\nProblemas incluídos:")
+        print("- Valores INTEGER fora do intervalo (-2147483648 a 2147483647)")
+        print("- Caracteres especiais e acentuação")
+        print("- Múltiplos encodings (russo, chinês, árabe, emojis)")
+        print("- Caracteres de controle inválidos")
+    else:
+        generate_workbook(
+            output, args.rows, columns=args.columns, text_length=args.text_length, invalid_share=args.invalid_share,
+            out_of_range_share=args.out_of_range_share, sheets=args.sheets, seed=args.seed,
+        )
+        print(f"Workbook sintético criado: {output} ({args.sheets} planilha(s) de {args.rows} linhas e {args.columns} colunas)")
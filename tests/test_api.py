@@ -0,0 +1,54 @@
+"""API HTTP: respostas de /convert chamando a aplicação ASGI diretamente"""
+import asyncio
+import io
+import json
+
+import pandas as pd
+
+import api
+
+
+def _request(app, body, query=b'filename=dados.xlsx&format=csv'):
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # Cliente conectado até o fim da resposta
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'path': '/convert', 'method': 'POST', 'query_string': query, 'headers': []}
+    asyncio.run(app(scope, receive, send))
+    start = next(message for message in sent if message['type'] == 'http.response.start')
+    body = b''.join(message.get('body', b'') for message in sent if message['type'] == 'http.response.body')
+    return start['status'], dict(start['headers']), body
+
+
+def _workbook():
+    out = io.BytesIO()
+    pd.DataFrame({'id': [1, 2], 'nome': ['a', 'b']}).to_excel(out, index=False)
+    return out.getvalue()
+
+
+def test_convert_streams_csv():
+    status, headers, body = _request(api.ConversionAPI(max_concurrent=1), _workbook())
+    assert status == 200
+    assert headers[b'content-type'].startswith(b'text/csv')
+    assert body.decode('utf-8-sig').splitlines() == ['id,nome', '1,a', '2,b']
+
+
+def test_error_before_first_send_returns_json(monkeypatch):
+    def failing_convert(source, filename, spec, out, **kwargs):
+        # Menos que API_SEND_BYTES: nada chegou a ser enviado ao cliente
+        out.write(b'id,nome\r\n')
+        raise ValueError('coluna inexistente')
+
+    monkeypatch.setattr(api, 'convert_with_spec', failing_convert)
+    status, headers, body = _request(api.ConversionAPI(max_concurrent=1), _workbook())
+    assert status == 422
+    assert headers[b'content-type'].startswith(b'application/json')
+    assert json.loads(body) == {'error': 'ValueError: coluna inexistente'}
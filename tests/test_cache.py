@@ -0,0 +1,104 @@
+"""Caches LRU de workbooks e de colunas convertidas"""
+import datetime
+import os
+
+import pandas as pd
+import pytest
+
+from conversor import ALL_SHEETS, ColumnCache, WorkbookCache, compact_frame, profile_columns
+
+
+def _frame(n=3):
+    frame = pd.DataFrame({'nome': ['a', 'b', 'c'][:n], 2020: [1, 2, 3][:n], datetime.datetime(2021, 1, 1): [1.5, None, 2][:n]})
+    frame.attrs['engine'] = 'openpyxl'
+    return frame
+
+
+def test_lru_eviction_and_counters():
+    cache = WorkbookCache(max_entries=2)
+    loads = []
+
+    def loader(key):
+        return lambda: loads.append(key) or _frame()
+
+    for key in ('a', 'b', 'a', 'c', 'b'):
+        cache.get_or_load(key, loader(key))
+    # 'a' foi usado depois de 'b', então 'b' saiu ao entrar 'c' e precisou ser lido de novo
+    assert loads == ['a', 'b', 'c', 'b']
+    assert cache.stats() == {'hits': 1, 'disk_hits': 0, 'misses': 4, 'evictions': 2, 'entries': 2}
+    assert cache.peek('a') is None
+    assert cache.peek('b') is not None
+
+
+def test_spill_round_trip(tmp_path):
+    pytest.importorskip('pyarrow')
+    cache = WorkbookCache(max_entries=1, spill_dir=str(tmp_path))
+    frame = _frame()
+    sheets = {'Planilha1': compact_frame(_frame()), 'Planilha2': _frame(2)}
+    cache.get_or_load(('x', 0, None), lambda: frame)
+    cache.get_or_load(('x', ALL_SHEETS), lambda: sheets)
+    cache.get_or_load('outro', lambda: _frame())
+    assert len(os.listdir(tmp_path)) == 2
+
+    def fail():
+        raise AssertionError("deveria vir do disco")
+
+    restored = cache.get_or_load(('x', 0, None), fail)
+    pd.testing.assert_frame_equal(restored, frame)
+    assert list(restored.columns) == ['nome', 2020, datetime.datetime(2021, 1, 1)]
+    assert restored.attrs == {'engine': 'openpyxl'}
+
+    restored_sheets = cache.get_or_load(('x', ALL_SHEETS), fail)
+    assert list(restored_sheets) == ['Planilha1', 'Planilha2']
+    for name, sheet in sheets.items():
+        pd.testing.assert_frame_equal(restored_sheets[name], sheet)
+    assert cache.stats()['disk_hits'] == 2
+
+
+def test_spilled_files_are_removed_and_bounded(tmp_path):
+    pytest.importorskip('pyarrow')
+    cache = WorkbookCache(max_entries=1, spill_dir=str(tmp_path), max_spilled=2)
+    for key in range(5):
+        cache.get_or_load(key, _frame)
+    # Quatro entradas despejadas, só as duas mais recentes ficam em disco
+    assert len(os.listdir(tmp_path)) == 2
+    cache.get_or_load(3, _frame)
+    assert cache.stats()['disk_hits'] == 1
+    # A entrada recuperada sai do disco; a que deu lugar a ela entra
+    assert len(os.listdir(tmp_path)) == 2
+    assert cache.get_or_load(0, lambda: 'relido') == 'relido'
+
+
+def test_column_cache_reconverts_only_changed_columns():
+    cache = ColumnCache()
+    frame = pd.DataFrame({'a': ['1', '2'], 'b': ['x', 'y']})
+    source = ('hash', 'Plan1', 'openpyxl', True, len(frame))
+    types = {'a': 'int', 'b': 'varchar'}
+
+    first = profile_columns(frame, ['a', 'b'], types, {}, column_cache=cache, cache_key=source)
+    again = profile_columns(frame, ['a', 'b'], types, {}, column_cache=cache, cache_key=source)
+    assert again['a'] is first['a'] and again['b'] is first['b']
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 2
+
+    profile_columns(frame, ['a', 'b'], {'a': 'int', 'b': 'bigint'}, {}, column_cache=cache, cache_key=source)
+    assert cache.stats()['hits'] == 3 and cache.stats()['misses'] == 3
+
+
+def test_column_cache_key_separates_engine_and_storage():
+    cache = ColumnCache()
+    frame = pd.DataFrame({'a': ['1', '2']})
+    for engine, compact in (('openpyxl', True), ('calamine', True), ('openpyxl', False)):
+        profile_columns(frame, ['a'], {'a': 'int'}, {}, column_cache=cache,
+                        cache_key=('hash', 'Plan1', engine, compact, len(frame)))
+    assert cache.stats()['hits'] == 0 and cache.stats()['misses'] == 3
+
+
+def test_column_cache_evicts_by_entries():
+    cache = ColumnCache(max_entries=2)
+    frame = pd.DataFrame({'a': ['1'], 'b': ['2'], 'c': ['3']})
+    types = {'a': 'varchar', 'b': 'varchar', 'c': 'varchar'}
+    profile_columns(frame, ['a', 'b', 'c'], types, {}, column_cache=cache, cache_key=('hash',))
+    stats = cache.stats()
+    assert stats['entries'] == 2 and stats['evictions'] == 1
+    profile_columns(frame, ['a'], types, {}, column_cache=cache, cache_key=('hash',))
+    assert cache.stats()['misses'] == 4
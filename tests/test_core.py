@@ -0,0 +1,56 @@
+"""Versões vetorizadas do núcleo comparadas às funções escalares originais"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from conversor import BIGINT_MAX, INT_MAX, clamp_int_series, clean_string, clean_string_series, validate_int_range
+
+INT_VALUES = [
+    np.nan, None, '', 'abc', '0x10', '- 3', pd.Timestamp('2020-01-01'),
+    True, False, 1.9, -1.9, 1e300, float('inf'), float('-inf'), 'inf', 'nan',
+    2 ** 31, -2 ** 31 - 1, INT_MAX, BIGINT_MAX, 2 ** 63, -2 ** 63, -2 ** 63 - 1, '99999999999999999999',
+    2 ** 53 + 1, -(2 ** 53) - 1, '9007199254740993', '9223372036854775808',
+    '42', ' 12 ', '+7', '007', '1e3', '1.5e2', '1_000', '１２',
+]
+
+
+@pytest.mark.parametrize('use_bigint', [False, True])
+def test_clamp_int_matches_validate_int_range(use_bigint):
+    series = pd.Series(INT_VALUES, dtype=object)
+    expected = [validate_int_range(value, use_bigint) for value in INT_VALUES]
+    assert list(clamp_int_series(series, use_bigint)) == expected
+
+
+@pytest.mark.parametrize('use_bigint', [False, True])
+def test_clamp_int_matches_on_text_dtype(use_bigint):
+    texts = ['42', ' 12 ', '1_000', 'abc', '9007199254740993', None]
+    series = pd.Series(texts, dtype='string')
+    assert list(clamp_int_series(series, use_bigint)) == [validate_int_range(text, use_bigint) for text in texts]
+
+
+@pytest.mark.parametrize('dtype', [np.uint64, np.int64, np.int8])
+@pytest.mark.parametrize('use_bigint', [False, True])
+def test_clamp_int_matches_on_integer_dtypes(dtype, use_bigint):
+    info = np.iinfo(dtype)
+    values = np.array([info.max, info.min, 0, 5, min(2 ** 53 + 1, info.max)], dtype=dtype)
+    expected = [validate_int_range(value, use_bigint) for value in values]
+    assert list(clamp_int_series(pd.Series(values), use_bigint)) == expected
+
+
+def test_clamp_int_bool_and_float_dtypes():
+    assert list(clamp_int_series(pd.Series([True, False]))) == [1, 0]
+    floats = [np.nan, 2.5, -3e10, 3e10]
+    assert list(clamp_int_series(pd.Series(floats))) == [validate_int_range(value) for value in floats]
+
+
+def test_clean_string_series_matches_clean_string():
+    # Surrogate isolado no meio de tipos mistos: o dtype str (Arrow) não o aceita
+    values = ['a\udc80b', 1, 1.0, True, None, np.nan, '  x\x00y  ', 'ok\n']
+    series = pd.Series(values, dtype=object)
+    assert list(clean_string_series(series)) == [clean_string(value) for value in values]
+
+
+def test_clean_string_series_surrogate_in_text_column():
+    values = ['a\udc80b', 'c', None]
+    series = pd.Series(values, dtype=object)
+    assert list(clean_string_series(series)) == [clean_string(value) for value in values]
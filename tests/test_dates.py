@@ -0,0 +1,58 @@
+"""Conversão de datas: vazios, seriais do Excel, detecção de formato e fallback dd/mm"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from conversor import DateCache, detect_date_format, excel_serial_to_datetime, parse_datetimes
+
+
+def test_blank_texts_count_as_missing():
+    series = pd.Series(['15/01/2020', ' ', '31/12/2021', '', None], dtype=object)
+    result, failed = parse_datetimes(series, cache=DateCache())
+    assert failed == 0
+    assert list(result[[0, 2]]) == [pd.Timestamp('2020-01-15'), pd.Timestamp('2021-12-31')]
+    assert result[[1, 3, 4]].isna().all()
+
+
+def test_blank_texts_on_string_dtype():
+    series = pd.Series(['2020-01-15', '  ', None], dtype='string')
+    result, failed = parse_datetimes(series, cache=DateCache())
+    assert failed == 0
+    assert result[0] == pd.Timestamp('2020-01-15')
+    assert result[1:].isna().all()
+
+
+def test_excel_serials():
+    values = excel_serial_to_datetime([43831, 43831.5, -1, np.nan, 1e9])
+    assert pd.Timestamp(values[0]) == pd.Timestamp('2020-01-01')
+    assert pd.Timestamp(values[1]) == pd.Timestamp('2020-01-01 12:00')
+    assert pd.isna(values[2:]).all()
+
+    result, failed = parse_datetimes(pd.Series([43831, None, -5.0]), cache=DateCache())
+    assert result[0] == pd.Timestamp('2020-01-01')
+    assert failed == 1
+
+
+def test_mixed_objects():
+    series = pd.Series([datetime.datetime(2020, 1, 2), 43831, '03/02/2020', 'abc', True], dtype=object)
+    result, failed = parse_datetimes(series, cache=DateCache())
+    assert list(result[:3]) == [pd.Timestamp('2020-01-02'), pd.Timestamp('2020-01-01'), pd.Timestamp('2020-02-03')]
+    assert failed == 2
+
+
+def test_detect_date_format():
+    assert detect_date_format(['31/12/2020', '01/02/2021']) == '%d/%m/%Y'
+    assert detect_date_format(['2020-12-31', '2021-02-01']) == '%Y-%m-%d'
+    assert detect_date_format(['12/31/2020', '02/28/2021']) == '%m/%d/%Y'
+    assert detect_date_format(['abc', 'x']) is None
+
+
+def test_other_formats_fall_back_to_day_first():
+    # Formato detectado dd/mm; uma data ISO e uma fora de qualquer formato conhecido
+    series = pd.Series(['01/02/2020', '03/04/2020', '2020-05-06', '7 8 2020'], dtype=object)
+    result, failed = parse_datetimes(series, cache=DateCache())
+    assert failed == 0
+    assert list(result) == [
+        pd.Timestamp('2020-02-01'), pd.Timestamp('2020-04-03'), pd.Timestamp('2020-05-06'), pd.Timestamp('2020-08-07'),
+    ]
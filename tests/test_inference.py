@@ -0,0 +1,31 @@
+"""Inferência de tipos a partir de amostras"""
+import datetime
+
+import pandas as pd
+
+from conversor import infer_column, infer_frame
+
+
+def test_surrogate_text_is_varchar():
+    proposal = infer_column(pd.Series(['a\udc80b', 'c', None], dtype=object))
+    assert proposal.type == 'varchar'
+    assert proposal.max_len >= 3
+
+
+def test_numeric_text_and_ranges():
+    assert infer_column(pd.Series(['1', ' 2 ', None], dtype=object), exact=True).type == 'int'
+    assert infer_column(pd.Series([1, 2 ** 40], dtype=object), exact=True).type == 'bigint'
+    assert infer_column(pd.Series([1.5, 2], dtype=object), exact=True).type == 'float'
+    assert infer_column(pd.Series(['sim', 'não', 'NA'], dtype=object), exact=True).type == 'bool'
+
+
+def test_dates_with_format():
+    proposal = infer_column(pd.Series(['31/12/2020', '01/02/2021'], dtype=object), exact=True)
+    assert (proposal.type, proposal.datetime_format) == ('datetime', '%d/%m/%Y')
+    assert infer_column(pd.Series([datetime.datetime(2020, 1, 1)] * 3), exact=True).type == 'datetime'
+
+
+def test_infer_frame_and_empty_column():
+    proposals = infer_frame(pd.DataFrame({'a': ['x', 'yy'], 'b': [None, None]}), exact=True)
+    assert proposals['a'].type == 'varchar'
+    assert proposals['b'].confidence == 0.0
@@ -0,0 +1,121 @@
+"""Formatos do COPY do PostgreSQL: a saída binária é decodificada campo a campo"""
+import datetime
+import io
+import struct
+
+import numpy as np
+import pandas as pd
+
+from conversor import PgCopyBinaryWriter, PgCopyTextWriter, copy_statement, create_table_ddl
+
+TYPES = {'i': 'int', 'b': 'bigint', 'f': 'float', 'ok': 'bool', 'ts': 'datetime', 'nome': 'varchar'}
+_PG_EPOCH = datetime.datetime(2000, 1, 1)
+
+
+def _frame():
+    return pd.DataFrame({
+        'i': pd.Series([1, -2], dtype='int32'),
+        'b': pd.Series([2 ** 40, 0], dtype='int64'),
+        'f': [1.5, np.nan],
+        'ok': [True, False],
+        'ts': pd.to_datetime(['2024-03-01 12:30:00.000001', None]),
+        'nome': ['ação', ''],
+    })
+
+
+def _decode_binary(data):
+    """Linhas do arquivo PGCOPY como listas de bytes por campo (None para NULL)"""
+    assert data[:11] == b'PGCOPY\n\xff\r\n\x00'
+    flags, extension = struct.unpack_from('>ii', data, 11)
+    assert (flags, extension) == (0, 0)
+    pos, rows = 19, []
+    while True:
+        (count,) = struct.unpack_from('>h', data, pos)
+        pos += 2
+        if count == -1:
+            break
+        row = []
+        for _ in range(count):
+            (size,) = struct.unpack_from('>i', data, pos)
+            pos += 4
+            if size == -1:
+                row.append(None)
+            else:
+                row.append(data[pos:pos + size])
+                pos += size
+        rows.append(row)
+    assert pos == len(data)
+    return rows
+
+
+def test_binary_fields_and_trailer():
+    out = io.BytesIO()
+    writer = PgCopyBinaryWriter(out, TYPES)
+    writer.write(_frame())
+    stats = writer.close()
+    rows = _decode_binary(out.getvalue())
+    assert stats == {'rows': 2, 'bytes': len(out.getvalue())}
+    assert len(rows) == 2 and all(len(row) == 6 for row in rows)
+
+    first, second = rows
+    assert struct.unpack('>i', first[0]) == (1,)
+    assert struct.unpack('>i', second[0]) == (-2,)
+    assert struct.unpack('>q', first[1]) == (2 ** 40,)
+    assert struct.unpack('>d', first[2]) == (1.5,)
+    assert second[2] is None
+    assert first[3] == b'\x01' and second[3] == b'\x00'
+    (micros,) = struct.unpack('>q', first[4])
+    assert _PG_EPOCH + datetime.timedelta(microseconds=micros) == datetime.datetime(2024, 3, 1, 12, 30, 0, 1)
+    assert second[4] is None
+    assert first[5] == 'ação'.encode('utf-8')
+    # Texto vazio vira NULL, como no COPY ... CSV
+    assert second[5] is None
+
+
+def test_binary_blocks_share_one_header():
+    out = io.BytesIO()
+    writer = PgCopyBinaryWriter(out, TYPES)
+    writer.write(_frame())
+    writer.write(_frame().iloc[:0])
+    writer.write(_frame())
+    writer.close()
+    assert len(_decode_binary(out.getvalue())) == 4
+
+
+def test_binary_empty_output_is_valid():
+    out = io.BytesIO()
+    assert PgCopyBinaryWriter(out, TYPES).close()['rows'] == 0
+    assert _decode_binary(out.getvalue()) == []
+
+
+def test_text_escaping_and_nulls():
+    frame = pd.DataFrame({
+        'nome': ['a\\b', 'tab\there', 'linha\nnova\r', None, ''],
+        'f': [1.5, np.nan, np.inf, -np.inf, 0.0],
+    })
+    out = io.BytesIO()
+    PgCopyTextWriter(out, {'nome': 'varchar', 'f': 'float'}).write(frame)
+    assert out.getvalue().decode('utf-8').split('\n') == [
+        'a\\\\b\t1.5',
+        'tab\\there\t\\N',
+        'linha\\nnova\\r\tInfinity',
+        '\\N\t-Infinity',
+        '\\N\t0.0',
+        '',
+    ]
+
+
+def test_text_fixed_types():
+    out = io.BytesIO()
+    PgCopyTextWriter(out, TYPES).write(_frame())
+    lines = out.getvalue().decode('utf-8').splitlines()
+    assert lines == [
+        '1\t1099511627776\t1.5\tt\t2024-03-01T12:30:00.000001\tação',
+        '-2\t0\t\\N\tf\t\\N\t\\N',
+    ]
+
+
+def test_ddl_and_copy_statement():
+    ddl = create_table_ddl('dados', ['id', 'Nome "x"'], {'id': 'int', 'Nome "x"': 'varchar'}, {'Nome "x"': 40})
+    assert ddl == 'CREATE TABLE "dados" (\n    "id" integer,\n    "Nome ""x""" varchar(40)\n);\n'
+    assert copy_statement('dados', ['id'], binary=True) == 'COPY "dados" ("id") FROM STDIN WITH (FORMAT binary);\n'
@@ -0,0 +1,33 @@
+"""Filtro e paginação das prévias"""
+import numpy as np
+import pandas as pd
+
+from conversor import compact_frame, filter_rows, page_rows
+
+
+def test_filter_rows_matches_text_ignoring_case():
+    # Coluna object com um surrogate isolado (o dtype str não o aceita)
+    frame = pd.DataFrame({
+        'a': pd.Series(['Foo', 'bar', None, 'FOOd', 'a\udc80b'], dtype=object), 'b': [1, 19, 3, 190, 5],
+    })
+    assert filter_rows(frame, 'a', '') is None
+    assert list(filter_rows(frame, 'a', 'foo')) == [0, 3]
+    assert list(filter_rows(frame, 'a', 'b')) == [1, 4]
+    assert list(filter_rows(frame, 'b', '19')) == [1, 3]
+
+
+def test_filter_rows_on_categorical():
+    frame = compact_frame(pd.DataFrame({'a': ['Foo', 'bar', None, 'FOOd'] * 50}))
+    assert isinstance(frame['a'].dtype, pd.CategoricalDtype)
+    assert list(filter_rows(frame, 'a', 'foo')[:4]) == [0, 3, 4, 7]
+
+
+def test_page_rows():
+    frame = pd.DataFrame({'a': range(250)})
+    page, pages = page_rows(frame, 3, 100)
+    assert pages == 3 and list(page.index) == list(range(200, 250))
+    # Página fora do intervalo vai para a última; sem linhas há uma página vazia
+    assert list(page_rows(frame, 9, 100)[0].index) == list(range(200, 250))
+    assert page_rows(frame.head(0), 1, 100)[1] == 1
+    page, pages = page_rows(frame, 2, 2, positions=np.array([5, 7, 9]))
+    assert pages == 2 and list(page.index) == [9]
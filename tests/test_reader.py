@@ -0,0 +1,106 @@
+"""Leitura em blocos (iter_excel_chunks) e por colunas (read_sheet_rows) comparadas ao pd.read_excel"""
+import datetime
+
+import pandas as pd
+import pytest
+
+from conversor import WorkbookCache, convert_file, iter_excel_chunks, peek_sheet_rows, read_excel, read_sheet_rows
+
+openpyxl = pytest.importorskip('openpyxl')
+
+
+def _workbook(tmp_path, header, rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    path = tmp_path / 'planilha.xlsx'
+    workbook.save(path)
+    return str(path)
+
+
+def _streamed(path, chunk_rows=2):
+    return pd.concat(list(iter_excel_chunks(path, path, chunk_rows=chunk_rows, engine='openpyxl')))
+
+
+def test_typed_cells_match_read_excel(tmp_path):
+    path = _workbook(tmp_path, ['id', 'nome', 'valor', 'data', 'ativo'], [
+        [1, 'Ana', 1.5, datetime.datetime(2024, 1, 2), True],
+        [2, None, None, None, False],
+        [None, None, None, None, None],
+        [4, 'Caio', 3.25, datetime.datetime(2024, 3, 4, 5, 6), True],
+    ])
+    expected = read_excel(path, path, engine='openpyxl')
+    streamed = _streamed(path)
+    for col in expected.columns:
+        assert [None if pd.isna(v) else v for v in streamed[col]] == \
+               [None if pd.isna(v) else v for v in expected[col]], col
+
+
+def test_streaming_keeps_cells_read_excel_coerces(tmp_path):
+    # Diferença documentada: o pd.read_excel converte colunas inteiras que parecem numéricas
+    path = _workbook(tmp_path, ['codigo', 'misto', 'vazio'], [['001', 1, 'NA'], ['002', True, 'x']])
+    expected = read_excel(path, path, engine='openpyxl')
+    streamed = _streamed(path)
+
+    assert list(expected['codigo']) == [1, 2]
+    assert list(streamed['codigo']) == ['001', '002']
+    assert list(expected['misto']) == [1.0, 1.0]
+    assert list(streamed['misto']) == [1, True]
+    assert pd.isna(expected['vazio'][0])
+    assert streamed['vazio'][0] == 'NA'
+
+
+def test_repeated_and_blank_headers_match_read_excel(tmp_path):
+    path = _workbook(tmp_path, ['a', 'a', 'a.1', None, 'b', 'b', 2020, 2020], [[1, 2, 3, 4, 5, 6, 7, 8]])
+    expected = read_excel(path, path, engine='openpyxl')
+    assert list(expected.columns) == ['a', 'a.2', 'a.1', 'Unnamed: 3', 'b', 'b.1', 2020, '2020.1']
+    streamed = _streamed(path)
+    assert list(streamed.columns) == list(expected.columns)
+
+    usecols = ['a.2', 'Unnamed: 3', '2020.1']
+    chunk = next(iter_excel_chunks(path, path, usecols=usecols, engine='openpyxl'))
+    assert list(chunk.columns) == usecols
+    assert chunk.iloc[0].tolist() == [2, 4, 8]
+
+
+def test_convert_file_removes_output_on_error(tmp_path):
+    path = _workbook(tmp_path, ['a'], [[1]])
+    output_dir = tmp_path / 'saida'
+    output_dir.mkdir()
+    summary = convert_file(path, {'selected_columns': ['inexistente']}, str(output_dir))
+    assert summary['status'] == 'error'
+    assert list(output_dir.iterdir()) == []
+
+
+@pytest.mark.parametrize('rows', [
+    [[1, 2, 3, 'x', None], [4, 5, 6, None, None]],
+    # Coluna sem cabeçalho depois da última preenchida, com dados só na segunda linha
+    [[1, 2, 3, None, None, None], [4, 5, 6, None, 'z', 'w']],
+])
+def test_usecols_keeps_full_header_names(tmp_path, rows):
+    path = _workbook(tmp_path, ['a', 'a', 'b', None, 'c'], rows)
+    expected = read_excel(path, path, engine='openpyxl')
+    usecols = [col for col in expected.columns if col != 'b']
+    for nrows in (None, 1):
+        got = read_sheet_rows(WorkbookCache(), 'hash', path, path, nrows=nrows, engine='openpyxl', usecols=usecols)
+        assert list(got.columns) == usecols
+        for col in usecols:
+            assert [None if pd.isna(v) else v for v in got[col]] == \
+                   [None if pd.isna(v) else v for v in expected[col].head(nrows)], col
+
+
+def test_usecols_served_from_cached_reads(tmp_path):
+    path = _workbook(tmp_path, ['id', 'nome', 'valor'], [[1, 'Ana', 1.5], [2, 'Bia', 2.5]])
+    cache = WorkbookCache()
+    read_sheet_rows(cache, 'hash', path, path, engine='openpyxl', usecols=['id', 'valor'])
+    assert cache.stats()['misses'] == 1
+    # Menos colunas, outra ordem: sai da leitura em cache
+    assert list(peek_sheet_rows(cache, 'hash', engine='openpyxl', usecols=['valor']).columns) == ['valor']
+    assert list(read_sheet_rows(cache, 'hash', path, path, nrows=1, engine='openpyxl', usecols=['valor', 'id']).columns) == ['valor', 'id']
+    assert cache.stats()['misses'] == 1
+    # Coluna que não foi lida: nova leitura
+    assert peek_sheet_rows(cache, 'hash', engine='openpyxl', usecols=['nome']) is None
+    read_sheet_rows(cache, 'hash', path, path, engine='openpyxl')
+    assert list(peek_sheet_rows(cache, 'hash', engine='openpyxl', usecols=['nome']).columns) == ['nome']